@@ -0,0 +1,130 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# ffgo-import-time.py --- Check the time needed to import FFGo's main module
+# Copyright (c) 2016, Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Check the time needed to import FFGo's main module.
+
+Run 'python3 -X importtime -c "import ffgo.main"' a few times (using the
+unpacked source next to this script), and fail with exit status 1 if:
+
+  - the best cumulative import time of ffgo.main exceeds the budget;
+  - or a module that is supposed to be imported lazily (only when the
+    corresponding feature is used) has been imported.
+
+No display is needed, since the Tk object is only created by
+ffgo.main.main(). The Python bytecode should have been compiled
+beforehand, otherwise the compilation time is included in the results.
+
+"""
+
+import os
+import sys
+import re
+import argparse
+import subprocess
+
+
+# Default budget for 'import ffgo.main', in milliseconds
+DEFAULT_BUDGET = 250
+# Modules that must not be imported by 'import ffgo.main'
+LAZY_MODULES = ("PIL.Image", "PIL.ImageTk", "geographiclib.geodesic",
+                "condconfigparser", "xml.etree.ElementTree", "ffgo.fswatcher",
+                "ffgo.inotify", "ffgo.fgcmdbuilder", "ffgo.fgdata.apt_dat",
+                "numpy")
+
+# 'import time: self [us] | cumulative | imported package', the package
+# name being indented by two spaces per nesting level
+importTime_cre = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| "
+    r"(?P<indent> *)(?P<module>\S+)$")
+
+
+def measure():
+    """Import ffgo.main in a new interpreter.
+
+    Return a dictionary mapping the name of each imported module to a
+    tuple (self, cumulative) giving its import time in microseconds.
+
+    """
+    env = os.environ.copy()
+    srcPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [srcPath] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ffgo.main"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    if proc.returncode:
+        sys.exit("Error while importing ffgo.main:\n" + proc.stderr)
+
+    res = {}
+    for line in proc.stderr.splitlines():
+        mo = importTime_cre.match(line)
+        if mo:
+            res[mo.group("module")] = (int(mo.group("self")),
+                                       int(mo.group("cumulative")))
+
+    return res
+
+
+def processCommandLine():
+    parser = argparse.ArgumentParser(
+        description="Check the time needed to import FFGo's main module.")
+    parser.add_argument("-b", "--budget", type=float, default=DEFAULT_BUDGET,
+                        help="maximum import time of ffgo.main in "
+                        "milliseconds (default: %(default)s)")
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="number of measurements; the best one is "
+                        "compared to the budget (default: %(default)s)")
+    parser.add_argument("-t", "--top", type=int, default=15,
+                        help="number of modules listed by decreasing self "
+                        "import time (default: %(default)s)")
+
+    return parser.parse_args()
+
+
+def main():
+    params = processCommandLine()
+    best = None
+
+    for i in range(params.runs):
+        timings = measure()
+        if best is None or \
+           timings["ffgo.main"][1] < best["ffgo.main"][1]:
+            best = timings
+
+    total = best["ffgo.main"][1] / 1000
+    print("Slowest modules in the best run (self time, cumulative time):")
+    for name, (self_, cumulative) in sorted(
+            best.items(), key=lambda item: item[1][0],
+            reverse=True)[:params.top]:
+        print("  {:<40} {:8.1f} ms {:8.1f} ms".format(
+            name, self_ / 1000, cumulative / 1000))
+
+    print("\nimport ffgo.main: {:.1f} ms (budget: {:.1f} ms)".format(
+        total, params.budget))
+    failed = False
+
+    eagerlyImported = [ name for name in LAZY_MODULES if name in best ]
+    if eagerlyImported:
+        print("Modules that should only be imported when needed: "
+              + ", ".join(eagerlyImported))
+        failed = True
+
+    if total > params.budget:
+        print("Import time budget exceeded.")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,16 @@
 import sys
 import os
 import re
+import math
+import concurrent.futures
 import gzip
 import contextlib
 import gettext
+import json
 import traceback
-import collections
 import itertools
 import textwrap
-from xml.etree import ElementTree
+import collections
 from tkinter import IntVar, StringVar
 from tkinter.messagebox import askyesno, showinfo, showerror
 import tkinter.font
@@ -21,9 +23,13 @@ from . import misc
 from .misc import resourceExists, textResourceStream
 from .constants import *
 from .logging import logger, LogLevel
+from . import state_snapshot
 from .fgdata.aircraft import Aircraft
 
 
+# Number of threads used to list the Terrain/<10x10 degrees> directories
+TERRAIN_SCAN_THREADS = 8
+
 def setupTranslationHelper(config):
     global pgettext
 
@@ -140,6 +146,15 @@ class Config:
         self.airportStatsExpiryPeriod = IntVar()
         self.aircraftStatsShowPeriod = IntVar()
         self.aircraftStatsExpiryPeriod = IntVar()
+        # Limits for the cache of detailed airport data (Config.aptDatCache)
+        self.airportDataCacheMaxEntries = IntVar()
+        self.airportDataCacheMaxMemory = IntVar() # in KiB, 0 = no limit
+        # Whether to write airport stores (detailed airport data ready for
+        # direct access) when building the apt digest file
+        self.useAirportStores = IntVar()
+        # Whether to watch the aircraft, scenery and AI scenario directories
+        # for changes (only possible on Linux)
+        self.watchFilesystem = IntVar()
 
         self.keywords = {'--aircraft=': self.aircraft,
                          '--airport=': self.airport,
@@ -190,19 +205,64 @@ class Config:
                          'AIRCRAFT_STATS_SHOW_PERIOD=':
                          self.aircraftStatsShowPeriod,
                          'AIRCRAFT_STATS_EXPIRY_PERIOD=':
-                         self.aircraftStatsExpiryPeriod}
+                         self.aircraftStatsExpiryPeriod,
+                         'AIRPORT_DATA_CACHE_MAX_ENTRIES=':
+                         self.airportDataCacheMaxEntries,
+                         'AIRPORT_DATA_CACHE_MAX_MEMORY=':
+                         self.airportDataCacheMaxMemory,
+                         'USE_AIRPORT_STORES=': self.useAirportStores,
+                         'WATCH_FILESYSTEM=': self.watchFilesystem}
 
         # List of apt_dat.AptDatFileInfo instances extracted from the apt
         # digest file: nothing so far (this indicates the list of apt.dat files
         # used to build the apt digest file, with some metadata).
         self.aptDatFilesInfoFromDigest = []
+        # apt_dat.AptDatSetManager instance (cf. self.update())
+        self.aptDatSetManager = None
         # In order to avoid using a lot of memory, detailed airport data is
         # only loaded on demand. Since this is quite slow, keep a cache of the
-        # last retrieved data.
-        self.aptDatCache = collections.deque(maxlen=50)
+        # last retrieved data (ICAO -> Airport instance). The limits are set
+        # in self.update() according to the config file.
+        self.aptDatCache = misc.LRUCache(
+            sizeFunc=lambda airport: airport.approxMemorySize())
+        # misc.TaskGraph instance used by the last self.update() call (allows
+        # using data read in the background, such as the apt digest).
+        self.startupTasks = None
+        # fswatcher.FilesystemWatcher instance, or None (cf.
+        # self.startFilesystemWatcher())
+        self.fsWatcher = None
+        self._fsWatcherNotifyFunc = None
+        # Terrain/<10x10 degrees> directory -> set of the 1x1 degree tiles it
+        # contains (as returned by self._stringToCoordinates()), and number
+        # of such directories containing each tile. Only maintained while
+        # the Terrain directories are watched.
+        self._terrainTiles = {}
+        self._installedTileCounts = collections.Counter()
+        # Cache for self._airportsByTile()
+        self._airportTileIndex = None
+        # Settings each piece of derived data was computed from by the last
+        # successful self.update() call (cf. self._derivedDataInputs()),
+        # and names of the pieces of derived data that this call
+        # recomputed.
+        self._lastDerivedDataInputs = {}
+        self.updatedData = frozenset()
 
         self._earlyTranslationsSetup()
         self._createUserDirectories()
+        # Persistent cache for the results of 'fgfs --version' and
+        # 'fgfs --json-report'. This import requires the translation system
+        # [_() function] to be in place.
+        from .fgdata import fgfs_cache
+        self.fgfsCache = fgfs_cache.FGFSQueryCache()
+        # Persistent catalogue of the -set.xml files found in the aircraft
+        # directories
+        from .fgdata import aircraft_catalog
+        self.aircraftCatalog = aircraft_catalog.AircraftCatalog()
+        # Carriers and descriptions of the AI scenarios
+        from .fgdata import scenario_index
+        self.scenarioIndex = scenario_index.ScenarioIndex()
+        # Data loaded at startup, reused as long as its inputs don't change
+        self.stateSnapshot = state_snapshot.StateSnapshot()
         self._maybeMigrateFromFGoConfig()
         # Not having the FlightGear version at this point is not important
         # enough to justify pestering the user about it. :-)
@@ -289,16 +349,126 @@ class Config:
             style.configure("Treeview.Heading", font=self.treeviewHeadingFont)
 
     def makeInstalledAptList(self):
+        """Update INSTALLED_APT according to the Terrain tiles on disk.
+
+        Return the same value as self._updateInstalledAptList().
+
+        """
         logger.notice(_("Building the list of installed airports "
                         "(this may take some time)..."))
-        # writelines() used below doesn't automatically add line terminators
-        airports = [ icao + '\n' for icao in self._findInstalledApt() ]
+        return self._updateInstalledAptList(self._findInstalledTiles())
+
+    def _updateInstalledAptList(self, tiles):
+        """Update INSTALLED_APT for the set of installed 'tiles'.
+
+        If INSTALLED_APT was written by this method from the same apt
+        digest file, only the airports located in the tiles added or
+        removed since then are examined (cf. INSTALLED_APT_TILES).
+        Return a tuple (added, removed) of sets of airport identifiers,
+        or None if INSTALLED_APT was built from scratch.
+
+        """
+        airportsByTile = self._airportsByTile()
+        previousTiles = self._readInstalledAptTiles()
+
+        if previousTiles is None:
+            res = None
+            installedApt = { icao for tile in tiles
+                             for icao in airportsByTile.get(tile, ()) }
+        else:
+            installedApt = set(self._readInstalledAptFile(INSTALLED_APT))
+            added, removed = set(), set()
+            for tile in tiles - previousTiles:
+                added.update(airportsByTile.get(tile, ()))
+            for tile in previousTiles - tiles:
+                removed.update(airportsByTile.get(tile, ()))
+            # Tiles are disjoint, an airport can't be in both sets.
+            added -= installedApt
+            removed &= installedApt
+
+            res = (added, removed)
+            if tiles == previousTiles:
+                return res
+
+            installedApt.update(added)
+            installedApt.difference_update(removed)
+
         logger.info("Opening '{}' for writing".format(INSTALLED_APT))
         with open(INSTALLED_APT, "w", encoding="utf-8") as fout:
-            fout.writelines(airports)
+            # writelines() doesn't automatically add line terminators
+            fout.writelines([ icao + '\n' for icao in sorted(installedApt) ])
+
+        self._writeInstalledAptTiles(tiles)
+        return res
+
+    def _fileStamp(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        return [st.st_mtime_ns, st.st_size]
+
+    def _readInstalledAptTiles(self):
+        """Read the set of tiles used to build INSTALLED_APT.
+
+        Return None if INSTALLED_APT_TILES is missing or unusable, or if
+        INSTALLED_APT or the apt digest file have changed since it was
+        written.
+
+        """
+        try:
+            with open(INSTALLED_APT_TILES, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (not isinstance(data, dict) or data.get("formatVersion") != 1 or
+            data.get("installedApt") != self._fileStamp(INSTALLED_APT) or
+            data.get("aptDigest") != self._fileStamp(APT)):
+            return None
+
+        return { ((lat, lat + 1), (lon, lon + 1))
+                 for lat, lon in data["tiles"] }
+
+    def _writeInstalledAptTiles(self, tiles):
+        # Store the tiles as [latMin, lonMin] lists
+        data = {"formatVersion": 1,
+                "installedApt": self._fileStamp(INSTALLED_APT),
+                "aptDigest": self._fileStamp(APT),
+                "tiles": sorted([ [tile[0][0], tile[1][0]]
+                                  for tile in tiles ])}
+
+        logger.info("Opening '{}' for writing".format(INSTALLED_APT_TILES))
+        with open(INSTALLED_APT_TILES, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def _airportsByTile(self):
+        """Return a dictionary mapping tiles to lists of airport identifiers.
+
+        Tiles are represented as returned by self._stringToCoordinates().
+        The dictionary is cached until self.airports is replaced.
+
+        """
+        if (self._airportTileIndex is None or
+            self._airportTileIndex[0] is not self.airports):
+            index = collections.defaultdict(list)
+            for icao, airport in self.airports.items():
+                tile = self._tileOfAirport(airport)
+                if tile is not None:
+                    index[tile].append(icao)
+
+            self._airportTileIndex = (self.airports, index)
+
+        return self._airportTileIndex[1]
 
     def readMetarDat(self):
         """Fetch METAR station list from metar.dat.gz file"""
+        fingerprint = state_snapshot.fileFingerprint(self.metar_path)
+        res = self.stateSnapshot.get("metarStations", fingerprint)
+        if res is not None:
+            return list(res)
+
         logger.info("Opening '{}' for reading".format(self.metar_path))
         res = []
 
@@ -307,6 +477,9 @@ class Config:
                 if not line.startswith('#'):
                     res.append(line.strip())
 
+        if state_snapshot.fileFingerprint(self.metar_path) == fingerprint:
+            self.stateSnapshot.put("metarStations", fingerprint, res)
+
         return res
 
     def _computeAircraftDirList(self):
@@ -337,21 +510,35 @@ class Config:
         logger.log(logLevel, prefix, message)
 
     def getFlightGearVersion(self, ignoreFGVersionError=False, log=False):
+        FG_version, exc = self._queryFlightGearVersion(
+            self.FG_bin.get(), self.FG_root.get(), self.FG_working_dir.get())
+        self._setFlightGearVersion(FG_version, exc, ignoreFGVersionError, log)
+
+    def _queryFlightGearVersion(self, FG_bin, FG_root, FG_working_dir):
+        """Run 'fgfs --version' if possible, using the cache.
+
+        Return a tuple (FG_version, exc) where 'exc' is None or the
+        fgversion.error instance raised when trying to get the version.
+        This method doesn't use any Tk variable, therefore it can be
+        run in any thread.
+
+        """
         # This import requires the translation system [_() function] to be in
         # place.
         from .fgdata import fgversion
 
-        self.FG_version = None  # in case an exception is raised below
-        FG_bin = self.FG_bin.get()
-        FG_root = self.FG_root.get()
-        exc = None
-
         if FG_bin and FG_root:
             try:
-                self.FG_version = fgversion.getFlightGearVersion(
-                    FG_bin, FG_root, self.FG_working_dir.get())
+                return (self.fgfsCache.getFlightGearVersion(
+                    FG_bin, FG_root, FG_working_dir), None)
             except fgversion.error as e:
-                exc = e         # may need to be raised later
+                return (None, e)  # the exception may need to be raised later
+
+        return (None, None)
+
+    def _setFlightGearVersion(self, FG_version, exc, ignoreFGVersionError,
+                              log):
+        self.FG_version = FG_version
 
         if log:
             self.logDetectedFlightGearVersion()
@@ -359,6 +546,36 @@ class Config:
         if exc is not None and not ignoreFGVersionError:
             raise exc
 
+    def _queryAptDatList(self, FG_versionAndExc, FG_bin, FG_working_dir,
+                         sceneryPathsArgs, FG_root, defaultAptDatFile):
+        """Return the list of apt.dat files to use.
+
+        'FG_versionAndExc' is the return value of
+        self._queryFlightGearVersion(). Like the latter, this method can
+        be run in any thread.
+
+        """
+        # These imports require the translation system [_() function] to be
+        # in place.
+        from .fgdata.fgversion import FlightGearVersion
+        FG_version = FG_versionAndExc[0]
+
+        # The fgfs option --json-report appeared in FlightGear 2016.4.1
+        if (FG_bin and FG_version is not None and
+            FG_version >= FlightGearVersion([2016, 4, 1])):
+            # This may take a while!
+            logger.info(_("Querying FlightGear's JSON report..."))
+            with logger.timingSpan("fgfs --json-report"):
+                fgReport = self.fgfsCache.getFlightGearJSONReport(
+                    FG_bin, FG_working_dir, sceneryPathsArgs, FG_root)
+            # The FlightGear code for --json-report ensures that every element
+            # of this list is an existing file.
+            return fgReport["navData"]["aptDatPaths"]
+        elif os.path.isfile(defaultAptDatFile):
+            return [defaultAptDatFile]
+        else:
+            return []
+
     # This is a callback for FFGo's misc.Observable class.
     def updateAircraftNameAndDirFromAircraftId(self, aircraftId):
         aircraftName, aircraftDir = aircraftId
@@ -452,11 +669,21 @@ class Config:
             # parking position. The latter wins. :-)
             self.rwy.set('')
 
-    def update(self, path=None, ignoreFGVersionError=False, logFGVersion=True):
+    @logger.timingSpan("Config.update")
+    def update(self, path=None, ignoreFGVersionError=False, logFGVersion=True,
+               force=False):
         """Read config file and update variables.
 
         path is a path to different than default config file
 
+        The FlightGear version and the list of apt.dat files are always
+        queried again (this is cheap when 'fgfs' hasn't changed, thanks
+        to self.fgfsCache). Other derived data (aircraft list, scenario
+        list, etc.) is only recomputed if the settings it depends on
+        have changed, or if the filesystem isn't watched for changes,
+        unless 'force' is True. This should be the case for an explicit
+        reload of the config file by the user.
+
         """
         if self.aircraftStatsManager is None: # application init
             # Requires the translation system to be in place
@@ -469,16 +696,15 @@ class Config:
             # self.aircraftStatsExpiryPeriod.
             self.aircraftStatsManager.save()
 
+        # The derived data (aircraft list, scenario list, etc.) is kept
+        # and only recomputed if the settings it depends on have changed,
+        # see below.
         del self.settings
         del self.text
         del self.aircraft_dirs
         del self.defaultAptDatFile
         del self.ai_path
         del self.metar_path
-        del self.aircraftDict
-        del self.aircraftList
-        del self.scenario_list
-        del self.carrier_list
 
         # The variable will be set again right after reading the config
         # file, therefore there is no need to run the callbacks now
@@ -524,8 +750,13 @@ class Config:
         self.airportStatsExpiryPeriod.set('3652') # approx. ten years
         self.aircraftStatsShowPeriod.set('365')
         self.aircraftStatsExpiryPeriod.set('3652')
+        self.airportDataCacheMaxEntries.set('200')
+        self.airportDataCacheMaxMemory.set('16384')
+        self.useAirportStores.set('0')
+        self.watchFilesystem.set('1')
 
-        self.settings, self.text = self._read(path)
+        with logger.timingSpan("Config._read"):
+            self.settings, self.text = self._read(path)
 
         for line in self.settings:
             cut = line.find('=') + 1
@@ -542,6 +773,11 @@ class Config:
         # Useful to know when the airport has been changed
         self.previousAirport = self.airport.get()
 
+        maxMemory = self.airportDataCacheMaxMemory.get()
+        self.aptDatCache.setLimits(
+            maxEntries=self.airportDataCacheMaxEntries.get(),
+            maxSize=1024*maxMemory if maxMemory > 0 else None)
+
         self._setLanguage(self.language.get())
         setupTranslationHelper(self)
 
@@ -553,48 +789,210 @@ class Config:
         self.ai_path = os.path.join(self.FG_root.get(), AI_DIR)
         self.metar_path = os.path.join(self.FG_root.get(), METAR_DAT)
 
-        self.aircraftDict, self.aircraftList = self._readAircraft()
+        # These imports require the translation system [_() function] to be in
+        # place.
+        from .fgdata import apt_dat
+        from .fgcmdbuilder import FGCommandBuilder
+
+        inputs = self._derivedDataInputs()
+        stale = self._staleDerivedData(inputs, force=force)
+        logger.debug("Config.update(): recomputing {}".format(
+            ", ".join(sorted(stale)) or "nothing"))
+
+        # The following steps are mostly independent of each other, and
+        # spend much of their time waiting for the disk or for fgfs. Run
+        # them concurrently. The Tk variables they need are read here,
+        # because they must only be used from the main thread.
+        FG_bin = self.FG_bin.get()
+        FG_root = self.FG_root.get()
+        FG_working_dir = self.FG_working_dir.get()
+        tasks = misc.TaskGraph()
+        if "aircraft" in stale:
+            tasks.add("aircraft",
+                      logger.timingSpan("Config._readAircraft")(
+                          self._readAircraft))
+        if "scenarios" in stale:
+            tasks.add("scenarios",
+                      logger.timingSpan("Config._readScenarios")(
+                          self._readScenarios))
+        # Always recomputed (cf. self._alwaysRecomputedData)
+        tasks.add("FGVersion",
+                  logger.timingSpan("fgfs --version")(
+                      self._queryFlightGearVersion),
+                  FG_bin, FG_root, FG_working_dir)
+        # The list of apt.dat files comes from 'fgfs --json-report' if the
+        # FlightGear version is recent enough.
+        tasks.add("aptDatList", self._queryAptDatList,
+                  FG_bin, FG_working_dir,
+                  FGCommandBuilder.sceneryPathsArgs(self), FG_root,
+                  self.defaultAptDatFile, deps=["FGVersion"])
+        if "airportList" in stale:
+            # Files used by App.buildAirportList(): read them in advance (cf.
+            # self._preloadedFileData()).
+            tasks.add("aptDigest",
+                      logger.timingSpan("apt digest preloading")(
+                          self._preloadFile),
+                      APT, self._readAptDigest)
+            if self.filteredAptList.get():
+                tasks.add("installedApt", self._preloadFile, INSTALLED_APT,
+                          self._readInstalledAptFile)
+        tasks.close()
+        self.startupTasks = tasks
+
+        # Now use the results in the main thread, as they become available.
+        if "aircraft" in stale:
+            self.aircraftDict, self.aircraftList = tasks.result("aircraft")
         # Load the saved statistics into the new in-memory Aircraft instances
         # (the set of aircraft may have just changed, hence the need to save
         # the stats before the in-memory aircraft list is updated, and reload
         # them afterwards).
-        self.aircraftStatsManager.load()
+        with logger.timingSpan("AircraftStatsManager.load"):
+            self.aircraftStatsManager.load()
         # Choose a suitable aircraft, even if the one defined by
         # 'self.aircraft' and 'self.aircraftDir' isn't available.
         self.aircraftId.set(self._findAircraft(self.aircraft.get(),
                                                self.aircraftDir.get()))
 
-        self.scenario_list, self.carrier_list = self._readScenarios()
+        if "scenarios" in stale:
+            self.scenario_list, self.carrier_list = tasks.result("scenarios")
         self.sanityChecks()
 
-        self.getFlightGearVersion(ignoreFGVersionError=ignoreFGVersionError,
-                                  log=logFGVersion)
+        FG_version, exc = tasks.result("FGVersion")
+        self._setFlightGearVersion(FG_version, exc, ignoreFGVersionError,
+                                   logFGVersion)
+
+        aptDatList = tasks.result("aptDatList")
+        if (self.aptDatSetManager is None or
+            list(aptDatList) != list(self.aptDatSetManager.aptDatList)):
+            # For instance, a new NavData/apt directory in a scenery path, or
+            # a new FlightGear version installed in place: the airport list
+            # and the watched directories depend on the list of apt.dat
+            # files, not only on the settings.
+            stale |= {"airportList", "watches"}
+        self.aptDatSetManager = apt_dat.AptDatSetManager(
+            aptDatList, useAirportStores=bool(self.useAirportStores.get()))
+        if "watches" in stale:
+            # The directories to watch may have changed.
+            self._updateFilesystemWatcher()
+
+        # Only record the inputs now: if an exception was raised above,
+        # everything will be recomputed on the next call.
+        self._lastDerivedDataInputs = inputs
+        self.updatedData = frozenset(stale)
+
+    def _derivedDataInputs(self):
+        """Return the settings each piece of derived data depends on.
+
+        Return a dictionary whose keys are the names of the pieces of
+        data computed by self.update() and its callers, and whose values
+        can be compared to those returned by a previous call in order to
+        know whether the data must be recomputed.
 
-        # These imports require the translation system [_() function] to be in
-        # place.
-        from .fgdata import apt_dat, json_report
+        """
+        # These imports require the translation system [_() function] to be
+        # in place.
         from .fgcmdbuilder import FGCommandBuilder
-        from .fgdata.fgversion import FlightGearVersion
-        fgBin = self.FG_bin.get()
 
-        # The fgfs option --json-report appeared in FlightGear 2016.4.1
-        if (fgBin and self.FG_version is not None and
-            self.FG_version >= FlightGearVersion([2016, 4, 1])):
-            # This may take a while!
-            logger.info(_("Querying FlightGear's JSON report..."), end=' ')
-            fgReport = json_report.getFlightGearJSONReport(
-                fgBin, self.FG_working_dir.get(),
-                FGCommandBuilder.sceneryPathsArgs(self))
-            logger.info(_("OK."))
-            # The FlightGear code for --json-report ensures that every element
-            # of this list is an existing file.
-            aptDatList = fgReport["navData"]["aptDatPaths"]
-        elif os.path.isfile(self.defaultAptDatFile):
-            aptDatList = [self.defaultAptDatFile]
-        else:
-            aptDatList = []
+        aircraftDirs = tuple(self.aircraft_dirs)
+        FGVersion = (self.FG_bin.get(), self.FG_root.get(),
+                     self.FG_working_dir.get())
+        aptDatList = (FGVersion,
+                      tuple(FGCommandBuilder.sceneryPathsArgs(self)),
+                      self.defaultAptDatFile, self.useAirportStores.get())
+
+        return {
+            # self.aircraftDict, self.aircraftList
+            "aircraft": aircraftDirs,
+            # self.scenario_list, self.carrier_list
+            "scenarios": self.ai_path,
+            # self.FG_version
+            "FGVersion": FGVersion,
+            # self.aptDatSetManager (and the scenery paths)
+            "aptDatList": aptDatList,
+            # Aircraft list widget (cf. App.resetLists())
+            "aircraftList": (aircraftDirs,
+                             self.aircraftStatsShowPeriod.get()),
+            # Airport list widget and the apt digest file it is built from
+            "airportList": (aptDatList, self.filteredAptList.get(),
+                            self.auto_update_apt.get(),
+                            self.airportStatsShowPeriod.get()),
+            # Directories watched by self.fsWatcher
+            "watches": (aircraftDirs, self.ai_path, aptDatList,
+                        self.watchFilesystem.get())}
+
+    # Derived data that can't be known to be up-to-date unless
+    # self.fsWatcher applies the changes made on disk
+    _filesystemDependentData = frozenset(
+        ("aircraft", "scenarios", "aptDatList", "aircraftList",
+         "airportList", "watches"))
+    # Derived data recomputed by each self.update() call, whatever the
+    # settings: 'fgfs' may have been upgraded in place, and apt.dat files
+    # may have appeared outside the watched directories. Both are cheap to
+    # query when nothing has changed, thanks to self.fgfsCache.
+    _alwaysRecomputedData = frozenset(("FGVersion", "aptDatList"))
+
+    def _staleDerivedData(self, inputs, force=False):
+        """Return the set of names of the derived data to recompute.
+
+        'inputs' should be the return value of self._derivedDataInputs().
+        If 'force' is True, all derived data is stale. Otherwise, a piece
+        of data is stale if its inputs have changed since the last
+        successful self.update() call, if it is read from disk and the
+        filesystem isn't watched for changes, or if it is in
+        self._alwaysRecomputedData.
+
+        """
+        if force:
+            return set(inputs)
+
+        res = { name for name, value in inputs.items()
+                if name not in self._lastDerivedDataInputs or
+                self._lastDerivedDataInputs[name] != value }
+        res |= self._alwaysRecomputedData
+
+        if self.fsWatcher is None:
+            res |= self._filesystemDependentData
+
+        return res
+
+    def _preloadFile(self, path, readFunc):
+        """Read a file in a background task.
+
+        Return None if 'path' doesn't exist, otherwise a tuple (stamp,
+        data) where 'data' is readFunc(path) and 'stamp' allows one to
+        check that the file hasn't changed since it was read (cf.
+        self._preloadedFileData()).
+
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
 
-        self.aptDatSetManager = apt_dat.AptDatSetManager(aptDatList)
+        return ((st.st_mtime_ns, st.st_size, st.st_ino), readFunc(path))
+
+    def _preloadedFileData(self, taskName, path):
+        """Return data preloaded from 'path' by a startup task, or None.
+
+        None is returned if the task failed, or if the file has changed
+        since it was read. In such cases, the caller should read the
+        file itself (and will get the appropriate exception, if any).
+
+        """
+        tasks = self.startupTasks
+        if tasks is None or taskName not in tasks:
+            return None
+
+        try:
+            res = tasks.result(taskName)
+            st = os.stat(path)
+        except Exception:
+            return None
+
+        if res is None or res[0] != (st.st_mtime_ns, st.st_size, st.st_ino):
+            return None
+
+        return res[1]
 
     def write(self, text=None, path=None):
         """Write the configuration to a file.
@@ -635,19 +1033,62 @@ class Config:
                 text += '\n'
             config_out.write(text)
 
-    def _findInstalledApt(self):
-        """Walk through all scenery paths and find installed airports.
+    def _findInstalledTiles(self):
+        """Return the set of 1x1 degree tiles found in the scenery paths.
 
-        Take geographic coordinates from directory names and compare them
-        with airport coordinates from the apt digest file.
+        Each tile is represented as returned by
+        self._stringToCoordinates(). The Terrain/<10x10 degrees>
+        directories are listed in parallel.
 
-        The result is a sorted list of airport identifiers for matching
-        airports.
+        """
+        terrainSubdirs = []
+        for scenery in self._sceneryPaths():
+            path = os.path.join(scenery, 'Terrain')
+            terrainSubdirs.extend([ os.path.join(path, d)
+                                    for d in self._listDirectories(path) ])
+
+        tiles = set()
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=TERRAIN_SCAN_THREADS) as executor:
+            for p, names in zip(terrainSubdirs,
+                                executor.map(self._listDirectories,
+                                             terrainSubdirs)):
+                # One message per directory (there may be tens of thousands
+                # of tiles)
+                logger.debug("Exploring Terrain directory '{}' ({} entries)"
+                             .format(p, len(names)))
+                for coords in names:
+                    converted = self._stringToCoordinates(coords)
+                    if converted is not None:
+                        tiles.add(converted)
+                    else:
+                        logger.notice(
+                            _("Ignoring directory '{}' (unexpected name)")
+                            .format(os.path.join(p, coords)))
+
+        return tiles
+
+    @staticmethod
+    def _tileOfAirport(airport):
+        """Return the 1x1 degree tile containing 'airport', or None.
+
+        The tile is represented as returned by
+        self._stringToCoordinates(). Airports lying exactly on a tile
+        boundary are not considered to be in any tile (the bounds are
+        exclusive), hence the None return value in this case.
 
         """
+        lat, lon = airport.lat, airport.lon
+        latMin, lonMin = math.floor(lat), math.floor(lon)
+        if lat == latMin or lon == lonMin:
+            return None
+
+        return ((latMin, latMin + 1), (lonMin, lonMin + 1))
+
+    def _sceneryPaths(self):
+        """Return the list of scenery paths used by FlightGear."""
         # These imports require the translation system [_() function] to be in
         # place.
-        from .fgdata import json_report
         from .fgcmdbuilder import FGCommandBuilder
         from .fgdata.fgversion import FlightGearVersion
         fgBin = self.FG_bin.get()
@@ -657,50 +1098,17 @@ class Config:
             self.FG_version >= FlightGearVersion([2016, 4, 1])):
             # This may take a while!
             logger.info(_("Querying FlightGear's JSON report..."), end=' ')
-            fgReport = json_report.getFlightGearJSONReport(
+            fgReport = self.fgfsCache.getFlightGearJSONReport(
                 fgBin, self.FG_working_dir.get(),
-                FGCommandBuilder.sceneryPathsArgs(self))
+                FGCommandBuilder.sceneryPathsArgs(self), self.FG_root.get())
             logger.info(_("OK."))
-            sceneryPaths = fgReport["config"]["sceneryPaths"]
+            return fgReport["config"]["sceneryPaths"]
         else:
             # Fallback method when --json-report isn't available. It is
             # imperfect in case TerraSync is enabled and the TerraSync
             # directory isn't listed in self.FG_scenery, because FlightGear
             # *is* going to use it as a scenery path.
-            sceneryPaths = self.FG_scenery.get().split(os.pathsep)
-
-        coord_dict = {}
-
-        for scenery in sceneryPaths:
-            path = os.path.join(scenery, 'Terrain')
-            if os.path.exists(path):
-                for dir in os.listdir(path):
-                    p = os.path.join(path, dir)
-                    for coords in os.listdir(p):
-                        d = os.path.join(p, coords)
-                        if not os.path.isdir(d):
-                            continue
-
-                        logger.debug("Exploring Terrain directory '{}' -> '{}'"
-                                     .format(p, coords))
-                        converted = self._stringToCoordinates(coords)
-                        if converted is not None:
-                            coord_dict[converted] = None
-                        else:
-                            logger.notice(
-                                _("Ignoring directory '{}' (unexpected name)")
-                                .format(d))
-
-        coords = coord_dict.keys()
-        res = []
-        for icao in self.sortedIcao():
-            airport = self.airports[icao]
-            for c in coords:
-                if (c[0][0] < airport.lat < c[0][1] and
-                    c[1][0] < airport.lon < c[1][1]):
-                    res.append(icao)
-
-        return res
+            return self.FG_scenery.get().split(os.pathsep)
 
     def _calculateRange(self, coordinates):
         c = coordinates
@@ -911,11 +1319,15 @@ configurations are kept separate.""")
 
         """
         aircraftDict = {}
-        for dir_ in self.aircraft_dirs:
-            if os.path.isdir(dir_):
-                for d in os.listdir(dir_):
-                    self._readAircraftData(dir_, d, aircraftDict)
+        # The catalogue only lists the directories that have changed since
+        # the previous scan.
+        for path, setFiles in self.aircraftCatalog.scan(self.aircraft_dirs):
+            for f in setFiles:
+                self._appendAircraft(f, aircraftDict, path)
+
+        return (aircraftDict, self._sortedAircraftList(aircraftDict))
 
+    def _sortedAircraftList(self, aircraftDict):
         aircraftList = []
         # First sort by lowercased aircraft name
         sortFunc = lambda s: (s.lower(), s)
@@ -923,13 +1335,7 @@ configurations are kept separate.""")
             # Then sort by position in self.aircraft_dirs
             aircraftList.extend(aircraftDict[acName])
 
-        return (aircraftDict, aircraftList)
-
-    def _readAircraftData(self, dir_, d, aircraftDict):
-        path = os.path.join(dir_, d)
-        if os.path.isdir(path):
-            for f in os.listdir(path):
-                self._appendAircraft(f, aircraftDict, path)
+        return aircraftList
 
     def _appendAircraft(self, f, aircraftDict, path):
         if f.endswith('-set.xml'):
@@ -948,6 +1354,7 @@ configurations are kept separate.""")
     def sortedIcao(self):
         return sorted(self.airports.keys())
 
+    @logger.timingSpan("Config.readAptDigestFile")
     def readAptDigestFile(self):
         """Read the apt digest file.
 
@@ -958,13 +1365,16 @@ configurations are kept separate.""")
         """
         from .fgdata import apt_dat
 
-        if not os.path.isfile(APT):
+        preloaded = self._preloadedFileData("aptDigest", APT)
+        if preloaded is not None:
+            self.aptDatFilesInfoFromDigest, self.airports = preloaded
+        elif not os.path.isfile(APT):
             self.aptDatFilesInfoFromDigest, self.airports = [], {}
         else:
             for attempt in itertools.count(start=1):
                 try:
                     self.aptDatFilesInfoFromDigest, self.airports = \
-                                                apt_dat.AptDatDigest.read(APT)
+                                                    self._readAptDigest(APT)
                 except apt_dat.UnableToParseAptDigest:
                     # Rebuild once in case the apt digest file was written
                     # in an outdated format.
@@ -979,6 +1389,50 @@ configurations are kept separate.""")
             # Obsolete file since version 4 of the apt digest file format
             os.unlink(OBSOLETE_APT_TIMESTAMP_FILE)
 
+        return self.browsableAirportList()
+
+    def _readAptDigest(self, path):
+        """Read an apt digest file, using the state snapshot if possible.
+
+        Return a tuple (aptDatFilesInfo, airports) as
+        apt_dat.AptDatDigest.read() does. When the snapshot is outdated,
+        create the AirportStub instances for all airports (this is
+        needed anyway to build the airport list) and store them in the
+        snapshot. This method may be called from any thread.
+
+        """
+        from .fgdata import apt_dat
+
+        fileFingerprint = state_snapshot.fileFingerprint(path)
+        if fileFingerprint is None:
+            fingerprint = None
+        else:
+            fingerprint = (apt_dat.AIRPORTS_SNAPSHOT_VERSION,
+                           apt_dat.AptDatDigest.CURRENT_FMT_VERSION) + \
+                           fileFingerprint
+
+        data = self.stateSnapshot.get("airports", fingerprint)
+        if data is not None:
+            logger.info("Using airport data from the state snapshot")
+            return apt_dat.airportsFromSnapshotData(data)
+
+        aptDatFilesInfo, airports = apt_dat.AptDatDigest.read(path)
+        # Don't store anything if the file was replaced while being read.
+        if state_snapshot.fileFingerprint(path) == fileFingerprint:
+            self.stateSnapshot.put(
+                "airports", fingerprint,
+                apt_dat.airportsSnapshotData(aptDatFilesInfo, airports))
+
+        return (aptDatFilesInfo, airports)
+
+    def browsableAirportList(self):
+        """Return the list of AirportStub instances to show to the user.
+
+        The list is sorted by airport identifier. If
+        self.filteredAptList is true, it only contains the installed
+        airports.
+
+        """
         if self.filteredAptList.get():
             installedApt = self._readInstalledAptSet()
             res = [ self.airports[icao] for icao in self.sortedIcao()
@@ -996,13 +1450,19 @@ configurations are kept separate.""")
         compared to a list.
 
         """
+        res = self._preloadedFileData("installedApt", INSTALLED_APT)
+        if res is not None:
+            return res
+
         if not os.path.exists(INSTALLED_APT):
             self.makeInstalledAptList()
 
-        logger.info("Opening installed apt file '{}' for reading".format(
-            INSTALLED_APT))
+        return self._readInstalledAptFile(INSTALLED_APT)
+
+    def _readInstalledAptFile(self, path):
+        logger.info("Opening installed apt file '{}' for reading".format(path))
 
-        with open(INSTALLED_APT, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             # Strip the newline char ending every line
             res = frozenset([ line[:-1] for line in f ])
 
@@ -1012,12 +1472,21 @@ configurations are kept separate.""")
         """
         Build the FFGo apt digest file from the apt.dat files used by FlightGear"""
         AptDigestBuilder(self.master, self).start(headText)
+        # Cached airport data may be outdated with respect to the new set of
+        # apt.dat files.
+        self.aptDatCache.clear()
+        logger.debug("Airport data cache cleared: {}".format(
+            self.aptDatCache.statsString()))
 
+    @logger.timingSpan("Config.autoUpdateApt")
     def autoUpdateApt(self):
         """Rebuild the apt digest file if it is outdated."""
         from .fgdata import apt_dat
 
-        if os.path.isfile(APT):
+        preloaded = self._preloadedFileData("aptDigest", APT)
+        if preloaded is not None:
+            self.aptDatFilesInfoFromDigest = preloaded[0]
+        elif os.path.isfile(APT):
             # Extract metadata (list of apt.dat files, sizes, timestamps) from
             # the existing apt digest file
             try:
@@ -1039,8 +1508,348 @@ configurations are kept separate.""")
                 # may be invalid with the new files, reset.
                 self.park.set('')
 
-        # This is also outdated with respect to the new set of apt.dat files.
-        self.aptDatCache.clear()
+    def startFilesystemWatcher(self, notifyFunc):
+        """Start watching the directories used by FFGo for changes.
+
+        This is only done on systems supporting inotify, and if
+        self.watchFilesystem is true. 'notifyFunc' is called from
+        another thread when there are new events; it should arrange for
+        self.applyFilesystemChanges() to be called in the main thread.
+        The watched directories are updated by self.update().
+
+        """
+        self._fsWatcherNotifyFunc = notifyFunc
+        self._updateFilesystemWatcher()
+
+    def stopFilesystemWatcher(self):
+        if self.fsWatcher is not None:
+            self.fsWatcher.close()
+            self.fsWatcher = None
+
+        self._terrainTiles.clear()
+        self._installedTileCounts.clear()
+
+    def _updateFilesystemWatcher(self):
+        # This import requires the translation system [_() function] to be
+        # in place.
+        from . import fswatcher
+
+        if (self._fsWatcherNotifyFunc is None or
+            not self.watchFilesystem.get() or not fswatcher.HAS_INOTIFY):
+            self.stopFilesystemWatcher()
+            return
+
+        if self.fsWatcher is None:
+            try:
+                self.fsWatcher = fswatcher.FilesystemWatcher(
+                    self._fsWatcherNotifyFunc)
+            except OSError as e:
+                logger.warning(_("Unable to watch directories for changes: "
+                                 "{}").format(e))
+                return
+        else:
+            self.fsWatcher.unwatchAll()
+
+        with logger.timingSpan("Config._setupFilesystemWatches"):
+            self._setupFilesystemWatches()
+
+    def _setupFilesystemWatches(self):
+        from .fswatcher import WatchCategory
+        watch = self.fsWatcher.watch
+
+        for dir_ in self.aircraft_dirs:
+            if watch(WatchCategory.aircraftDir, dir_):
+                # The subdirectories are known from the last scan
+                for path in self.aircraftCatalog.subdirectories(dir_):
+                    watch(WatchCategory.aircraftSubdir, path)
+
+        watch(WatchCategory.scenarioDir, self.ai_path)
+
+        for path in set(map(os.path.dirname,
+                            self.aptDatSetManager.aptDatList)):
+            watch(WatchCategory.aptDatDir, path)
+
+        # This requires listing the Terrain directories, in order to know
+        # which tiles are present when one of them is added or removed.
+        self._terrainTiles.clear()
+        self._installedTileCounts.clear()
+        for scenery in self._sceneryPaths():
+            terrainDir = os.path.join(scenery, 'Terrain')
+            if watch(WatchCategory.terrainDir, terrainDir):
+                for d in self._listDirectories(terrainDir):
+                    self._addTerrainSubdir(os.path.join(terrainDir, d))
+
+    def _listDirectories(self, path):
+        try:
+            with os.scandir(path) as it:
+                return [ entry.name for entry in it if entry.is_dir() ]
+        except OSError:
+            return []
+
+    def applyFilesystemChanges(self):
+        """Apply the changes detected by self.fsWatcher.
+
+        The in-memory aircraft list, scenario list and list of installed
+        airports are updated incrementally. Return a dictionary whose
+        keys are fswatcher.ChangedData members telling which data has
+        changed.
+        For ChangedData.installedAirports, the value is the return value
+        of self._updateInstalledAptList(); the other values are None.
+
+        """
+        from .fswatcher import WatchCategory, EventKind, ChangedData
+
+        if self.fsWatcher is None:
+            return {}
+
+        changed = {}
+        changedTiles = set()
+
+        for event in self.fsWatcher.pendingEvents():
+            cat = event.category
+
+            if event.kind is EventKind.overflow:
+                logger.warning(_(
+                    "Too many simultaneous changes in the watched "
+                    "directories, some of them may have been missed. Use "
+                    "“Reload config” to take them into account."))
+            elif cat in (WatchCategory.aircraftDir,
+                         WatchCategory.aircraftSubdir):
+                if self._applyAircraftChange(event):
+                    changed[ChangedData.aircraft] = None
+            elif cat in (WatchCategory.terrainDir,
+                         WatchCategory.terrainSubdir):
+                changedTiles.update(self._applyTerrainChange(event))
+            elif cat is WatchCategory.aptDatDir:
+                if event.path in self.aptDatSetManager.aptDatList:
+                    changed[ChangedData.aptDatFiles] = None
+            elif cat is WatchCategory.scenarioDir:
+                if self._applyScenarioChange(event):
+                    changed[ChangedData.scenarios] = None
+
+        if ChangedData.aircraft in changed:
+            self.aircraftList = self._sortedAircraftList(self.aircraftDict)
+
+        if changedTiles:
+            res = self._updateInstalledAptFile()
+            if res is not False and res != (set(), set()):
+                changed[ChangedData.installedAirports] = res
+
+        if ChangedData.aptDatFiles in changed:
+            aptDatList = [ path for path in self.aptDatSetManager.aptDatList
+                           if os.path.isfile(path) ]
+            self.aptDatSetManager.updateListsAndTotalSize(aptDatList)
+
+        return changed
+
+    def _applyAircraftChange(self, event):
+        """Apply a change in an aircraft directory; return True if useful."""
+        from .fswatcher import WatchCategory, EventKind
+
+        if event.path == event.watchedPath:
+            # The watched directory itself was deleted or moved: this is
+            # handled via the event for its parent directory.
+            return False
+        elif event.category is WatchCategory.aircraftDir:
+            if not event.isDir:
+                return False
+            elif event.kind is EventKind.created:
+                self.fsWatcher.watch(WatchCategory.aircraftSubdir, event.path)
+                # Some files may have been created before the watch
+                try:
+                    files = os.listdir(event.path)
+                except OSError:
+                    files = []
+                added = [ self._addAircraft(f, event.path) for f in files ]
+                return any(added)
+            else:
+                self.fsWatcher.unwatch(event.path)
+                acDir = os.path.abspath(event.path)
+                return self._removeAircraft(lambda ac: ac.dir == acDir)
+        elif event.kind is EventKind.created:
+            return self._addAircraft(os.path.basename(event.path),
+                                     event.watchedPath)
+        elif (event.kind is EventKind.deleted and
+              event.path.endswith('-set.xml')):
+            acName = os.path.basename(event.path)[:-8]
+            acDir = os.path.abspath(event.watchedPath)
+            return self._removeAircraft(
+                lambda ac: ac.name == acName and ac.dir == acDir)
+        else:
+            return False
+
+    def _addAircraft(self, f, path):
+        """Add the aircraft defined by file 'f' in 'path', if any.
+
+        This is the incremental counterpart of self._appendAircraft().
+        Return True if an aircraft was added.
+
+        """
+        d = {}
+        self._appendAircraft(f, d, path)
+        if not d:
+            return False
+
+        aircraft = list(d.values())[0][0]
+        candidates = self.aircraftDict.setdefault(aircraft.name, [])
+        if aircraft in candidates:
+            return False        # already known
+
+        # Maintain the self.aircraft_dirs priority order
+        priorities = {}
+        for i, dir_ in enumerate(self.aircraft_dirs):
+            priorities.setdefault(os.path.abspath(dir_), i)
+        candidates.append(aircraft)
+        candidates.sort(key=lambda ac: priorities.get(
+            os.path.dirname(ac.dir), len(priorities)))
+
+        if self.aircraftStatsManager is not None:
+            self.aircraftStatsManager.addItem(
+                self.aircraftStatsManager.jsonKey(aircraft), aircraft)
+
+        logger.info("New aircraft: {} in '{}'".format(aircraft.name,
+                                                      aircraft.dir))
+        return True
+
+    def _removeAircraft(self, predicate):
+        """Remove the aircraft for which 'predicate' is true.
+
+        Return True if at least one aircraft was removed.
+
+        """
+        removed = False
+
+        for acName, candidates in list(self.aircraftDict.items()):
+            remaining = []
+            for aircraft in candidates:
+                if predicate(aircraft):
+                    removed = True
+                    if self.aircraftStatsManager is not None:
+                        self.aircraftStatsManager.removeItem(
+                            self.aircraftStatsManager.jsonKey(aircraft),
+                            aircraft)
+                    logger.info("Aircraft removed: {} in '{}'".format(
+                        aircraft.name, aircraft.dir))
+                else:
+                    remaining.append(aircraft)
+
+            if remaining:
+                self.aircraftDict[acName] = remaining
+            else:
+                del self.aircraftDict[acName]
+
+        return removed
+
+    def _addTerrainSubdir(self, path):
+        """Start watching a Terrain/<10x10 degrees> directory.
+
+        Return the set of tiles that were not installed before.
+
+        """
+        from .fswatcher import WatchCategory
+
+        self.fsWatcher.watch(WatchCategory.terrainSubdir, path)
+        res = set()
+        for d in self._listDirectories(path):
+            res.update(self._addTerrainTile(path, d))
+
+        return res
+
+    def _addTerrainTile(self, terrainSubdir, name):
+        """Record a 1x1 degree tile; return the newly installed tiles."""
+        tile = self._stringToCoordinates(name)
+        tiles = self._terrainTiles.setdefault(terrainSubdir, set())
+        if tile is None or tile in tiles:
+            return set()
+
+        tiles.add(tile)
+        self._installedTileCounts[tile] += 1
+        return {tile} if self._installedTileCounts[tile] == 1 else set()
+
+    def _removeTerrainTiles(self, terrainSubdir, tiles):
+        """Forget about tiles; return those that are not installed anymore."""
+        res = set()
+
+        for tile in tiles:
+            self._terrainTiles.get(terrainSubdir, set()).discard(tile)
+            self._installedTileCounts[tile] -= 1
+            if self._installedTileCounts[tile] <= 0:
+                del self._installedTileCounts[tile]
+                res.add(tile)
+
+        return res
+
+    def _applyTerrainChange(self, event):
+        """Apply a change in a Terrain directory.
+
+        Return the set of tiles whose installed status may have
+        changed.
+
+        """
+        from .fswatcher import WatchCategory, EventKind
+
+        if event.path == event.watchedPath or not event.isDir:
+            return set()
+        elif event.category is WatchCategory.terrainDir:
+            if event.kind is EventKind.created:
+                return self._addTerrainSubdir(event.path)
+            else:
+                self.fsWatcher.unwatch(event.path)
+                tiles = self._terrainTiles.pop(event.path, set())
+                return self._removeTerrainTiles(event.path, tiles)
+        elif event.kind is EventKind.created:
+            return self._addTerrainTile(event.watchedPath,
+                                        os.path.basename(event.path))
+        elif event.kind is EventKind.deleted:
+            tile = self._stringToCoordinates(os.path.basename(event.path))
+            if tile in self._terrainTiles.get(event.watchedPath, set()):
+                return self._removeTerrainTiles(event.watchedPath, [tile])
+
+        return set()
+
+    def _updateInstalledAptFile(self):
+        """Update INSTALLED_APT after tiles were installed or removed.
+
+        The installed tiles are known from the watched Terrain
+        directories, there is no need to scan them. Return the same
+        value as self._updateInstalledAptList(). Nothing is done, and
+        False is returned, if INSTALLED_APT doesn't exist yet (it will be
+        created from scratch when needed).
+
+        """
+        if not os.path.isfile(INSTALLED_APT):
+            return False
+
+        return self._updateInstalledAptList(set(self._installedTileCounts))
+
+    def _applyScenarioChange(self, event):
+        """Apply a change in the AI directory; return True if useful."""
+        from xml.etree import ElementTree
+        from .fswatcher import EventKind
+
+        f = os.path.basename(event.path)
+        if (event.path == event.watchedPath or event.isDir or
+            not f.lower().endswith('.xml')):
+            return False
+
+        scenarioName = f[:-4]
+        carriers = [ c for c in self.carrier_list if c[-1] != scenarioName ]
+        scenarios = [ s for s in self.scenario_list if s != scenarioName ]
+
+        if event.kind is not EventKind.deleted and os.path.isfile(event.path):
+            try:
+                info = self.scenarioIndex.info(event.path)
+            except (OSError, ElementTree.ParseError) as e:
+                # Probably not completely written yet: wait for the
+                # EventKind.modified event.
+                logger.info("Unable to parse '{}': {}".format(event.path, e))
+                return False
+            carriers.extend(self._carrierList(info, scenarioName))
+            scenarios.append(scenarioName)
+
+        self.scenario_list, self.carrier_list = (sorted(scenarios),
+                                                 sorted(carriers))
+        return True
 
     def _readScenarios(self):
         """Walk through AI scenarios and read carrier data.
@@ -1049,51 +1858,22 @@ configurations are kept separate.""")
             scenarios: [scenario name, ...]
             carrier data: [[name, parkking pos, ..., scenario name], ...]
         Return two empty lists if no scenario is found.
+
+        Unchanged scenario files are not parsed again (cf.
+        self.scenarioIndex).
         """
         carriers = []
         scenarios = []
-        if os.path.isdir(self.ai_path):
-            for f in os.listdir(self.ai_path):
-                path = os.path.join(self.ai_path, f)
-
-                if os.path.isfile(path) and f.lower().endswith('.xml'):
-                    scenario_name = f[:-4]
-                    scenarios.append(scenario_name)
-                    # Appends to 'carriers'
-                    self._append_carrier_data(carriers, path, scenario_name)
+        for scenario_name, info in self.scenarioIndex.scan(self.ai_path):
+            scenarios.append(scenario_name)
+            carriers.extend(self._carrierList(info, scenario_name))
 
         return sorted(scenarios), sorted(carriers)
 
-    def _append_carrier_data(self, carriers, xmlFilePath, scenario_name):
-        logger.info("Reading scenario data from '{}'".format(xmlFilePath))
-        root = self._get_root(xmlFilePath)
-        scenario = root.find('scenario')
-
-        if scenario is not None:
-            for e in scenario.iterfind('entry'):
-                typeElt = e.find('type')
-                if typeElt is not None and typeElt.text == 'carrier':
-                    data = self._get_carrier_data(e, scenario_name)
-                    carriers.append(data)
-
-    def _get_root(self, xmlFilePath):
-        tree = ElementTree.parse(xmlFilePath)
-        return tree.getroot()
-
-    def _get_carrier_data(self, e, scenario_name):
-        nameElt = e.find('name')
-        if nameElt is not None:
-            data = [nameElt.text]
-        else:
-            data = ['unnamed']
-
-        for child in e.iterfind('parking-pos'):
-            parkingNameElt = child.find('name')
-            if parkingNameElt is not None:
-                data.append(parkingNameElt.text)
-
-        data.append(scenario_name)
-        return data
+    def _carrierList(self, scenarioInfo, scenario_name):
+        """Carrier data for a scenario, as stored in self.carrier_list."""
+        return [ carrier + [scenario_name]
+                 for carrier in scenarioInfo["carriers"] ]
 
     # The '1' is the version number of this custom format for the contents of
     # Config.park, in case we need to change it.
@@ -60,6 +60,29 @@ FG_EXECUTABLE = misc.executableFileName("fgfs")
 APT = join(USER_DATA_DIR, 'apt')
 # Path to locally installed airport list.
 INSTALLED_APT = join(USER_DATA_DIR, 'apt_installed')
+# Terrain tiles that were installed when INSTALLED_APT was written (allows
+# updating it incrementally)
+INSTALLED_APT_TILES = join(USER_DATA_DIR, 'apt_installed_tiles.json')
+# Directory containing the checkpoint indices for gzipped apt.dat files
+# (built along with the apt digest file, allow fast random access). Each
+# index holds a recompressed copy of the whole apt.dat file and is about
+# 1.2 times as large as the corresponding .gz file.
+APT_DAT_INDEX_DIR = join(USER_DATA_DIR, 'apt_dat_index')
+# Directory containing one partial digest per apt.dat file (allows
+# rebuilding the apt digest file without parsing unchanged apt.dat files)
+APT_PARTIAL_DIGEST_DIR = join(USER_DATA_DIR, 'apt_partial_digests')
+# Directory containing the airport stores (detailed airport data ready for
+# direct access, one store per apt.dat file)
+AIRPORT_STORE_DIR = join(USER_DATA_DIR, 'airport_stores')
+# Cached results of 'fgfs --version' and 'fgfs --json-report'
+FGFS_CACHE = join(USER_DATA_DIR, 'fgfs_cache.json')
+# Catalogue of the -set.xml files found in the aircraft directories
+AIRCRAFT_CATALOG = join(USER_DATA_DIR, 'aircraft_catalog.json')
+# Carriers and descriptions of the AI scenarios, extracted from $FG_ROOT/AI
+SCENARIO_INDEX = join(USER_DATA_DIR, 'scenario_index.json')
+# Data loaded at startup, stored with fingerprints of its inputs (allows
+# skipping the expensive steps when nothing has changed)
+STATE_SNAPSHOT = join(USER_DATA_DIR, 'state_snapshot')
 # Path to config file.
 CONFIG = join(USER_DATA_DIR, 'config')
 # To allow easy migration from FGo! to FFGo
@@ -0,0 +1,210 @@
+# aircraft_catalog.py --- Persistent catalogue of the -set.xml files found in
+#                         aircraft directories
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Persistent catalogue of the -set.xml files found in aircraft directories.
+
+Finding the available aircraft requires listing every aircraft
+directory (as given by FG_AIRCRAFT and $FG_ROOT/Aircraft) as well as
+each of its subdirectories, which can take a long time with thousands
+of aircraft, especially on network filesystems. The catalogue records,
+for each directory, its modification time and:
+
+  - for an aircraft directory: the list of its subdirectories;
+  - for a subdirectory: the names of the -set.xml files it contains.
+
+Since the modification time of a directory changes whenever an entry is
+added, removed or renamed in it, a directory whose modification time
+hasn't changed doesn't need to be listed again: a warm start only needs
+one stat() call per directory. These calls, as well as the listing of
+modified directories, are done in parallel.
+
+Directories modified less than RACY_INTERVAL seconds before being
+listed are not recorded with their modification time, because they
+could be modified again without their modification time changing (the
+timestamp granularity of some filesystems is coarse).
+
+"""
+
+import os
+import stat
+import time
+import json
+import concurrent.futures
+
+from .. import constants
+from ..logging import logger
+
+
+# Number of threads used to stat() and list the aircraft subdirectories
+SCAN_THREADS = 8
+# See the module docstring
+RACY_INTERVAL = 2.0
+
+
+def _dirMtime(path):
+    """Return the modification time of directory 'path' (in ns), or None.
+
+    None is returned if 'path' doesn't exist or isn't a directory
+    (symbolic links are followed, like os.path.isdir() does).
+
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return st.st_mtime_ns if stat.S_ISDIR(st.st_mode) else None
+
+
+class AircraftCatalog:
+    """Persistent catalogue of the -set.xml files in aircraft directories."""
+
+    formatVersion = 1
+
+    def __init__(self, path=constants.AIRCRAFT_CATALOG):
+        self.path = path
+        self.dirs = None        # loaded on first use
+        self.modified = False
+
+    def _load(self):
+        self.dirs = {}
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.info("Ignoring the aircraft catalogue '{}': {}".format(
+                self.path, e))
+            return
+
+        if (isinstance(data, dict) and
+            data.get("formatVersion") == self.formatVersion):
+            self.dirs = data["dirs"]
+
+    def _save(self):
+        tmpPath = self.path + ".tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump({"formatVersion": self.formatVersion,
+                           "dirs": self.dirs}, f)
+            os.replace(tmpPath, self.path)
+        except OSError as e:
+            # The catalogue is only an optimization.
+            logger.warning(_("Unable to write the aircraft catalogue "
+                             "'{path}': {errmsg}").format(path=self.path,
+                                                          errmsg=e))
+
+    def _listDir(self, path, mtime, onlyDirs):
+        """List directory 'path' and record the result in self.dirs.
+
+        Return the list of subdirectory names if 'onlyDirs' is true,
+        otherwise the list of -set.xml file names (in both cases, in
+        the order given by os.scandir(), which is the same as for
+        os.listdir()).
+
+        """
+        try:
+            with os.scandir(path) as it:
+                if onlyDirs:
+                    names = [ entry.name for entry in it if entry.is_dir() ]
+                else:
+                    names = [ entry.name for entry in it
+                              if entry.name.endswith("-set.xml") ]
+        except OSError:
+            names = []
+
+        if time.time() - mtime*1e-9 < RACY_INTERVAL:
+            mtime = None        # force a new listing next time
+
+        self.dirs[path] = {"mtime": mtime, "entries": names}
+        self.modified = True
+
+        return names
+
+    def _entries(self, path, onlyDirs):
+        """Return the cached or fresh contents of directory 'path'.
+
+        Return None if 'path' isn't a directory. The return value is
+        otherwise the same as for _listDir().
+
+        """
+        mtime = _dirMtime(path)
+        if mtime is None:
+            if self.dirs.pop(path, None) is not None:
+                self.modified = True
+            return None
+
+        cached = self.dirs.get(path)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached["entries"]
+        else:
+            logger.debug("Listing aircraft directory '{}'".format(path))
+            return self._listDir(path, mtime, onlyDirs)
+
+    def subdirectories(self, aircraftDir):
+        """Return the subdirectories of 'aircraftDir' found by the last scan.
+
+        Return a list of paths obtained by joining 'aircraftDir' with the
+        subdirectory names (empty list if 'aircraftDir' wasn't scanned).
+
+        """
+        entry = (self.dirs or {}).get(aircraftDir)
+        if entry is None:
+            return []
+
+        return [ os.path.join(aircraftDir, d) for d in entry["entries"] ]
+
+    def scan(self, aircraftDirs):
+        """Return the -set.xml files found in 'aircraftDirs'.
+
+        Return a list of (path, setFiles) tuples where 'path' is a
+        subdirectory of an element of 'aircraftDirs' and 'setFiles' the
+        list of -set.xml file names it contains. Subdirectories are
+        listed in the order of 'aircraftDirs', then in os.listdir()
+        order. The catalogue file is updated if needed.
+
+        """
+        if self.dirs is None:
+            self._load()
+        self.modified = False
+        visited = set()
+        res = []
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=SCAN_THREADS) as executor:
+            for dir_ in aircraftDirs:
+                visited.add(dir_)
+                subdirs = self._entries(dir_, onlyDirs=True)
+                if subdirs is None:
+                    continue
+
+                paths = [ os.path.join(dir_, d) for d in subdirs ]
+                visited.update(paths)
+                # executor.map() returns the results in the order of 'paths'
+                for path, setFiles in zip(
+                        paths,
+                        executor.map(
+                            lambda p: self._entries(p, onlyDirs=False),
+                            paths)):
+                    if setFiles is not None:
+                        res.append((path, setFiles))
+
+        # Forget about directories that are not in 'aircraftDirs' anymore
+        for path in set(self.dirs) - visited:
+            del self.dirs[path]
+            self.modified = True
+
+        if self.modified:
+            self._save()
+
+        return res
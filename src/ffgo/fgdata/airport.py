@@ -84,6 +84,17 @@ class Airport:
         return itertools.chain(self.landRunways, self.waterRunways,
                                self.helipads)
 
+    def approxMemorySize(self):
+        """Return a rough estimate of the memory used by this instance.
+
+        The result, in bytes, is only meant to bound the size of caches
+        of Airport instances.
+
+        """
+        nbParkings = sum( len(l) for l in self.parkings.values() )
+        return (2048 + 1024*(len(self.landRunways) + len(self.waterRunways) +
+                             len(self.helipads)) + 512*nbParkings)
+
     def tooltipText(self):
         d = {}
         for rwy in self.runways():
@@ -167,8 +178,21 @@ class AirportStub:
         dates are stored between FFGo runs is present.
 
         """
-        for attr in self.__slots__:
-            setattr(self, attr, locals()[attr])
+        # Explicit assignments: this constructor is called for every
+        # airport at startup, and iterating over __slots__ with setattr()
+        # and locals() is about 15 times slower.
+        self.icao = icao
+        self.name = name
+        self.type = type
+        self.lat = lat
+        self.lon = lon
+        self.nbLandRunways = nbLandRunways
+        self.nbWaterRunways = nbWaterRunways
+        self.nbHelipads = nbHelipads
+        self.minRwyLength = minRwyLength
+        self.maxRwyLength = maxRwyLength
+        self.airportIndex = airportIndex
+        self.useCountForShow = useCountForShow
 
         if datesOfUse is None:
             # Dates at which the airport has been visited (subject to
@@ -177,6 +201,8 @@ class AirportStub:
             # these dates are normally stored between FFGo runs is
             # present.
             self.datesOfUse = [] # effective default value
+        else:
+            self.datesOfUse = datesOfUse
 
     def __repr__(self):
         argString = ", ".join([ "{}={!r}".format(attr, getattr(self, attr))
@@ -0,0 +1,227 @@
+# airport_store.py --- On-disk store of detailed airport data, allowing direct
+#                      access to the data of any airport
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""On-disk store of detailed airport data.
+
+Looking up the details of an airport (runways, helipads, startup
+locations...) normally requires seeking into a possibly-gzipped apt.dat
+file and parsing the airport definition. An airport store contains the
+Airport instances for all airports of one apt.dat file, ready to use:
+each of them is pickled and compressed separately, and a table sorted
+by airport identifier, with fixed-size entries, gives the position of
+each blob in the file. Therefore, a lookup is a binary search in the
+table followed by a single small read, without any text parsing.
+
+File layout:
+  - header: magic number, format version, size and modification time
+    of the apt.dat file the store was built from, and its path;
+  - one blob per airport (zlib-compressed pickle of an Airport
+    instance);
+  - the table: one entry per airport, sorted by airport identifier;
+  - trailer: offset of the table, number of entries, magic number.
+
+"""
+
+import os
+import mmap
+import pickle
+import struct
+import zlib
+
+from .. import misc
+# This import requires the translation system [_() function] to be in
+# place.
+from ..exceptions import FFGoException
+
+
+# Magic number identifying the store file format
+MAGIC = b"FFGoApSt"
+# Increment whenever the Airport class or related classes change in an
+# incompatible way.
+FORMAT_VERSION = 1
+
+# Magic number, format version, size and mtime of the apt.dat file, length
+# of the UTF-8 encoded apt.dat file path
+_headerStruct = struct.Struct("<8sIQdI")
+# Airport identifier (UTF-8, padded with NUL bytes), blob offset and length
+_entryStruct = struct.Struct("<16sQI")
+# Offset of the table, number of entries, magic number
+_trailerStruct = struct.Struct("<QI8s")
+MAX_ID_LENGTH = 16
+
+
+class error(FFGoException):
+    """Base class for exceptions in the airport_store module."""
+    ExceptionShortDescription = _("Error caught in the airport_store module")
+
+class InvalidStore(error):
+    """Exception raised when an airport store can't be used."""
+    ExceptionShortDescription = _("Invalid airport store")
+
+
+def storeFileName(aptDatPath):
+    """Return a file name for the store built from 'aptDatPath'."""
+    return misc.pathDigest(aptDatPath) + ".store"
+
+
+class AirportStoreWriter:
+    """Class for writing an airport store.
+
+    Use as a context manager. Airports are added with add(); the store
+    is written to a temporary file which replaces 'storePath' when the
+    'with' block is exited without an exception.
+
+    """
+
+    def __init__(self, storePath, aptDatPath, aptDatSize, aptDatTimestamp):
+        self.storePath = storePath
+        self.tmpPath = storePath + ".tmp"
+        self.aptDatPath = aptDatPath
+        self.aptDatSize = aptDatSize
+        self.aptDatTimestamp = aptDatTimestamp
+        self.entries = []
+
+    def __enter__(self):
+        self.file = open(self.tmpPath, "wb")
+        encodedPath = os.fsencode(self.aptDatPath)
+        self.file.write(_headerStruct.pack(
+            MAGIC, FORMAT_VERSION, self.aptDatSize, self.aptDatTimestamp,
+            len(encodedPath)))
+        self.file.write(encodedPath)
+        self.offset = self.file.tell()
+
+        return self
+
+    def add(self, airportID, airport):
+        """Add an Airport instance to the store.
+
+        Return False if the airport can't be stored (identifier too
+        long), True otherwise.
+
+        """
+        encodedId = airportID.encode("utf-8")
+        if len(encodedId) > MAX_ID_LENGTH:
+            return False
+
+        blob = zlib.compress(
+            pickle.dumps(airport, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        self.file.write(blob)
+        self.entries.append((encodedId, self.offset, len(blob)))
+        self.offset += len(blob)
+
+        return True
+
+    def __exit__(self, excType, excVal, excTb):
+        try:
+            if excType is None:
+                # Order expected by the binary search in AirportStore.get()
+                self.entries.sort()
+                for entry in self.entries:
+                    self.file.write(_entryStruct.pack(*entry))
+
+                self.file.write(_trailerStruct.pack(
+                    self.offset, len(self.entries), MAGIC))
+
+            self.file.close()
+
+            if excType is None:
+                os.replace(self.tmpPath, self.storePath)
+        finally:
+            if os.path.exists(self.tmpPath):
+                os.unlink(self.tmpPath)
+
+        return False
+
+
+class AirportStore:
+    """Class for reading an airport store.
+
+    The file is memory-mapped while the instance is open; use as a
+    context manager, or call close().
+
+    """
+
+    def __init__(self, storePath):
+        self.storePath = storePath
+
+        with open(storePath, "rb") as f:
+            if os.fstat(f.fileno()).st_size < (_headerStruct.size +
+                                               _trailerStruct.size):
+                raise InvalidStore(_("truncated airport store: '{}'")
+                                   .format(storePath))
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._readMetadata()
+        except BaseException:
+            self.close()
+            raise
+
+    def _readMetadata(self):
+        magic, version, self.aptDatSize, self.aptDatTimestamp, pathLen = \
+                _headerStruct.unpack_from(self.data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise InvalidStore(_("unrecognized format for airport store "
+                                 "'{}'").format(self.storePath))
+
+        start = _headerStruct.size
+        self.aptDatPath = os.fsdecode(self.data[start:start+pathLen])
+
+        self.tableOffset, self.nbEntries, magic = _trailerStruct.unpack_from(
+            self.data, len(self.data) - _trailerStruct.size)
+        if (magic != MAGIC or self.tableOffset +
+            self.nbEntries*_entryStruct.size + _trailerStruct.size !=
+            len(self.data)):
+            raise InvalidStore(_("truncated airport store: '{}'")
+                               .format(self.storePath))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excVal, excTb):
+        self.close()
+        return False
+
+    def close(self):
+        self.data.close()
+
+    def isFreshFor(self, aptDatPath, aptDatSize, aptDatTimestamp):
+        return (self.aptDatPath, self.aptDatSize, self.aptDatTimestamp) == \
+            (aptDatPath, aptDatSize, aptDatTimestamp)
+
+    def _entryId(self, i):
+        offset = self.tableOffset + i*_entryStruct.size
+        return self.data[offset:offset+MAX_ID_LENGTH]
+
+    def get(self, airportID):
+        """Return the Airport instance for 'airportID', or None."""
+        encodedId = airportID.encode("utf-8")
+        if len(encodedId) > MAX_ID_LENGTH:
+            return None
+
+        key = encodedId.ljust(MAX_ID_LENGTH, b"\0")
+        # Binary search in the table (like bisect.bisect_left(), which can't
+        # be used directly on the table)
+        lo, hi = 0, self.nbEntries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entryId(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == self.nbEntries or self._entryId(lo) != key:
+            return None
+
+        storedId, offset, length = _entryStruct.unpack_from(
+            self.data, self.tableOffset + lo*_entryStruct.size)
+
+        return pickle.loads(zlib.decompress(self.data[offset:offset+length]))
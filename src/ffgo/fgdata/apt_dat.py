@@ -10,32 +10,40 @@
 # it at <https://www.wtfpl.net/>.
 
 import os
+import io
 import gzip
+import mmap
+import math
+import struct
+import platform
+import multiprocessing
 import re
 import textwrap
-import bisect
 import collections
+import collections.abc
 import itertools
+import json
 from math import degrees, radians, cos, sin
 
-try:
-    from geographiclib.geodesic import Geodesic
-    HAS_GEOGRAPHICLIB = True
-except ImportError:
-    HAS_GEOGRAPHICLIB = False
-
 from .. import constants
 from ..constants import PROGNAME
 from .. import misc
+from .. import gzip_index
 from ..logging import logger
 from .airport import Airport, AirportStub, AirportType, LandRunway, \
     WaterRunway, Helipad, RunwayType, SurfaceType, V810SurfaceType, \
     ShoulderSurfaceType, RunwayMarkings, PerimeterBuoys, HelipadEdgeLighting
 from . import parking
+from . import airport_store
 from .parking import ParkingSource
 from ..geo import geodesy
 from ..geo.geodesy import cosd, sind, normLon, NVector
 
+# GeographicLib is only imported when a v810 runway has to be processed
+HAS_GEOGRAPHICLIB = geodesy.HAS_GEOGRAPHICLIB
+# NumPy is only imported when the apt digest geometry is computed
+HAS_NUMPY = misc.moduleAvailable("numpy")
+
 # This import requires the translation system [_() function] to be in
 # place.
 from ..exceptions import FFGoException
@@ -159,7 +167,8 @@ class AptDatReader:
 
     """
 
-    def __init__(self, path, index=None, progressFeedbackHandler=None):
+    def __init__(self, path, index=None, progressFeedbackHandler=None,
+                 checkpointIndexPath=None):
         """Constructor for an AptDatReader instance.
 
         'path' may be gzipped (ending in '.gz') or uncompressed.
@@ -167,6 +176,12 @@ class AptDatReader:
         of 'path' in an externally-defined ordered list of apt.dat files
         (cf. AptDatSetManager).
 
+        If 'path' is gzipped and 'checkpointIndexPath' points to an
+        up-to-date checkpoint index for it (cf. gzip_index.buildIndex()),
+        the data is read using this index, which makes seek() fast
+        regardless of the target offset. Otherwise, the gzip module is
+        used directly.
+
         """
         self.path = os.path.abspath(path)
         self.isGZipCompressed = self.path.endswith(".gz")
@@ -174,6 +189,7 @@ class AptDatReader:
         # save memory or space in some situations, as it can replace the
         # apt.dat file path given the proper mapping)
         self.index = index
+        self.checkpointIndexPath = checkpointIndexPath
         self.progressFeedbackHandler = (
             progressFeedbackHandler if progressFeedbackHandler is not None
             else misc.ProgressFeedbackHandler())
@@ -200,6 +216,19 @@ class AptDatReader:
         #       YSSL in apt.dat 'cycle 2013.10', as opposed to 0.8 s with
         #       an index obtained using tell() [the latter in text as well as
         #       binary mode]).
+        if (self.isGZipCompressed and self.checkpointIndexPath is not None
+            and os.path.isfile(self.checkpointIndexPath)):
+            try:
+                self.file = gzip_index.IndexedGzipFile(
+                    self.checkpointIndexPath, self.path)
+            except (OSError, gzip_index.error) as e:
+                logger.info("Not using checkpoint index '{}': {}".format(
+                    self.checkpointIndexPath, e))
+            else:
+                # Closing an IndexedGzipFile twice is harmless
+                self.rawFileObj = self.file
+                return self.file
+
         self.rawFileObj = open(self.path, mode="rb")
 
         if self.isGZipCompressed:
@@ -302,6 +331,82 @@ class AptDatReader:
 
         return (int(mo.group("code")), mo.group("rest"))
 
+    # Amount of data read at once by self._iterRecords()
+    blockSize = 1024*1024
+
+    def _iterRecords(self, bytesReadSoFar=None):
+        """Iterate over the records from the current position to EOF.
+
+        Yield a tuple (offset, lineNb, line, code, payload) for each
+        non-empty, non-comment line, where 'offset' is the offset of the
+        start of the line in the uncompressed stream, 'line' is the
+        stripped line, and 'code' and 'payload' are as returned by
+        self._readRecord(). Results are exactly the same as with
+        repeated calls to self._readRecord(), but much faster: data is
+        read by large blocks and offsets as well as line numbers are
+        computed arithmetically instead of calling tell() for every
+        line. Since ISO 8859-1 maps each byte to exactly one character
+        (cf. self._readline()), offsets in the decoded blocks are byte
+        offsets.
+
+        self.lineNb must be the number of the line preceding the
+        current position. 'bytesReadSoFar' has the same meaning as for
+        self.readFile(); when not None, progress feedback is given after
+        each block.
+
+        """
+        offset = self.file.tell()
+        lineNb = self.lineNb
+        read = self.file.read
+        recordMatch = self._record_cre.match
+        # Start of a line that continues in the next block
+        pending = ""
+
+        while True:
+            block = read(self.blockSize)
+            if block:
+                lines = (pending + block.decode("latin_1")).split("\n")
+                pending = lines.pop()
+            elif pending:       # last line, not terminated by a newline
+                lines = [pending]
+                pending = ""
+            else:
+                break           # EOF
+
+            for rawLine in lines:
+                lineNb += 1
+                line = rawLine.strip()
+
+                if line and not line.startswith("##"):
+                    # Fast path for the usual case: row code followed by a
+                    # space (or by nothing). This yields the same results
+                    # as self._record_cre (ISO 8859-1 has no decimal digits
+                    # other than 0-9).
+                    code, sep, payload = line.partition(" ")
+                    if code.isdecimal():
+                        code = int(code)
+                        payload = payload.lstrip(" \t")
+                    else:
+                        mo = recordMatch(line)
+                        if not mo:
+                            self.lineNb = lineNb
+                            self.line = line
+                            raise ErrorParsingAptDatFile(
+                                self.path, lineNb,
+                                _("not a valid record: {!r}").format(line))
+                        code, payload = int(mo.group("code")), \
+                                        mo.group("rest")
+
+                    yield (offset, lineNb, line, code, payload)
+
+                offset += len(rawLine) + 1
+
+            if bytesReadSoFar is not None:
+                self.progressFeedbackHandler.setValue(
+                    bytesReadSoFar + self.approxOffset())
+
+        self.lineNb = lineNb
+
     _formatLine_cre = re.compile(r"""(?P<version>\d+ (\.\d+)* )""", re.VERBOSE)
     def _readHeader(self):
         """Read the apt.dat header."""
@@ -361,53 +466,150 @@ class AptDatReader:
         Return the uncompressed size of the possibly-gzipped input
         apt.dat file.
 
+        Note: this method keeps the whole contents of the apt.dat file
+              in memory (in 'airportInfoDict'). Use iterAirports() if
+              this is not needed.
+
         """
-        self._readHeader()
-        # In case the apt.dat file doesn't have a start-of-airport row
-        # code (1, 16 or 17) after its header (which would be invalid,
-        # except maybe if the file has nothing apart from its header)
-        skipAirport = True
+        seenIds = set(airportInfoDict.keys())
 
-        while True:
-            rowCode, payload = self._readRecord()
-            if rowCode is None:    # EOF
-                break
-            elif not (bytesReadSoFar is None or (self.lineNb % 1000)):
-                self.progressFeedbackHandler.setValue(
-                    bytesReadSoFar + self.approxOffset())
+        for rawAirportInfo in self.iterAirports(seenIds,
+                                                bytesReadSoFar=bytesReadSoFar):
+            airportID = rawAirportInfo.firstLineRest[3].upper()
+            airportInfoDict[airportID] = rawAirportInfo
+
+        return self.uncompSize
+
+    def _skipToLineStart(self, offset):
+        """Go to the first line starting at or after 'offset'.
+
+        'offset' is a position in the uncompressed stream. This method
+        must be called right after the file has been opened. All lines
+        on the way are counted in order to keep self.lineNb accurate;
+        this is a cheap operation compared to parsing them.
+
+        """
+        nbLines = 0
+        remaining = offset
+        lastByte = b"\n"
+
+        while remaining > 0:
+            block = self.file.read(min(remaining, 1 << 20))
+            if not block:
+                break           # EOF
+
+            nbLines += block.count(b"\n")
+            remaining -= len(block)
+            lastByte = block[-1:]
+
+        if lastByte != b"\n":
+            # We are in the middle of a line: skip the rest of it.
+            if self.file.readline().endswith(b"\n"):
+                nbLines += 1
+
+        # The next call to self._readline() will increment this before
+        # reading the line.
+        self.lineNb = nbLines
+
+    def iterAirports(self, seenIds, bytesReadSoFar=None, startOffset=0,
+                     endOffset=None):
+        """Iterate over the airports defined in an apt.dat file.
+
+        Yield a RawAirportInfo instance for every airport of the file
+        whose identifier is not in 'seenIds', as soon as the end of its
+        definition has been reached. 'seenIds' must support the 'in'
+        operator and have an add() method (e.g., a set); each yielded
+        airport's identifier is added to it. Thus, when the same
+        'seenIds' object is passed for all files of
+        AptDatSetManager.aptDatList in priority order, airports defined
+        in earlier files shadow those defined in later files.
+
+        Since only the definition of the current airport is held in
+        memory, the caller can process each RawAirportInfo instance and
+        drop it before the next one is read. This keeps memory use
+        roughly constant, regardless of the apt.dat file size.
+
+        'bytesReadSoFar' has the same meaning as for readFile(). Once
+        the iterator is exhausted, the uncompressed size of the
+        possibly-gzipped input apt.dat file is available in
+        'self.uncompSize' (None if iteration was stopped because of
+        'endOffset').
+
+        'startOffset' and 'endOffset' allow one to process only a part
+        of the file, which is useful to split the work among several
+        processes (see AptDatSetManager). Both are offsets in the
+        uncompressed stream. Only airports whose definition starts
+        between the first line starting at or after 'startOffset' and
+        the first line starting at or after 'endOffset' (excluded) are
+        yielded. Therefore, contiguous ranges of a file yield each
+        airport exactly once, regardless of where the offsets fall. The
+        file header is only read when 'startOffset' is 0.
+
+        """
+        self.uncompSize = None
 
-            if rowCode in (1, 16, 17):
+        if startOffset:
+            # Lines preceding the first start-of-airport record found from
+            # here are ignored below, since 'rawAirportInfo' is None.
+            self._skipToLineStart(startOffset)
+        else:
+            self._readHeader()
+
+        # None when there is no current airport, or when its definition is
+        # skipped (shadowed airport, or data found after a row code 99).
+        rawAirportInfo = None
+
+        # Lines of the current airport definition (None if there is no
+        # current airport or if it is skipped)
+        otherLines = None
+
+        for offset, lineNb, line, rowCode, payload in self._iterRecords(
+                bytesReadSoFar):
+            if otherLines is not None and rowCode not in (1, 16, 17, 99):
+                # Line belonging to an already started, and not skipped
+                # airport entry; just append it. This is by far the most
+                # common case.
+                otherLines.append((lineNb, rowCode, payload))
+            elif rowCode in (1, 16, 17):
                 # Land airport, seaplane base or heliport
+                if rawAirportInfo is not None:
+                    # End of the previous airport definition
+                    yield rawAirportInfo
+                    rawAirportInfo = otherLines = None
+
+                if endOffset is not None and offset >= endOffset:
+                    return      # this airport belongs to the next range
+
                 l = payload.split(None, maxsplit=4)
                 if len(l) < 5:
                     raise ErrorParsingAptDatFile(
-                        self.path, self.lineNb,
-                        _("not enough fields in record: {!r}")
-                        .format(self.line))
+                        self.path, lineNb,
+                        _("not enough fields in record: {!r}").format(line))
 
                 currentAirportId = l[3].upper() # often an ICAO, but not always
-                if currentAirportId in airportInfoDict:
+                if currentAirportId in seenIds:
                     logger.info(_("{aptDat}:{lineNb}: skipping airport "
                                   "{aptId} (already defined earlier)")
-                                .format(aptDat=self.path, lineNb=self.lineNb,
+                                .format(aptDat=self.path, lineNb=lineNb,
                                         aptId=currentAirportId))
-                    skipAirport = True
                 else:
-                    airportInfoDict[currentAirportId] = rawAirportInfo = \
-                        RawAirportInfo(self.index, self.offsetBeforeStartOfLine,
-                                       self.lineNb, rowCode, l, [])
-                    skipAirport = False
+                    seenIds.add(currentAirportId)
+                    otherLines = []
+                    rawAirportInfo = RawAirportInfo(
+                        self.index, offset, lineNb, rowCode, l, otherLines)
             elif rowCode == 99:
                 logger.debug(_("{aptDat}:{lineNb}: row code 99 found "
                                "(normally at end of file)")
-                             .format(aptDat=self.path, lineNb=self.lineNb))
-                skipAirport = True
-            elif not skipAirport:
-                # Line belonging to an already started, and not skipped airport
-                # entry; just append it.
-                rawAirportInfo.otherLines.append((self.lineNb, rowCode,
-                                                  payload))
-        return self.file.tell() # past-the-end offset in the uncompressed stream
+                             .format(aptDat=self.path, lineNb=lineNb))
+                if rawAirportInfo is not None:
+                    yield rawAirportInfo
+                    rawAirportInfo = otherLines = None
+
+        if rawAirportInfo is not None: # file without a row code 99
+            yield rawAirportInfo
+
+        # Past-the-end offset in the uncompressed stream
+        self.uncompSize = self.file.tell()
 
     def getRawAirportInfoUsingIndex(self, airportID, localIndex):
         """Get raw airport info from self.file using a local index.
@@ -830,11 +1032,19 @@ class RawAirportInfoParser:
         return airport
 
     # Not the prettiest method ever written, but trying to be fast!
-    def readAirportDataForAptDigest(self):
+    def readAirportDataForAptDigest(self, geometryBatch=None):
         """Extract info from self for the apt digest file.
 
         Similar to airportInstance() above.
 
+        If 'geometryBatch' is not None, it should be an
+        AptDigestGeometryBatch instance. In this case, the coordinates
+        of the runway ends and helipads are added to 'geometryBatch'
+        instead of being processed here, and the elements of the return
+        value corresponding to the airport centroid and to the minimum
+        and maximum runway lengths are None. The actual values are
+        obtained from geometryBatch.results().
+
         """
         aptInfo = self.aptInfo
 
@@ -855,6 +1065,12 @@ class RawAirportInfoParser:
 
         for lineNb, code, payload in aptInfo.otherLines:
             self.lineIdx += 1
+            if geometryBatch is not None:
+                self._collectRunwayRowGeometry(
+                    code, payload, landRunways, waterRunways, helipads,
+                    geometryBatch)
+                continue
+
             isRwyRecord, nvecSum0, rwyLength = \
                 self._processPotentialRunwayRow(
                     code, payload, landRunways, waterRunways, helipads,
@@ -872,7 +1088,10 @@ class RawAirportInfoParser:
         # Each land or water runway is counted twice, once for each runway
         # end.
         n = 2*len(landRunways) + 2*len(waterRunways) + len(helipads)
-        if n > 0:
+        if geometryBatch is not None:
+            geometryBatch.finishAirport(n)
+            avgLat, avgLon = None, None
+        elif n > 0:
             # Will give the coordinates of the centroid of all runway ends +
             # helipads of the airport (each runway has a sort of “double
             # weight” because of its two ends, contrary to a helipad).
@@ -956,6 +1175,36 @@ class RawAirportInfoParser:
 
         return (isRwyRecord, nvecSum, length)
 
+    def _collectRunwayRowGeometry(self, code, payload, landRunways,
+                                  waterRunways, helipads, geometryBatch):
+        """Add runway information from (code, payload) to a geometry batch.
+
+        Variant of _processPotentialRunwayRow() with readDetails=False,
+        except that the coordinates of the runway ends are added to
+        'geometryBatch' (an AptDigestGeometryBatch instance) instead of
+        being processed here.
+
+        """
+        if code == 100:
+            e, lat1, lon1, lat2, lon2 = self._readLandRunwayEnds(payload)
+            geometryBatch.addRunway(lat1, lon1, lat2, lon2)
+            landRunways.extend((None, None))
+        elif code == 101:
+            e, lat1, lon1, lat2, lon2 = self._readWaterRunwayEnds(payload)
+            geometryBatch.addRunway(lat1, lon1, lat2, lon2)
+            waterRunways.extend((None, None))
+        elif code == 102:
+            lat, lon, rwys = self.processHelipad(payload, readDetails=False)
+            geometryBatch.addHelipad(lat, lon)
+            helipads.extend(rwys)
+        else:
+            # v810 runways (rare nowadays) are processed with the scalar code
+            isRwyRecord, nvecSum, length = self._processPotentialRunwayRow(
+                code, payload, landRunways, waterRunways, helipads,
+                readDetails=False)
+            if isRwyRecord:
+                geometryBatch.addPrecomputed(nvecSum, length)
+
     def _computeV810RunwayEnds(self, lat, lon, length, azimuth1, azimuth2):
         """Compute the coordinates of the opposite ends of a v810 runway.
 
@@ -1056,6 +1305,7 @@ class RawAirportInfoParser:
                 # Compute the coordinates of the runway ends based on:
                 #   - the coordinates of their midpoint;
                 #   - the runway length and heading.
+                from geographiclib.geodesic import Geodesic
                 halfLength_m = 0.5*length
                 g1 = Geodesic.WGS84.Direct(lat, lon, azimuth2, halfLength_m)
                 g2 = Geodesic.WGS84.Direct(lat, lon, azimuth1, halfLength_m)
@@ -1169,17 +1419,50 @@ class RawAirportInfoParser:
                 dist = cls.geodCalc.modifiedFccDistance(lat1, lon1, lat2, lon2)
         return dist
 
-    def processLandRunway(self, payload, readDetails=True):
-        """Process a runway record with code 100."""
+    @classmethod
+    def computeLengthsForAptDigest(cls, lat1, lon1, lat2, lon2):
+        """Vectorized version of computeLengthForAptDigest().
+
+        The arguments must be one-dimensional NumPy arrays of the same
+        length. Return a NumPy array containing the length of each
+        runway. Vincenty's method is applied to all runways at once;
+        runways for which it doesn't work, as well as a few special
+        cases handled upfront by vincentyInverseWithFallback(), are
+        then processed one by one with computeLengthForAptDigest().
+
+        """
+        import numpy
+        lengths, ok = cls.geodCalc.vincentyInverseDistances(lat1, lon1,
+                                                            lat2, lon2)
+        # Coincident runway ends are detected by ok being False, except
+        # when the longitudes differ by 360° or at the poles.
+        scalarCases = (~ok | (numpy.abs(lon2 - lon1) > 180.0) |
+                       (numpy.abs(lat1) == 90.0) | (numpy.abs(lat2) == 90.0))
+
+        for i in numpy.flatnonzero(scalarCases):
+            lengths[i] = cls.computeLengthForAptDigest(
+                float(lat1[i]), float(lon1[i]), float(lat2[i]),
+                float(lon2[i]))
+
+        return lengths
+
+    def _readLandRunwayEnds(self, payload):
+        """Split a runway record with code 100 and read its end coordinates.
+
+        Return a tuple (fields, lat1, lon1, lat2, lon2).
+
+        """
         e = payload.split()
         if len(e) < 22:
             self.raiseErrorParsingAptDatFile(
                 _("not enough fields in record: {!r}").format(self.curLine()))
 
-        lat1 = self._readLatitude(e[8])
-        lon1 = self._readLongitude(e[9])
-        lat2 = self._readLatitude(e[17])
-        lon2 = self._readLongitude(e[18])
+        return (e, self._readLatitude(e[8]), self._readLongitude(e[9]),
+                self._readLatitude(e[17]), self._readLongitude(e[18]))
+
+    def processLandRunway(self, payload, readDetails=True):
+        """Process a runway record with code 100."""
+        e, lat1, lon1, lat2, lon2 = self._readLandRunwayEnds(payload)
 
         if readDetails:
             name1, name2 = e[7], e[16]
@@ -1202,17 +1485,23 @@ class RawAirportInfoParser:
             length = self.computeLengthForAptDigest(lat1, lon1, lat2, lon2)
             return (lat1, lon1, lat2, lon2, length, (None, None))
 
-    def processWaterRunway(self, payload, readDetails=True):
-        """Process a runway record with code 101."""
+    def _readWaterRunwayEnds(self, payload):
+        """Split a runway record with code 101 and read its end coordinates.
+
+        Return a tuple (fields, lat1, lon1, lat2, lon2).
+
+        """
         e = payload.split()
         if len(e) < 8:
             self.raiseErrorParsingAptDatFile(
                 _("not enough fields in record: {!r}").format(self.curLine()))
 
-        lat1 = self._readLatitude(e[3])
-        lon1 = self._readLongitude(e[4])
-        lat2 = self._readLatitude(e[6])
-        lon2 = self._readLongitude(e[7])
+        return (e, self._readLatitude(e[3]), self._readLongitude(e[4]),
+                self._readLatitude(e[6]), self._readLongitude(e[7]))
+
+    def processWaterRunway(self, payload, readDetails=True):
+        """Process a runway record with code 101."""
+        e, lat1, lon1, lat2, lon2 = self._readWaterRunwayEnds(payload)
 
         if readDetails:
             width = self._readLength(e[0])
@@ -1258,6 +1547,353 @@ class RawAirportInfoParser:
         return (lat, lon, (rwy,))
 
 
+class AptDigestGeometryBatch:
+    """Batched computation of the geometric data of apt digest records.
+
+    When building the apt digest, the parser adds the coordinates of
+    the runway ends and helipads of many airports to an instance of
+    this class (cf. RawAirportInfoParser.readAirportDataForAptDigest()).
+    The n-vectors, airport centroids and runway lengths are then
+    computed for all these airports at once with NumPy, in
+    self.results(). The calculations are the same as in the scalar
+    code, and the n-vectors are summed in the same order, therefore the
+    results only differ by rounding errors of trigonometric functions
+    (much smaller than the precision of the apt digest file).
+
+    This class requires NumPy.
+
+    """
+
+    def __init__(self):
+        self.nbRunwayEnds = []  # for each airport
+        # Airport number (index in self.nbRunwayEnds) for each runway row,
+        # in file order
+        self.rowAirports = []
+        # Row number (index in self.rowAirports) and coordinates for each
+        # type of row
+        self.runwayRows = []
+        self.runwayCoords = []  # (lat1, lon1, lat2, lon2) tuples
+        self.helipadRows = []
+        self.helipadCoords = [] # (lat, lon) tuples
+        self.precomputedRows = []
+        self.precomputedNVecSums = []
+        # Runway lengths computed by the scalar code: (airport, length)
+        self.precomputedLengths = []
+
+    def _addRow(self, rows):
+        rows.append(len(self.rowAirports))
+        self.rowAirports.append(len(self.nbRunwayEnds))
+
+    def addRunway(self, lat1, lon1, lat2, lon2):
+        """Add a runway to the current airport."""
+        self._addRow(self.runwayRows)
+        self.runwayCoords.append((lat1, lon1, lat2, lon2))
+
+    def addHelipad(self, lat, lon):
+        """Add a helipad to the current airport."""
+        self._addRow(self.helipadRows)
+        self.helipadCoords.append((lat, lon))
+
+    def addPrecomputed(self, nvecSum, length):
+        """Add a runway row processed by the scalar code.
+
+        'nvecSum' and 'length' are as returned by
+        RawAirportInfoParser._processPotentialRunwayRow().
+
+        """
+        self._addRow(self.precomputedRows)
+        self.precomputedNVecSums.append(nvecSum)
+        if length is not None:
+            self.precomputedLengths.append((len(self.nbRunwayEnds), length))
+
+    def finishAirport(self, nbRunwayEnds):
+        """Terminate the current airport.
+
+        'nbRunwayEnds' is the number of runway ends + helipads of the
+        airport, used to compute its centroid.
+
+        """
+        self.nbRunwayEnds.append(nbRunwayEnds)
+
+    def results(self):
+        """Compute the geometric data for all airports of the batch.
+
+        Return a list containing, for each airport in the order they
+        were added, a tuple (avgLat, avgLon, minRwyLength, maxRwyLength)
+        with the same meaning as in the return value of
+        RawAirportInfoParser.readAirportDataForAptDigest().
+
+        """
+        import numpy
+        nbAirports = len(self.nbRunwayEnds)
+        rowAirports = numpy.array(self.rowAirports, dtype=numpy.intp)
+        # Contribution of each row to the sum of the n-vectors of its
+        # airport (one line per coordinate)
+        contributions = numpy.zeros((3, len(self.rowAirports)))
+        minLengths = numpy.full(nbAirports, numpy.inf)
+        maxLengths = numpy.full(nbAirports, -numpy.inf)
+
+        if self.runwayRows:
+            lat1, lon1, lat2, lon2 = numpy.array(self.runwayCoords).T
+            x1, y1, z1 = geodesy.nvectorArrays(lat1, lon1)
+            x2, y2, z2 = geodesy.nvectorArrays(lat2, lon2)
+            contributions[:, self.runwayRows] = (x1 + x2, y1 + y2, z1 + z2)
+
+            airports = rowAirports[self.runwayRows]
+            lengths = RawAirportInfoParser.computeLengthsForAptDigest(
+                lat1, lon1, lat2, lon2)
+            numpy.minimum.at(minLengths, airports, lengths)
+            numpy.maximum.at(maxLengths, airports, lengths)
+
+        if self.helipadRows:
+            lat, lon = numpy.array(self.helipadCoords).T
+            contributions[:, self.helipadRows] = geodesy.nvectorArrays(lat,
+                                                                       lon)
+
+        if self.precomputedRows:
+            contributions[:, self.precomputedRows] = \
+                                numpy.array(self.precomputedNVecSums).T
+
+        for airport, length in self.precomputedLengths:
+            minLengths[airport] = min(minLengths[airport], length)
+            maxLengths[airport] = max(maxLengths[airport], length)
+
+        # numpy.bincount() adds the weights in array order, which is also
+        # the order used by the scalar code.
+        sums = [ numpy.bincount(rowAirports, weights=c, minlength=nbAirports)
+                 for c in contributions ]
+        nbRunwayEnds = numpy.array(self.nbRunwayEnds, dtype=float)
+        # Airports without any runway nor helipad give NaN here; they
+        # are handled below.
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            avgLats, avgLons = geodesy.latLonArrays(
+                *[ s / nbRunwayEnds for s in sums ])
+
+        res = []
+        for i in range(nbAirports):
+            if self.nbRunwayEnds[i] > 0:
+                avgLat = misc.DecimalCoord(avgLats[i])
+                avgLon = misc.DecimalCoord(avgLons[i])
+            else:
+                avgLat, avgLon = None, None
+
+            if minLengths[i] <= maxLengths[i]: # at least one length
+                minRwyLength = float(minLengths[i])
+                maxRwyLength = float(maxLengths[i])
+            else:
+                minRwyLength = maxRwyLength = None
+
+            res.append((avgLat, avgLon, minRwyLength, maxRwyLength))
+
+        return res
+
+
+def aptDigestRecord(rawAirportInfo, indexToAptDatPath):
+    """Return the apt digest record for a RawAirportInfo instance.
+
+    The record is a tuple of the form (airportID, airportTypeValue,
+    airportName, airportElev, avgLat, avgLon, nbLandRunways,
+    nbWaterRunways, nbHelipads, minRwyLength, maxRwyLength,
+    airportIndex). It only contains simple types, so that it can be
+    cheaply passed between processes.
+
+    """
+    airportIndex, airportID, airportName, airportType, airportElev, \
+        avgLat, avgLon, nbLandRunways, nbWaterRunways, nbHelipads, \
+        minRwyLength, maxRwyLength = \
+            RawAirportInfoParser(
+                rawAirportInfo, indexToAptDatPath).readAirportDataForAptDigest()
+
+    return (airportID, airportType.value, airportName, airportElev,
+            avgLat, avgLon, nbLandRunways, nbWaterRunways, nbHelipads,
+            minRwyLength, maxRwyLength, airportIndex)
+
+
+# Number of airports whose runway geometry is computed at once when NumPy
+# is available. Large enough for the NumPy overhead to be negligible, small
+# enough for progress reporting to remain smooth.
+AIRPORTS_PER_GEOMETRY_BATCH = 2000
+
+def aptDigestRecords(rawAirportInfos, indexToAptDatPath,
+                     batchSize=AIRPORTS_PER_GEOMETRY_BATCH):
+    """Generate apt digest records for RawAirportInfo instances.
+
+    Equivalent to calling aptDigestRecord() for each element of the
+    'rawAirportInfos' iterable. However, if NumPy is available, the
+    runway geometry (airport centroids and runway lengths) is computed
+    for 'batchSize' airports at a time using AptDigestGeometryBatch,
+    which is much faster than doing it runway by runway.
+
+    """
+    if not HAS_NUMPY:
+        for rawAirportInfo in rawAirportInfos:
+            yield aptDigestRecord(rawAirportInfo, indexToAptDatPath)
+        return
+
+    it = iter(rawAirportInfos)
+    while True:
+        rawAirportInfoBatch = list(itertools.islice(it, batchSize))
+        if not rawAirportInfoBatch:
+            break
+
+        geometryBatch = AptDigestGeometryBatch()
+        airportData = [
+            RawAirportInfoParser(rawAirportInfo, indexToAptDatPath)
+            .readAirportDataForAptDigest(geometryBatch=geometryBatch)
+            for rawAirportInfo in rawAirportInfoBatch ]
+
+        for data, geometry in zip(airportData, geometryBatch.results()):
+            airportIndex, airportID, airportName, airportType, airportElev, \
+                _avgLat, _avgLon, nbLandRunways, nbWaterRunways, nbHelipads, \
+                _minRwyLength, _maxRwyLength = data
+            avgLat, avgLon, minRwyLength, maxRwyLength = geometry
+
+            yield (airportID, airportType.value, airportName, airportElev,
+                   avgLat, avgLon, nbLandRunways, nbWaterRunways, nbHelipads,
+                   minRwyLength, maxRwyLength, airportIndex)
+
+
+def uncompressedSizeHint(path, size):
+    """Return the (approximate) uncompressed size of an apt.dat file.
+
+    'size' is the size of the file at 'path'. For gzipped files, the
+    uncompressed size is read from the gzip trailer, which is only
+    reliable for single-member files smaller than 4 GiB. This is fine
+    for splitting work into chunks, but the result should not be used
+    for anything requiring an exact value.
+
+    """
+    if not path.endswith(".gz") or size < 18: # 18: minimum gzip file size
+        return size
+
+    with open(path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        res = int.from_bytes(f.read(4), "little")
+
+    # Obviously wrong (multi-member file, > 4 GiB...)? Don't split it.
+    return res if res >= size else 0
+
+
+# Shared counter for progress reporting from the apt digest worker processes
+_workerProgressCounter = None
+
+def _initAptDigestWorker(progressCounter):
+    global _workerProgressCounter
+    _workerProgressCounter = progressCounter
+
+def _reportWorkerProgress(amount):
+    with _workerProgressCounter.get_lock():
+        _workerProgressCounter.value += amount
+
+def _aptDigestWorker(task):
+    """Compute apt digest records for (part of) an apt.dat file.
+
+    Run in worker processes. 'task' is a tuple (path, aptDatIndex,
+    startOffset, endOffset, weight) as prepared by
+    AptDatSetManager._readAptDatFilesInParallel().
+
+    Return a tuple (records, uncompSize) where 'records' is the list of
+    apt digest records for the airports defined in the specified part of
+    the file, in file order, and 'uncompSize' is the uncompressed size
+    of the file if the task extends to the end of the file, otherwise
+    None.
+
+    """
+    path, aptDatIndex, startOffset, endOffset, weight = task
+    indexToAptDatPath = {aptDatIndex: path}
+    records = []
+    reported = 0.0
+
+    with AptDatReader(path, aptDatIndex) as reader:
+        rangeEnd = (endOffset if endOffset is not None
+                    else uncompressedSizeHint(path, os.path.getsize(path)))
+        rangeLength = max(1, rangeEnd - startOffset)
+
+        # Shadowing between apt.dat files (and between tasks for the same
+        # file) is handled by the parent process.
+        for record in aptDigestRecords(
+                reader.iterAirports(set(), startOffset=startOffset,
+                                    endOffset=endOffset),
+                indexToAptDatPath):
+            records.append(record)
+
+            if not (len(records) % 500):
+                done = weight * min(
+                    1.0, (reader.file.tell() - startOffset) / rangeLength)
+                _reportWorkerProgress(done - reported)
+                reported = done
+
+        uncompSize = reader.uncompSize
+
+    _reportWorkerProgress(weight - reported)
+    return (records, uncompSize)
+
+def _removeObsoleteFiles(directory, wantedNames):
+    """Remove all files in 'directory' whose name is not in 'wantedNames'."""
+    for name in os.listdir(directory):
+        if name not in wantedNames:
+            logger.info("Removing obsolete file '{}'".format(name))
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError as e:
+                logger.warning(_("Unable to remove '{path}': {errmsg}")
+                               .format(path=name, errmsg=e))
+
+def _checkpointIndexWorker(gzPath, indexPath, **kwargs):
+    # 'kwargs' (progress feedback arguments) is unused: building the index
+    # is much faster than parsing the file.
+    try:
+        gzip_index.buildIndex(gzPath, indexPath)
+    except OSError as e:
+        # The index is only an optimization; AptDatReader works without it.
+        logger.warning(_("Unable to build the checkpoint index for '{path}': "
+                         "{errmsg}").format(path=gzPath, errmsg=e))
+        return False
+
+    return True
+
+def _airportStoreWorker(aptDatPath, aptDatIndex, storePath, aptDatSize,
+                        aptDatTimestamp, progressFeedbackHandler=None,
+                        bytesReadSoFar=None):
+    """Build the airport store for an apt.dat file.
+
+    Every airport defined in the file is stored, regardless of
+    shadowing by other apt.dat files. Airports that can't be parsed are
+    left out; looking them up then falls back to reading the apt.dat
+    file, which reports the error in the usual way.
+
+    """
+    indexToAptDatPath = {aptDatIndex: aptDatPath}
+
+    try:
+        with airport_store.AirportStoreWriter(
+                storePath, aptDatPath, aptDatSize,
+                aptDatTimestamp) as writer, \
+             AptDatReader(
+                 aptDatPath, aptDatIndex,
+                 progressFeedbackHandler=progressFeedbackHandler) as reader:
+            for rawAirportInfo in reader.iterAirports(
+                    set(), bytesReadSoFar=bytesReadSoFar):
+                try:
+                    airport = RawAirportInfoParser(
+                        rawAirportInfo, indexToAptDatPath).airportInstance()
+                except Exception as e:
+                    logger.info("Not storing airport at {}:{}: {}".format(
+                        aptDatPath, rawAirportInfo.firstLineNum, e))
+                    continue
+
+                if not writer.add(airport.icao, airport):
+                    logger.info("Not storing airport {}: identifier too "
+                                "long".format(airport.icao))
+    except OSError as e:
+        # The store is only an optimization.
+        logger.warning(_("Unable to build the airport store for '{path}': "
+                         "{errmsg}").format(path=aptDatPath, errmsg=e))
+        return False
+
+    return True
+
+
 class AptDatSetManager:
     """High-level class for working with apt.dat files.
 
@@ -1269,8 +1905,17 @@ class AptDatSetManager:
     *not* gathered from several files.
 
     """
+    # Minimum amount of uncompressed data in each task given to a worker
+    # process when building the apt digest file
+    minChunkSize = 16 * 1024 * 1024
+    # Version of the format used for partial digests. Increment it whenever
+    # the apt digest records computed from a given apt.dat file may change.
+    partialDigestFormatVersion = 1
+
     def __init__(self, aptDatList, aptDatSizes=None, aptDatTimestamps=None,
-                 progressFeedbackHandler=None):
+                 progressFeedbackHandler=None, nbWorkers=None,
+                 checkpointIndexDir=None, partialDigestDir=None,
+                 useAirportStores=False, airportStoreDir=None):
         """Initialize an AptDatSetManager instance.
 
         If 'aptDatSizes' and 'aptDatTimestamps' are None, the
@@ -1280,6 +1925,25 @@ class AptDatSetManager:
         If 'progressFeedbackHandler' is None, a do-nothing
         misc.ProgressFeedbackHandler instance is created.
 
+        'nbWorkers' is the maximum number of worker processes used to
+        build the apt digest file. If None, use the number of CPUs in
+        the system. With 1, everything is done in the current process.
+
+        'checkpointIndexDir' is the directory where checkpoint indices
+        for the gzipped apt.dat files are stored (cf. the gzip_index
+        module). If None, use constants.APT_DAT_INDEX_DIR.
+
+        'partialDigestDir' is the directory where the partial digests
+        (one per apt.dat file) used to speed up rebuilds of the apt
+        digest file are stored. If None, use
+        constants.APT_PARTIAL_DIGEST_DIR.
+
+        If 'useAirportStores' is true, an airport store (cf. the
+        airport_store module) is written for each apt.dat file along
+        with the apt digest file, and used to look up detailed airport
+        data. Stores are kept in 'airportStoreDir', which defaults to
+        constants.AIRPORT_STORE_DIR.
+
         """
         self.updateListsAndTotalSize(aptDatList, aptDatSizes, aptDatTimestamps)
         # Allows this class to give progress feedback during time-consuming
@@ -1287,6 +1951,18 @@ class AptDatSetManager:
         self.progressFeedbackHandler = (
             progressFeedbackHandler if progressFeedbackHandler is not None
             else misc.ProgressFeedbackHandler())
+        self.nbWorkers = (nbWorkers if nbWorkers is not None
+                          else (os.cpu_count() or 1))
+        self.checkpointIndexDir = (
+            checkpointIndexDir if checkpointIndexDir is not None
+            else constants.APT_DAT_INDEX_DIR)
+        self.partialDigestDir = (
+            partialDigestDir if partialDigestDir is not None
+            else constants.APT_PARTIAL_DIGEST_DIR)
+        self.useAirportStores = useAirportStores
+        self.airportStoreDir = (
+            airportStoreDir if airportStoreDir is not None
+            else constants.AIRPORT_STORE_DIR)
 
     def updateListsAndTotalSize(self, aptDatList, aptDatSizes=None,
                                 aptDatTimestamps=None):
@@ -1326,6 +2002,307 @@ class AptDatSetManager:
         else:
             return True
 
+    def _readAptDatFilesSequentially(self, aptDatIndices):
+        """Read apt.dat files in the current process.
+
+        'aptDatIndices' is a sequence of indices in self.aptDatList.
+        Return a dictionary mapping each of these indices to a tuple
+        (records, uncompSize) where 'records' is the list of apt digest
+        records (cf. aptDigestRecord()) for the airports defined in the
+        corresponding file, in file order, and 'uncompSize' is the
+        uncompressed size of the file. Shadowing between different
+        files is not handled here (cf. self._mergeAptDatRecords()).
+
+        """
+        res = {}
+        bytesReadSoFar = 0
+
+        for i in aptDatIndices:
+            with \
+             AptDatReader(
+               self.aptDatList[i], i,
+               progressFeedbackHandler=self.progressFeedbackHandler) as reader:
+                # Airports are parsed in batches of limited size as their
+                # definitions are read, then the raw lines are dropped.
+                # This way, we never hold the contents of whole apt.dat
+                # files in memory.
+                records = list(aptDigestRecords(
+                    reader.iterAirports(set(), bytesReadSoFar=bytesReadSoFar),
+                    self.aptDatList))
+
+                res[i] = (records, reader.uncompSize)
+
+            bytesReadSoFar += self.aptDatSizes[i]
+
+        return res
+
+    def _canUseProcessPool(self):
+        # Worker processes are started with the 'fork' method, because with
+        # 'spawn' or 'forkserver', each worker would have to import the
+        # __main__ module of FFGo, which initializes Tk. 'fork' is not
+        # available on Windows, and unsafe on macOS with Tk (Cocoa) loaded
+        # in the parent process.
+        return (self.nbWorkers > 1 and platform.system() != "Darwin" and
+                "fork" in multiprocessing.get_all_start_methods())
+
+    def _aptDigestTasks(self, aptDatIndices):
+        """Split the apt digest build into tasks for worker processes.
+
+        'aptDatIndices' is a sequence of indices in self.aptDatList
+        giving the files to read. Return a list of tuples (aptDatIndex,
+        startOffset, endOffset, weight) in self.aptDatList priority
+        order, where:
+          - 'startOffset' and 'endOffset' are offsets in the
+            uncompressed stream of apt.dat file number 'aptDatIndex',
+            suitable for AptDatReader.iterAirports() ('endOffset' is
+            None for the last task of each file);
+          - 'weight' is the share of the total size of the files to
+            read corresponding to the task (for progress reporting).
+
+        Large files are split into several tasks, so that even a single
+        apt.dat file can be processed by several workers. Gzipped files
+        can be split too: each worker decompresses and skips the data
+        preceding its range, which is much faster than parsing it.
+
+        """
+        tasks = []
+
+        for i in aptDatIndices:
+            path = self.aptDatList[i]
+            size = self.aptDatSizes[i]
+            uncompSize = uncompressedSizeHint(path, size)
+            nbChunks = max(1, min(self.nbWorkers,
+                                  uncompSize // self.minChunkSize))
+            chunkSize = uncompSize // nbChunks
+
+            for k in range(nbChunks):
+                endOffset = (k+1)*chunkSize if k < nbChunks - 1 else None
+                tasks.append((i, k*chunkSize, endOffset, size / nbChunks))
+
+        return tasks
+
+    def _readAptDatFilesInParallel(self, tasks):
+        """Read apt.dat files using a pool of worker processes.
+
+        'tasks' should be the return value of self._aptDigestTasks().
+        Each worker produces apt digest records for a whole apt.dat
+        file or a part of it, without knowing anything about the other
+        files. The results for the various parts of a given file are
+        then concatenated in file order, dropping airports already
+        defined in an earlier part of the same file.
+
+        Return value: same as for self._readAptDatFilesSequentially().
+
+        """
+        ctx = multiprocessing.get_context("fork")
+        # Amount of work done, in the same unit as self.aptDatSizes. Shared
+        # by all workers.
+        progressCounter = ctx.Value("d", 0.0)
+        nbProcesses = min(self.nbWorkers, len(tasks))
+        logger.info("Building the apt digest with {} worker processes ({} "
+                    "tasks)".format(nbProcesses, len(tasks)))
+
+        with ctx.Pool(nbProcesses, initializer=_initAptDigestWorker,
+                      initargs=(progressCounter,)) as pool:
+            results = [
+                pool.apply_async(_aptDigestWorker,
+                                 ((self.aptDatList[task[0]],) + task,))
+                for task in tasks ]
+
+            for result in results:
+                while not result.ready():
+                    result.wait(0.1)
+                    # Also keeps the GUI responsive
+                    self.progressFeedbackHandler.setValue(
+                        progressCounter.value)
+
+            # Raises the exception from a worker, if any
+            partialResults = [ result.get() for result in results ]
+
+        res = {}
+        # Identifiers of the airports found so far in the current file
+        seenIds = None
+
+        for (aptDatIndex, *rest), (records, uncompSize) in zip(tasks,
+                                                              partialResults):
+            if aptDatIndex not in res: # first task for this file
+                res[aptDatIndex] = ([], None)
+                seenIds = set()
+
+            fileRecords = res[aptDatIndex][0]
+            for record in records:
+                airportID = record[0]
+                if airportID in seenIds:
+                    logger.info(_("{aptDat}:{lineNb}: skipping airport "
+                                  "{aptId} (already defined earlier)")
+                                .format(aptDat=self.aptDatList[aptDatIndex],
+                                        lineNb=record[-1][2],
+                                        aptId=airportID))
+                else:
+                    seenIds.add(airportID)
+                    fileRecords.append(record)
+
+            if uncompSize is not None: # last task for this file
+                res[aptDatIndex] = (fileRecords, uncompSize)
+
+        return res
+
+    def _mergeAptDatRecords(self, recordsPerFile):
+        """Merge apt digest records coming from all apt.dat files.
+
+        'recordsPerFile' should map each index in self.aptDatList to the
+        list of apt digest records for the corresponding file. Airports
+        defined in several files are taken from the file coming first in
+        self.aptDatList. Return an unsorted list of apt digest records
+        for the non-shadowed airports.
+
+        """
+        # Identifiers of the airports already found, for shadowing of
+        # airports defined in several apt.dat files
+        seenIds = set()
+        airports = []
+
+        for aptDatIndex, aptDatPath in enumerate(self.aptDatList):
+            for record in recordsPerFile[aptDatIndex]:
+                airportID = record[0]
+                if airportID in seenIds:
+                    logger.info(_("{aptDat}:{lineNb}: skipping airport "
+                                  "{aptId} (already defined earlier)")
+                                .format(aptDat=aptDatPath,
+                                        lineNb=record[-1][2],
+                                        aptId=airportID))
+                else:
+                    seenIds.add(airportID)
+                    airports.append(record)
+
+        return airports
+
+    def partialDigestPath(self, aptDatIndex):
+        """Return the path of the partial digest for an apt.dat file.
+
+        The returned file doesn't necessarily exist.
+
+        """
+        return os.path.join(
+            self.partialDigestDir,
+            misc.pathDigest(self.aptDatList[aptDatIndex]) + ".json")
+
+    def _loadPartialDigest(self, aptDatIndex):
+        """Load the partial digest for an apt.dat file if it is up-to-date.
+
+        Return a tuple (records, uncompSize) as in the values of the
+        dictionary returned by self._readAptDatFilesSequentially(), or
+        None if there is no usable partial digest for apt.dat file
+        number 'aptDatIndex'.
+
+        """
+        path = self.partialDigestPath(aptDatIndex)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tree = json.load(f)
+
+            if (tree["formatVersion"], tree["aptDatFile"], tree["size"],
+                tree["timestamp"]) != (self.partialDigestFormatVersion,
+                                       self.aptDatList[aptDatIndex],
+                                       self.aptDatSizes[aptDatIndex],
+                                       self.aptDatTimestamps[aptDatIndex]):
+                return None
+
+            DecimalCoord = misc.DecimalCoord
+            records = [
+                (airportID, type_, name, elev, DecimalCoord(lat),
+                 DecimalCoord(lon), nbLandRunways, nbWaterRunways,
+                 nbHelipads, minRwyLength, maxRwyLength,
+                 (aptDatIndex, byteOffset, lineNb))
+                for (airportID, type_, name, elev, lat, lon, nbLandRunways,
+                     nbWaterRunways, nbHelipads, minRwyLength, maxRwyLength,
+                     byteOffset, lineNb) in tree["airports"] ]
+            uncompSize = tree["uncompSize"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.info("Ignoring partial apt digest '{}': {}".format(path, e))
+            return None
+
+        return (records, uncompSize)
+
+    def _savePartialDigest(self, aptDatIndex, records, uncompSize):
+        path = self.partialDigestPath(aptDatIndex)
+        # The apt.dat index is not stored, because it depends on the
+        # position of the file in self.aptDatList.
+        tree = {
+            "formatVersion": self.partialDigestFormatVersion,
+            "aptDatFile": self.aptDatList[aptDatIndex],
+            "size": self.aptDatSizes[aptDatIndex],
+            "timestamp": self.aptDatTimestamps[aptDatIndex],
+            "uncompSize": uncompSize,
+            "airports": [ record[:-1] + record[-1][1:]
+                          for record in records ] }
+
+        tmpPath = path + ".tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump(tree, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmpPath, path)
+        except OSError as e:
+            # The partial digests are only an optimization.
+            logger.warning(_("Unable to write '{path}': {errmsg}").format(
+                path=path, errmsg=e))
+
+    def _readAptDatFiles(self):
+        """Get the apt digest records for all apt.dat files.
+
+        Partial digests (one per apt.dat file) are kept in
+        self.partialDigestDir. Files whose size and timestamp match
+        those recorded in their partial digest are not read again; the
+        others are parsed, then their partial digest is updated.
+
+        Return a tuple (airports, aptDatUncompressedSizes) where
+        'airports' is an unsorted list of apt digest records (cf.
+        aptDigestRecord()) for the non-shadowed airports.
+
+        """
+        recordsAndSizes = {}
+        for i in range(len(self.aptDatList)):
+            partialDigest = self._loadPartialDigest(i)
+            if partialDigest is not None:
+                recordsAndSizes[i] = partialDigest
+
+        toRead = [ i for i in range(len(self.aptDatList))
+                   if i not in recordsAndSizes ]
+        logger.info("Reusing the partial apt digests for {} apt.dat file(s), "
+                    "reading {} file(s)".format(len(recordsAndSizes),
+                                                len(toRead)))
+
+        self.progressFeedbackHandler.startPhase(
+            _("Reading apt.dat files..."), 0,
+            max(1, sum( self.aptDatSizes[i] for i in toRead )))
+
+        tasks = self._aptDigestTasks(toRead)
+        if self._canUseProcessPool() and len(tasks) > 1:
+            newlyRead = self._readAptDatFilesInParallel(tasks)
+        else:
+            newlyRead = self._readAptDatFilesSequentially(toRead)
+
+        os.makedirs(self.partialDigestDir, exist_ok=True)
+        for i, (records, uncompSize) in newlyRead.items():
+            self._savePartialDigest(i, records, uncompSize)
+
+        recordsAndSizes.update(newlyRead)
+        _removeObsoleteFiles(
+            self.partialDigestDir,
+            { os.path.basename(self.partialDigestPath(i))
+              for i in range(len(self.aptDatList)) })
+
+        airports = self._mergeAptDatRecords(
+            { i: records for i, (records, uncompSize)
+              in recordsAndSizes.items() })
+        aptDatUncompressedSizes = [ recordsAndSizes[i][1]
+                                    for i in range(len(self.aptDatList)) ]
+
+        return (airports, aptDatUncompressedSizes)
+
     def writeAptDigestFile(self, outputFile=None):
         """Write the apt digest file.
 
@@ -1340,105 +2317,285 @@ class AptDatSetManager:
             apt.dat line number in case an error is encountered;
           - perform the searches offered by the Airport Finder.
 
+        Only the apt.dat files that changed since the last call are
+        actually parsed (cf. self._readAptDatFiles()).
+
         """
         if outputFile is None:
             outputFile = constants.APT
 
-        airportInfoDict = {}
-        airports = []
-        bytesReadSoFar = 0
-        aptDatUncompressedSizes = []
+        airports, aptDatUncompressedSizes = self._readAptDatFiles()
 
-        self.progressFeedbackHandler.startPhase(_("Reading apt.dat files..."),
-                                                0, self.totalSize)
+        # Airport identifiers are unique at this point, therefore the tuples
+        # are sorted by airport identifier.
+        airports.sort()
+        nbAirports = len(airports)
 
-        for i, f in enumerate(self.aptDatList):
-            with \
-             AptDatReader(
-               f, i,
-               progressFeedbackHandler=self.progressFeedbackHandler) as reader:
-                aptDatUncompressedSizes.append(
-                    reader.readFile(airportInfoDict,
-                                    bytesReadSoFar=bytesReadSoFar))
-
-            bytesReadSoFar += self.aptDatSizes[i]
+        logger.info("Opening {prg}'s apt digest file ('{aptDigest}') for "
+                    "writing".format(prg=PROGNAME, aptDigest=outputFile))
 
-        nbAirports = len(airportInfoDict)
         self.progressFeedbackHandler.startPhase(
-            _("Loading data for {nbAirports} airports...")
-            .format(nbAirports=nbAirports),
+            _("Writing {prg}'s apt digest file...").format(prg=PROGNAME),
             0, nbAirports)
 
-        for i, rawAirportInfo in enumerate(airportInfoDict.values()):
-            airportIndex, airportID, airportName, airportType, airportElev, \
-                avgLat, avgLon, nbLandRunways, nbWaterRunways, nbHelipads, \
-                minRwyLength, maxRwyLength = \
-                    RawAirportInfoParser(
-                        rawAirportInfo,
-                        self.aptDatList).readAirportDataForAptDigest()
+        # The uncompressed file sizes will be used later for a basic safety
+        # check when using an index, because the seek() method of
+        # gzip.GzipFile behaves pretty badly in some cases (seemingly never
+        # returning), and I think this happens when using an invalid index.
+        header = AptDatDigest.header(
+            # Create an iterable of AptDatFileInfo instances
+            map(AptDatFileInfo._make,
+                zip(self.aptDatList, self.aptDatSizes,
+                    aptDatUncompressedSizes, self.aptDatTimestamps)))
+        records = bytearray()
+        packRecord = AptDatDigest.recordStruct.pack
+        nameOffset = 0
+
+        for i, (airportID, type_, name, elev, avgLat, avgLon,
+                nbLandRunways, nbWaterRunways, nbHelipads, minRwyLength,
+                maxRwyLength, airportIndex) in enumerate(airports):
+            nameLength = len(name.encode("utf-8"))
+            if minRwyLength is None:
+                # The “airport” has no real runway (one can hope it has
+                # helipads!)
+                minRwyLength = maxRwyLength = float("nan")
+            else:
+                # Same precision as in the text format used up to version 4
+                minRwyLength = round(minRwyLength, 4)
+                maxRwyLength = round(maxRwyLength, 4)
+
+            # The airport index is made of:
+            #   - aptDatIndex (index of an apt.dat file inside the ordered
+            #     list of apt.dat files used by FlightGear) followed by;
+            #   - byte offset inside said file, followed by;
+            #   - line number (where the airport definition starts).
+            records += packRecord(
+                nameOffset, nameLength, type_, nbLandRunways,
+                nbWaterRunways, nbHelipads, float(avgLat.precisionRepr()),
+                float(avgLon.precisionRepr()), minRwyLength,
+                maxRwyLength, *airportIndex)
+            nameOffset += nameLength + 1 # +1 for the '\n' separator
 
             if not (i % 300):
                 self.progressFeedbackHandler.setValue(i+1)
 
-            # This should be better than sorting the list once complete
-            # from an algorithmic point of view, however the difference is
-            # hardly measurable with apt.dat 2013.10, build 20131335,
-            # containing 34074 airports (the sort() taking about 0.04 s).
-            bisect.insort_right(
-                airports,
-                (airportID, airportType.value, airportName, airportElev,
-                 avgLat, avgLon, nbLandRunways, nbWaterRunways,
-                 nbHelipads, minRwyLength, maxRwyLength, airportIndex))
+        # Airport identifiers and names can't contain newlines, since they
+        # come from apt.dat lines.
+        icaoBlob = '\n'.join(( t[0] for t in airports )).encode("utf-8")
+        nameBlob = '\n'.join(( t[2] for t in airports )).encode("utf-8")
 
-        logger.info("Opening {prg}'s apt digest file ('{aptDigest}') for "
-                    "writing".format(prg=PROGNAME, aptDigest=outputFile))
+        # Write to a temporary file first: the previous apt digest file may
+        # still be mapped in memory (cf. AptDatDigest.read()), and
+        # truncating a mapped file makes accesses to the mapping fail.
+        tmpFile = outputFile + ".tmp"
+        with open(tmpFile, "wb") as f:
+            f.write(AptDatDigest.encodeHeader(header))
+            f.write(AptDatDigest.preambleStruct.pack(
+                nbAirports, len(icaoBlob), len(nameBlob)))
+            f.write(records)
+            f.write(icaoBlob)
+            f.write(nameBlob)
+
+        os.replace(tmpFile, outputFile)
+
+        self.writeCheckpointIndices()
+        if self.useAirportStores:
+            self.writeAirportStores()
+
+    def checkpointIndexPath(self, aptDatIndex):
+        """Return the checkpoint index path for an apt.dat file.
+
+        Return None if apt.dat file number 'aptDatIndex' is not gzipped.
+        The returned file doesn't necessarily exist.
+
+        """
+        path = self.aptDatList[aptDatIndex]
+        if not path.endswith(".gz"):
+            return None
+
+        return os.path.join(self.checkpointIndexDir,
+                            gzip_index.indexFileName(path))
+
+    def _checkpointIndexIsFresh(self, aptDatIndex):
+        """Tell whether there is an up-to-date checkpoint index.
+
+        Return True if the checkpoint index for apt.dat file number
+        'aptDatIndex' exists and was built from this file with its
+        current size and modification time.
 
+        """
+        indexPath = self.checkpointIndexPath(aptDatIndex)
+        if indexPath is None or not os.path.isfile(indexPath):
+            return False
+
+        try:
+            # This checks the path, size and mtime recorded in the index.
+            gzip_index.IndexedGzipFile(
+                indexPath, self.aptDatList[aptDatIndex]).close()
+        except (OSError, struct.error, gzip_index.error) as e:
+            logger.info("Not reusing checkpoint index '{}': {}".format(
+                indexPath, e))
+            return False
+
+        return True
+
+    def writeCheckpointIndices(self):
+        """Build the checkpoint indices for the gzipped apt.dat files.
+
+        These indices allow AptDatReader.getRawAirportInfoUsingIndex()
+        to jump close to any airport without decompressing all data
+        preceding it. Only indices that are missing or outdated are
+        built. Index files that don't correspond to any of the current
+        apt.dat files are removed.
+
+        """
+        jobs = [ (i, self.checkpointIndexPath(i))
+                 for i in range(len(self.aptDatList))
+                 if self.checkpointIndexPath(i) is not None ]
+        os.makedirs(self.checkpointIndexDir, exist_ok=True)
+
+        _removeObsoleteFiles(
+            self.checkpointIndexDir,
+            { os.path.basename(indexPath) for i, indexPath in jobs })
+
+        jobs = [ (i, indexPath) for i, indexPath in jobs
+                 if not self._checkpointIndexIsFresh(i) ]
+        if not jobs:
+            return
+
+        self._runPerFileJobs(
+            _("Indexing gzipped apt.dat files..."), _checkpointIndexWorker,
+            [ (i, (self.aptDatList[i], indexPath)) for i, indexPath in jobs ])
+
+    def _runPerFileJobs(self, text, func, jobs):
+        """Run one job per apt.dat file, in worker processes if possible.
+
+        'jobs' should be a sequence of tuples (aptDatIndex, args); for
+        each of them, func(*args) is called. When the jobs are run in
+        the current process, 'func' is also passed the keyword arguments
+        'progressFeedbackHandler' and 'bytesReadSoFar' (same meaning as
+        for AptDatReader.iterAirports()). Progress feedback is given
+        with 'text' as the phase description.
+
+        """
         self.progressFeedbackHandler.startPhase(
-            _("Writing {prg}'s apt digest file...").format(prg=PROGNAME),
-            0, nbAirports)
+            text, 0, max(1, sum( self.aptDatSizes[i] for i, args in jobs )))
+        done = 0
+
+        if self._canUseProcessPool() and len(jobs) > 1:
+            ctx = multiprocessing.get_context("fork")
+            with ctx.Pool(min(self.nbWorkers, len(jobs))) as pool:
+                results = [ pool.apply_async(func, args)
+                            for i, args in jobs ]
+
+                for (i, args), result in zip(jobs, results):
+                    while not result.ready():
+                        result.wait(0.1)
+                        self.progressFeedbackHandler.setValue(done)
+
+                    result.get()
+                    done += self.aptDatSizes[i]
+                    self.progressFeedbackHandler.setValue(done)
+        else:
+            for i, args in jobs:
+                func(*args,
+                     progressFeedbackHandler=self.progressFeedbackHandler,
+                     bytesReadSoFar=done)
+                done += self.aptDatSizes[i]
+                self.progressFeedbackHandler.setValue(done)
 
-        with open(outputFile, "w", encoding="utf-8") as f:
-            # The uncompressed file sizes will be used later for a basic safety
-            # check when using an index, because the seek() method of
-            # gzip.GzipFile behaves pretty badly in some cases (seemingly never
-            # returning), and I think this happens when using an invalid index.
-            f.write(AptDatDigest.header(
-                # Create an iterable of AptDatFileInfo instances
-                map(AptDatFileInfo._make,
-                    zip(self.aptDatList, self.aptDatSizes,
-                        aptDatUncompressedSizes, self.aptDatTimestamps))))
-
-            # Optimizing this with writelines() doesn't seem to be worth it
-            # (measured with with older code, but this certainly still applies:
-            # 0.11 seconds with writelines() instead of 0.12, while the whole
-            # method took about 28 seconds for 34074 airprts).
-            for i, (airportID, type_, name, elev, avgLat, avgLon,
-                    nbLandRunways, nbWaterRunways, nbHelipads, minRwyLength,
-                    maxRwyLength, airportIndex) in enumerate(airports):
-                nbRunways = ';'.join(( str(s) for s in
-                                       (nbLandRunways, nbWaterRunways,
-                                        nbHelipads) ))
-                if minRwyLength is None:
-                    minMaxRwyLengths = ""
-                else:
-                    minMaxRwyLengths = "{:.04f};{:.04f}".format(minRwyLength,
-                                                                maxRwyLength)
+    def airportStorePath(self, aptDatIndex):
+        """Return the path of the airport store for an apt.dat file.
+
+        The returned file doesn't necessarily exist.
+
+        """
+        return os.path.join(
+            self.airportStoreDir,
+            airport_store.storeFileName(self.aptDatList[aptDatIndex]))
+
+    def _openAirportStore(self, aptDatIndex):
+        """Open the airport store for an apt.dat file.
+
+        Return an airport_store.AirportStore instance, or None if there
+        is no up-to-date store for apt.dat file number 'aptDatIndex'.
 
-                # Encode the airport index:
-                #   - aptDatIndex (index of an apt.dat file inside the ordered
-                #     list of apt.dat files used by FlightGear) followed by;
-                #   - byte offset inside said file, followed by;
-                #   - line number (where the airport definition starts).
-                indexRepr = ';'.join(( str(i) for i in airportIndex ))
+        """
+        path = self.airportStorePath(aptDatIndex)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            store = airport_store.AirportStore(path)
+        except (OSError, struct.error, airport_store.error) as e:
+            logger.info("Not using airport store '{}': {}".format(path, e))
+            return None
+
+        if not store.isFreshFor(self.aptDatList[aptDatIndex],
+                                self.aptDatSizes[aptDatIndex],
+                                self.aptDatTimestamps[aptDatIndex]):
+            store.close()
+            return None
+
+        return store
+
+    def writeAirportStores(self):
+        """Build the airport stores for the apt.dat files.
+
+        Only stores that are missing or outdated are built. Stores that
+        don't correspond to any of the current apt.dat files are
+        removed.
+
+        """
+        os.makedirs(self.airportStoreDir, exist_ok=True)
+        jobs = []
+
+        for i, path in enumerate(self.aptDatList):
+            store = self._openAirportStore(i)
+            if store is not None:
+                store.close()   # up-to-date
+            else:
+                jobs.append(
+                    (i, (path, i, self.airportStorePath(i),
+                         self.aptDatSizes[i], self.aptDatTimestamps[i])))
 
-                f.write(
-                    '\0'.join([airportID, name, str(type_),
-                               avgLat.precisionRepr(), avgLon.precisionRepr(),
-                               nbRunways, minMaxRwyLengths, indexRepr])
-                    + '\n')
+        _removeObsoleteFiles(
+            self.airportStoreDir,
+            { os.path.basename(self.airportStorePath(i))
+              for i in range(len(self.aptDatList)) })
 
-                if not (i % 300):
-                    self.progressFeedbackHandler.setValue(i+1)
+        if jobs:
+            self._runPerFileJobs(_("Storing airport details..."),
+                                 _airportStoreWorker, jobs)
+
+    def _readAirportDataFromStore(self, airportID, index):
+        """Read detailed airport data from an airport store.
+
+        'index' is as for self.readAirportDataUsingIndex(). Return an
+        Airport instance, or None if the data isn't available from an
+        up-to-date store or doesn't match 'index'.
+
+        """
+        store = self._openAirportStore(index[0])
+        if store is None:
+            return None
+
+        try:
+            airport = store.get(airportID)
+        except Exception as e:  # corrupt store, outdated classes...
+            logger.info("Unable to read {} from airport store '{}': {}".format(
+                airportID, store.storePath, e))
+            return None
+        finally:
+            store.close()
+
+        # The apt.dat index is not stored, because it depends on the
+        # position of the file in self.aptDatList.
+        if airport is None or airport.airportIndex[1:] != tuple(index[1:]):
+            return None
+
+        airport.airportIndex = tuple(index)
+        return airport
 
     def readAirportDataUsingIndex(self, airportID, index):
         """Read detailed airport data from an apt.dat file using an index.
@@ -1457,7 +2614,15 @@ class AptDatSetManager:
             otherwise None.
 
         """
-        with AptDatReader(self.aptDatList[index[0]], index[0]) as aptDat:
+        if self.useAirportStores:
+            airport = self._readAirportDataFromStore(airportID, index)
+            if airport is not None:
+                return (True, airport)
+
+        with AptDatReader(
+                self.aptDatList[index[0]], index[0],
+                checkpointIndexPath=self.checkpointIndexPath(index[0])) \
+                as aptDat:
             found, rawAirportInfo = aptDat.getRawAirportInfoUsingIndex(
                 airportID, index[1:])
 
@@ -1469,19 +2634,163 @@ class AptDatSetManager:
             return (False, None)
 
 
+# Faster than calling AirportType(value)
+_airportTypeOf = { type_.value: type_ for type_ in AirportType }
+
+
+class AptDigestAirports(collections.abc.Mapping):
+    """Read-only mapping from airport identifiers to AirportStub instances.
+
+    This is the type of the 'airports' mapping returned by
+    AptDatDigest.read(). The keys are obtained at once from the
+    identifier table of the apt digest file; the corresponding fixed-size
+    records are only decoded when an airport is looked up. The resulting
+    AirportStub instance is then kept, so that all lookups for a given
+    airport return the same object (this matters because attributes
+    such as 'useCountForShow' are modified after creation, cf. the
+    stats_manager module).
+
+    Iteration yields the airport identifiers in sorted order.
+
+    """
+
+    def __init__(self, data, recordsOffset, icaos, namesOffset):
+        # 'data' is an mmap.mmap or bytes object containing the whole apt
+        # digest file.
+        self._data = data
+        self._recordsOffset = recordsOffset
+        self._namesOffset = namesOffset
+        self._icaos = icaos
+        self._indexOf = dict(zip(icaos, range(len(icaos))))
+        # AirportStub instances already created
+        self._stubs = {}
+
+    def __len__(self):
+        return len(self._icaos)
+
+    def __iter__(self):
+        return iter(self._icaos)
+
+    def __contains__(self, icao):
+        return icao in self._indexOf
+
+    def __getitem__(self, icao):
+        # All stubs are usually created at startup: keep this fast.
+        stub = self._stubs.get(icao)
+        if stub is not None:
+            return stub
+
+        i = self._indexOf[icao]   # raises KeyError for unknown airports
+        nameOffset, nameLength, type_, nbLandRunways, nbWaterRunways, \
+            nbHelipads, lat, lon, minRwyLength, maxRwyLength, aptDatIndex, \
+            byteOffset, lineNb = AptDatDigest.recordStruct.unpack_from(
+                self._data,
+                self._recordsOffset + i*AptDatDigest.recordStruct.size)
+
+        start = self._namesOffset + nameOffset
+        name = self._data[start:start+nameLength].decode("utf-8")
+
+        if math.isnan(minRwyLength):
+            # The “airport” has no real runway (one can hope it has
+            # helipads!)
+            minRwyLength, maxRwyLength = None, None
+
+        stub = self._stubs[icao] = AirportStub(
+            icao, name, _airportTypeOf[type_], misc.DecimalCoord(lat),
+            misc.DecimalCoord(lon), nbLandRunways, nbWaterRunways, nbHelipads,
+            minRwyLength, maxRwyLength, (aptDatIndex, byteOffset, lineNb))
+
+        return stub
+
+
+# Version of the data returned by airportsSnapshotData(); must be incremented
+# whenever its layout changes.
+AIRPORTS_SNAPSHOT_VERSION = 1
+
+
+def airportsSnapshotData(aptDatFilesInfo, airports):
+    """Encode the result of AptDatDigest.read() for the state snapshot.
+
+    Return a tuple (filesInfo, rows) containing only types supported by
+    the 'marshal' module (cf. the state_snapshot module). 'rows' has one
+    tuple per airport, in the iteration order of 'airports'.
+    airportsFromSnapshotData() performs the reverse operation.
+
+    """
+    filesInfo = tuple( tuple(info) for info in aptDatFilesInfo )
+    rows = []
+
+    with misc.gcDisabled():
+        for icao, stub in airports.items():
+            rows.append((icao, stub.name, stub.type.value, float(stub.lat),
+                         float(stub.lon), stub.nbLandRunways,
+                         stub.nbWaterRunways, stub.nbHelipads,
+                         stub.minRwyLength, stub.maxRwyLength)
+                        + tuple(stub.airportIndex))
+
+    return (filesInfo, rows)
+
+
+def airportsFromSnapshotData(data):
+    """Decode data returned by airportsSnapshotData().
+
+    Return a tuple (aptDatFilesInfo, airports) like AptDatDigest.read(),
+    except that 'airports' is a dictionary whose iteration order is the
+    same as for the mapping passed to airportsSnapshotData().
+
+    """
+    filesInfo, rows = data
+    aptDatFilesInfo = [ AptDatFileInfo._make(info) for info in filesInfo ]
+    # Local names for speed (this is done for every airport)
+    DecimalCoord = misc.DecimalCoord
+    airportTypeOf = _airportTypeOf
+    airports = {}
+
+    with misc.gcDisabled():
+        for (icao, name, type_, lat, lon, nbLandRunways, nbWaterRunways,
+             nbHelipads, minRwyLength, maxRwyLength, aptDatIndex, byteOffset,
+             lineNb) in rows:
+            airports[icao] = AirportStub(
+                icao, name, airportTypeOf[type_], DecimalCoord(lat),
+                DecimalCoord(lon), nbLandRunways, nbWaterRunways, nbHelipads,
+                minRwyLength, maxRwyLength, (aptDatIndex, byteOffset, lineNb))
+
+    return (aptDatFilesInfo, airports)
+
+
 class AptDatDigest:
     """Class for managing apt digest files."""
 
     # Magic number for reliable identification of FFGo's apt file format
     FORMAT_MAGIC_NB = 7856251374982125
     # Current version of the apt digest file format
-    CURRENT_FMT_VERSION = 4
+    CURRENT_FMT_VERSION = 6
+
+    # Since format version 5, the text header is followed by a binary part
+    # starting at a multiple of 8. Since format version 6, the header ends
+    # at the first occurrence of two consecutive newlines and is always
+    # followed by 1 to 8 NUL bytes of padding, so that the binary part
+    # starts at the first multiple of 8 that is greater than the length of
+    # the header (the binary part may start with a newline). The binary part
+    # starts with a preamble giving the number of airports and the sizes of
+    # the identifier and name tables, in bytes. It is followed by one
+    # fixed-size record per airport, in airport identifier order, then the
+    # identifier table and the name table. Each of these tables contains
+    # UTF-8 encoded strings separated by '\n' (one string per airport, in
+    # the same order as the records).
+    preambleStruct = struct.Struct("<IQQ")
+    # Offset and length of the airport name in the name table, airport type,
+    # number of land runways, water runways and helipads, latitude,
+    # longitude, min and max runway lengths (NaN if the airport has no land
+    # or water runway) and airport index (aptDatIndex, byteOffset, lineNb).
+    recordStruct = struct.Struct("<IIBHHHddddIQI")
 
     @classmethod
     def header(cls, aptDatFilesInfo, formatVersion=CURRENT_FMT_VERSION):
+        # One line per apt.dat file; the header ends with an empty line.
         l = [ '\0'.join(["apt.dat file: " + path, repr(size) + " bytes",
                          repr(uncomp) + " uncompressed",
-                         "timestamp " + repr(timestamp)])
+                         "timestamp " + repr(timestamp)]) + '\n'
               for path, size, uncomp, timestamp in aptDatFilesInfo ]
 
         return textwrap.dedent("""\
@@ -1489,9 +2798,55 @@ class AptDatDigest:
    {prg}'s airport database, generated from FlightGear's apt.dat files)
    Magic number: {magicNumber}
    Format version: {fmtVer}
-   {aptDatFilesInfo}\n\n""").format(
+   {aptDatFilesInfo}\n""").format(
        prg=PROGNAME, magicNumber=cls.FORMAT_MAGIC_NB, fmtVer=formatVersion,
-       aptDatFilesInfo='\n'.join(l))
+       aptDatFilesInfo=''.join(l))
+
+    @classmethod
+    def encodeHeader(cls, header):
+        """Encode the header and pad it for the binary part that follows.
+
+        The padding is made of 1 to 8 NUL bytes, so that the end of the
+        header is unambiguous whatever the binary part starts with.
+
+        """
+        res = header.encode("utf-8")
+        assert res.find(b"\n\n") == len(res) - 2, res
+        res += b"\0" * (8 - len(res) % 8)
+
+        # Round-trip check (the header length matters, cf. _splitHeader())
+        decodedHeader, binaryOffset = cls._splitHeader(res)
+        assert (decodedHeader, binaryOffset) == (header, len(res)), \
+            (decodedHeader, binaryOffset, header, len(res))
+
+        return res
+
+    @classmethod
+    def _splitHeader(cls, data):
+        """Locate the header in 'data' (bytes-like or mmap object).
+
+        Return a tuple (header, binaryPartOffset) where 'header' is the
+        decoded header.
+
+        """
+        end = data.find(b"\n\n")
+        if end == -1:
+            raise UnrecognizedFormatForAptDigest(
+                _("end of file reached before the end of the header"))
+
+        end += 2
+        if data[end:end+1] != b"\0":
+            raise UnrecognizedFormatForAptDigest(
+                _("no padding after the header"))
+
+        try:
+            header = data[:end].decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise UnrecognizedFormatForAptDigest(
+                _("invalid UTF-8 data in the header")) from e
+
+        # There are 1 to 8 NUL bytes of padding after the header.
+        return (header, end + 8 - end % 8)
 
     _magicNb_cre = re.compile(r"^Magic number: (?P<number>\d+)$")
     _fmtVersion_cre = re.compile(r"^Format version: (?P<version>\d+)$")
@@ -1582,57 +2937,71 @@ class AptDatDigest:
           - 'aptDatFilesInfo' is a sequence of AptDatFileInfo instances
             giving precise information about all apt.dat files from
             which the apt digest file given by 'path' was built;
-          - 'airports' is a dictionary whose keys are ICAO codes and
-            values AirportStub instances for the corresponding airports.
+          - 'airports' is a mapping (AptDigestAirports instance) whose
+            keys are ICAO codes and values AirportStub instances for the
+            corresponding airports.
+
+        If 'onlyReadHeader' is true, return a tuple (formatVersion,
+        aptDatFilesInfo) instead.
+
+        The file is memory-mapped, except on Windows where an open
+        mapping would prevent the next apt digest file from replacing
+        this one. In both cases, nothing is parsed for a given airport
+        until it is looked up in 'airports'.
 
         """
-        airports = {}
         logger.info("Opening {prg}'s apt digest file ('{aptDigest}') for "
                     "reading{cmpl}".format(prg=PROGNAME, aptDigest=path,
                     cmpl=" (header only)" if onlyReadHeader else ""))
 
-        with open(path, "r", encoding="utf-8") as f:
-            formatVersion, aptDatFilesInfo = cls._checkHeader(f)
+        with open(path, "rb") as f:
+            if onlyReadHeader:
+                # The header is small, don't read nor map the whole file.
+                data = b""
+                # Also read the first padding byte, cf. _splitHeader()
+                while not 0 <= data.find(b"\n\n") < len(data) - 2:
+                    chunk = f.read(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+            elif os.name == "nt" or os.fstat(f.fileno()).st_size == 0:
+                data = f.read()
+            else:
+                # The mapping remains valid after the file is closed.
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-            if formatVersion != cls.CURRENT_FMT_VERSION:
-                raise UnrecognizedFormatForAptDigest(
-                    _("unsupported format version number {num}, current is "
-                      "{current}").format(num=formatVersion,
-                                          current=cls.CURRENT_FMT_VERSION))
+        header, binaryOffset = cls._splitHeader(data)
+        formatVersion, aptDatFilesInfo = cls._checkHeader(io.StringIO(header))
 
-            if onlyReadHeader:
-                return (formatVersion, aptDatFilesInfo)
+        if formatVersion != cls.CURRENT_FMT_VERSION:
+            raise UnrecognizedFormatForAptDigest(
+                _("unsupported format version number {num}, current is "
+                  "{current}").format(num=formatVersion,
+                                      current=cls.CURRENT_FMT_VERSION))
 
-            while True:
-                line = f.readline()
-                if not line:
-                    break
+        if onlyReadHeader:
+            return (formatVersion, aptDatFilesInfo)
 
-                try:
-                    l = line[:-1].split('\0')
-                    airportID = l[0]
-                    name = l[1]
-                    type_ = AirportType(int(l[2]))
-                    lat, lon = map(misc.DecimalCoord, l[3:5])
-                    nbLandRunways, nbWaterRunways, nbHelipads = map(
-                        int, l[5].split(';'))
-
-                    if l[6]:
-                        minRwyLength, maxRwyLength = map(
-                            float, l[6].split(';'))
-                    else:
-                        # The “airport” has no real runway (one can hope it has
-                        # helipads!)
-                        minRwyLength, maxRwyLength = None, None
-
-                    # aptDatIndex, byte offset and line number (3-tuple)
-                    airportIndex = tuple(map(int, l[7].split(';')))
-                except Exception as e: # could be refined a little bit...
-                    raise UnableToParseAptDigest() from e
-
-                airports[airportID] = AirportStub(
-                    airportID, name, type_, lat, lon, nbLandRunways,
-                    nbWaterRunways, nbHelipads, minRwyLength, maxRwyLength,
-                    airportIndex)
+        try:
+            nbAirports, icaoTableSize, nameTableSize = \
+                        cls.preambleStruct.unpack_from(data, binaryOffset)
+            recordsOffset = binaryOffset + cls.preambleStruct.size
+            icaoTableOffset = recordsOffset + nbAirports*cls.recordStruct.size
+            namesOffset = icaoTableOffset + icaoTableSize
+
+            if namesOffset + nameTableSize != len(data):
+                raise UnableToParseAptDigest(
+                    _("unexpected file size for the apt digest file"))
+
+            icaos = (data[icaoTableOffset:namesOffset].decode("utf-8")
+                     .split('\n') if nbAirports else [])
+            if len(icaos) != nbAirports:
+                raise UnableToParseAptDigest(
+                    _("inconsistent number of airports in the apt digest "
+                      "file"))
+        except (struct.error, UnicodeDecodeError) as e:
+            raise UnableToParseAptDigest() from e
+
+        airports = AptDigestAirports(data, recordsOffset, icaos, namesOffset)
 
         return (aptDatFilesInfo, airports)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+# fgfs_cache.py --- Persistent cache for the results of 'fgfs --version' and
+#                   'fgfs --json-report'
+#
+# Copyright (c) 2016, Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Persistent cache for the results of 'fgfs --version' and --json-report.
+
+Running fgfs, even only to obtain its version or its JSON report, takes
+a noticeable amount of time, and used to be done several times each
+time the configuration was (re)loaded. The results are stored in a JSON
+file, in entries whose key contains everything that may influence the
+output of fgfs:
+
+  - the path to the fgfs executable, as well as its size, modification
+    time and inode number (so that installing another FlightGear
+    version invalidates the entry);
+  - FG_ROOT, the working directory and the other arguments passed to
+    fgfs;
+  - the environment variables read by fgfs (FG_ROOT, FG_HOME...).
+
+In addition, the results of --json-report depend on the contents of the
+scenery paths (for instance, apt.dat files are searched in
+<scenery path>/NavData/apt) and on the FlightGear autosave file. The
+entries therefore also record the modification time and size of the
+files and directories listed in the report; an entry is only used if
+none of them has changed.
+
+Errors are never cached: if fgfs fails, it will be run again next time.
+
+"""
+
+import os
+import shutil
+import threading
+import time
+import json
+
+from .. import constants
+from ..logging import logger
+# These imports require the translation system [_() function] to be in
+# place.
+from . import fgversion
+from . import json_report
+
+
+# Environment variables that influence the output of fgfs
+_relevantEnvironmentVariables = ("FG_ROOT", "FG_HOME", "FG_SCENERY",
+                                 "FG_AIRCRAFT")
+
+
+def _pathStamp(path):
+    """Return a JSON-compatible value that changes when 'path' changes.
+
+    For a directory, the modification time changes when an entry is
+    added or removed.
+
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None             # nonexistent or inaccessible
+
+    return [st.st_mtime_ns, st.st_size]
+
+
+class FGFSQueryCache:
+    """Persistent cache for the results of 'fgfs --version' and --json-report.
+
+    The getFlightGearVersion() and getFlightGearJSONReport() methods are
+    drop-in replacements for the functions with the same names in the
+    fgversion and json_report modules.
+
+    """
+
+    formatVersion = 1
+    # Old entries are removed beyond this number (least recently used
+    # first).
+    maxEntries = 16
+
+    def __init__(self, path=constants.FGFS_CACHE):
+        self.path = path
+        self.entries = None     # loaded on first use
+        # The queries may be run from worker threads (Config.update())
+        self.lock = threading.Lock()
+
+    def _load(self):
+        self.entries = {}
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.info("Ignoring the fgfs cache '{}': {}".format(self.path,
+                                                                  e))
+            return
+
+        if (isinstance(data, dict) and
+            data.get("formatVersion") == self.formatVersion):
+            self.entries = data["entries"]
+
+    def _save(self):
+        # Only keep the most recently used entries
+        keys = sorted(self.entries, key=lambda k: self.entries[k]["lastUsed"],
+                      reverse=True)
+        for key in keys[self.maxEntries:]:
+            del self.entries[key]
+
+        tmpPath = self.path + ".tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump({"formatVersion": self.formatVersion,
+                           "entries": self.entries}, f)
+            os.replace(tmpPath, self.path)
+        except OSError as e:
+            # The cache is only an optimization.
+            logger.warning(_("Unable to write the fgfs cache '{path}': "
+                             "{errmsg}").format(path=self.path, errmsg=e))
+
+    def _key(self, query, FG_bin, FG_root, FG_working_dir, args):
+        """Return the cache key for a query, or None.
+
+        None is returned if the fgfs executable can't be found, in
+        which case the query should not be cached.
+
+        """
+        # Same lookup as done by subprocess for a bare command name
+        binPath = shutil.which(FG_bin) or FG_bin
+        try:
+            st = os.stat(binPath)
+        except OSError:
+            return None
+
+        env = [ os.environ.get(name)
+                for name in _relevantEnvironmentVariables ]
+
+        return json.dumps(
+            [query, os.path.abspath(binPath), st.st_size, st.st_mtime_ns,
+             st.st_ino, FG_root, FG_working_dir, list(args), env])
+
+    def _get(self, key):
+        """Return the cached result for 'key', or None."""
+        if key is None:
+            return None
+        if self.entries is None:
+            self._load()
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        for path, stamp in entry["dependencies"]:
+            if _pathStamp(path) != stamp:
+                logger.debug("fgfs cache: '{}' has changed".format(path))
+                return None
+
+        entry["lastUsed"] = time.time()
+        return entry["result"]
+
+    def _put(self, key, result, dependencies=()):
+        if key is None:
+            return
+        if self.entries is None:
+            self._load()
+
+        self.entries[key] = {
+            "result": result,
+            "dependencies": [ [path, _pathStamp(path)]
+                              for path in dependencies ],
+            "lastUsed": time.time()}
+        self._save()
+
+    def getFlightGearVersion(self, FG_bin, FG_root, FG_working_dir):
+        """Cached version of fgversion.getFlightGearVersion()."""
+        key = self._key("--version", FG_bin, FG_root, FG_working_dir, [])
+        with self.lock:
+            res = self._get(key)
+
+        if res is not None:
+            logger.debug("Using the cached output of 'fgfs --version'")
+            return fgversion.FlightGearVersion(res)
+
+        version = fgversion.getFlightGearVersion(FG_bin, FG_root,
+                                                 FG_working_dir)
+        with self.lock:
+            self._put(key, str(version))
+
+        return version
+
+    def getFlightGearJSONReport(self, FG_bin, FG_working_dir, args,
+                                FG_root):
+        """Cached version of json_report.getFlightGearJSONReport().
+
+        As in the original function, 'FG_root' is not passed to fgfs.
+        It is only part of the cache key: a change of FG_ROOT in the
+        configuration generally comes with a different FlightGear
+        installation.
+
+        """
+        key = self._key("--json-report", FG_bin, FG_root, FG_working_dir,
+                        args)
+        with self.lock:
+            res = self._get(key)
+
+        if res is not None:
+            logger.debug("Using the cached output of 'fgfs --json-report'")
+            return res
+
+        report = json_report.getFlightGearJSONReport(FG_bin, FG_working_dir,
+                                                     args)
+        with self.lock:
+            self._put(key, report, self._reportDependencies(report))
+
+        return report
+
+    @classmethod
+    def _reportDependencies(cls, report):
+        """Paths whose modification invalidates a cached JSON report."""
+        config = report.get("config", {})
+        res = []
+
+        for path in config.get("sceneryPaths", []):
+            res.extend((path, os.path.join(path, "NavData", "apt")))
+
+        for name in ("fgRoot", "terrasyncPath", "autosavePath"):
+            path = config.get(name)
+            if path:
+                res.append(path)
+
+        res.extend(report.get("navData", {}).get("aptDatPaths", []))
+
+        return res
@@ -10,7 +10,6 @@
 
 import re
 import enum
-from xml.etree import ElementTree
 import locale
 import textwrap
 
@@ -190,6 +189,7 @@ def readGroundnetFile(xmlFilePath):
     res = {}
     exceptions = []             # list of problems found in the groundnet file
 
+    from xml.etree import ElementTree
     tree = ElementTree.parse(xmlFilePath)
     root = tree.getroot()
 
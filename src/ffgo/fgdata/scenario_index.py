@@ -0,0 +1,249 @@
+# scenario_index.py --- Persistent index of the AI scenario files
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Persistent index of the AI scenario files.
+
+FFGo needs two things from the XML files in $FG_ROOT/AI: the aircraft
+carriers defined in each scenario (with their parking positions) and
+the scenario description shown in the Scenarios popup. Parsing all
+these files each time the configuration is (re)loaded is wasteful,
+since they hardly ever change. The index records, for each file, its
+modification time and size together with the extracted data; a file is
+only parsed again when one of them has changed.
+
+Files are parsed with ElementTree.iterparse(): elements are discarded
+as soon as they have been processed, and parsing stops once the
+<scenario> element has been read and a description has been found.
+
+Files modified less than RACY_INTERVAL seconds before being parsed are
+not recorded with their stamp, for the same reason as in the
+aircraft_catalog module.
+
+"""
+
+import os
+import time
+import json
+
+from .. import constants
+from ..logging import logger
+
+
+# See the module docstring
+RACY_INTERVAL = 2.0
+
+
+def _fileStamp(path):
+    """Return [mtime_ns, size] for regular file 'path', or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return [st.st_mtime_ns, st.st_size]
+
+
+def parseScenarioFile(xmlFilePath):
+    """Extract the data used by FFGo from an AI scenario file.
+
+    Return a dictionary with the following keys:
+
+      - "carriers": list of [name, parking pos, parking pos, ...] lists
+        for the carriers defined in the first <scenario> element (direct
+        child of the root element);
+      - "description": text of the first <description> element found
+        below the root element (in document order), or None.
+
+    Raise ElementTree.ParseError if the file is not well-formed XML (up
+    to the point where parsing was stopped) and OSError if it can't be
+    read.
+
+    """
+    from xml.etree import ElementTree
+
+    carriers = []
+    description = None
+    descriptionElt = None       # first <description> element, once started
+    descriptionDone = False
+    scenarioDone = False
+    inScenario = False          # inside the first <scenario> element
+    depth = 0
+
+    with open(xmlFilePath, "rb") as f:
+        for event, elt in ElementTree.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2 and elt.tag == "scenario" and not scenarioDone:
+                    inScenario = True
+                elif (depth >= 2 and elt.tag == "description" and
+                      descriptionElt is None):
+                    descriptionElt = elt
+                continue
+
+            # event == "end"
+            if elt is descriptionElt:
+                description = elt.text
+                descriptionDone = True
+
+            if depth == 3 and inScenario and elt.tag == "entry":
+                typeElt = elt.find("type")
+                if typeElt is not None and typeElt.text == "carrier":
+                    carriers.append(_carrierData(elt))
+            elif depth == 2 and inScenario:
+                inScenario = False
+                scenarioDone = True
+
+            if depth <= 3:
+                elt.clear()     # free memory as we go
+            depth -= 1
+
+            if scenarioDone and descriptionDone:
+                break           # the rest of the file is of no use
+
+    return {"carriers": carriers, "description": description}
+
+
+def _carrierData(entryElt):
+    nameElt = entryElt.find("name")
+    data = [nameElt.text if nameElt is not None else "unnamed"]
+
+    for child in entryElt.iterfind("parking-pos"):
+        parkingNameElt = child.find("name")
+        if parkingNameElt is not None:
+            data.append(parkingNameElt.text)
+
+    return data
+
+
+class ScenarioIndex:
+    """Persistent index of the AI scenario files."""
+
+    formatVersion = 1
+
+    def __init__(self, path=constants.SCENARIO_INDEX):
+        self.path = path
+        self.files = None       # loaded on first use
+        self.modified = False
+
+    def _load(self):
+        self.files = {}
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.info("Ignoring the scenario index '{}': {}".format(
+                self.path, e))
+            return
+
+        if (isinstance(data, dict) and
+            data.get("formatVersion") == self.formatVersion):
+            self.files = data["files"]
+
+    def _save(self):
+        tmpPath = self.path + ".tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump({"formatVersion": self.formatVersion,
+                           "files": self.files}, f)
+            os.replace(tmpPath, self.path)
+        except OSError as e:
+            # The index is only an optimization.
+            logger.warning(_("Unable to write the scenario index "
+                             "'{path}': {errmsg}").format(path=self.path,
+                                                          errmsg=e))
+        self.modified = False
+
+    def _info(self, xmlFilePath):
+        if self.files is None:
+            self._load()
+
+        stamp = _fileStamp(xmlFilePath)
+        cached = self.files.get(xmlFilePath)
+        if (stamp is not None and cached is not None and
+            cached["stamp"] == stamp):
+            return cached
+
+        logger.info("Reading scenario data from '{}'".format(xmlFilePath))
+        from xml.etree import ElementTree
+        try:
+            info = parseScenarioFile(xmlFilePath)
+        except (OSError, ElementTree.ParseError):
+            # Don't keep stale data for a file that can't be parsed anymore
+            if self.files.pop(xmlFilePath, None) is not None:
+                self.modified = True
+            raise
+
+        if stamp is not None and time.time() - stamp[0]*1e-9 < RACY_INTERVAL:
+            stamp = None        # force a new parsing next time
+
+        info["stamp"] = stamp
+        self.files[xmlFilePath] = info
+        self.modified = True
+
+        return info
+
+    def info(self, xmlFilePath):
+        """Return the data extracted from scenario file 'xmlFilePath'.
+
+        The return value is a dictionary as returned by
+        parseScenarioFile(), with an additional "stamp" key. It must
+        not be modified. The file is only parsed if it has changed since
+        it was indexed; exceptions are the same as for
+        parseScenarioFile().
+
+        """
+        try:
+            return self._info(xmlFilePath)
+        finally:
+            if self.modified:
+                self._save()
+
+    def description(self, xmlFilePath):
+        """Return the description of a scenario file (None if there is none).
+
+        Exceptions are the same as for parseScenarioFile().
+
+        """
+        return self.info(xmlFilePath)["description"]
+
+    def scan(self, aiDir):
+        """Index the scenario files found in directory 'aiDir'.
+
+        Return a list of (scenarioName, info) tuples, in os.listdir()
+        order, where 'info' is as returned by info(). Entries for files
+        that are not in 'aiDir' are forgotten, and the index file is
+        updated if needed.
+
+        """
+        if self.files is None:
+            self._load()
+        res = []
+        visited = set()
+
+        try:
+            if os.path.isdir(aiDir):
+                for f in os.listdir(aiDir):
+                    path = os.path.join(aiDir, f)
+
+                    if os.path.isfile(path) and f.lower().endswith('.xml'):
+                        visited.add(path)
+                        res.append((f[:-4], self._info(path)))
+
+            for path in set(self.files) - visited:
+                del self.files[path]
+                self.modified = True
+        finally:
+            if self.modified:
+                self._save()
+
+        return res
@@ -0,0 +1,239 @@
+# fswatcher.py --- Watch aircraft, scenery, apt.dat and AI scenario directories
+#                  for changes
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Watch aircraft, scenery, apt.dat and AI scenario directories for changes.
+
+A FilesystemWatcher instance uses inotify to watch directories (each
+watch belongs to a WatchCategory). A background thread reads the
+inotify events and converts them to ChangeEvent instances, which are
+put in a queue. Since Tk must only be used from the main thread, the
+watcher doesn't do anything else: after each batch of events, it calls
+the 'notifyFunc' function given to the constructor, whose job is to
+wake up the main thread (e.g., with Tk.event_generate()). The main
+thread then gets the events with pendingEvents() and applies them (cf.
+Config.applyFilesystemChanges()).
+
+This module requires the inotify API, which is only available on
+Linux. Use HAS_INOTIFY to know whether it can be used.
+
+"""
+
+import os
+import enum
+import errno
+import queue
+import select
+import threading
+import collections
+
+from .logging import logger
+# These imports require the translation system [_() function] to be in
+# place.
+from . import inotify
+from .inotify import HAS_INOTIFY
+
+
+class WatchCategory(enum.Enum):
+    """Kinds of watched directories."""
+    aircraftDir = 1             # element of Config.aircraft_dirs
+    aircraftSubdir = 2          # subdirectory of an aircraftDir
+    terrainDir = 3              # <scenery path>/Terrain
+    terrainSubdir = 4           # <scenery path>/Terrain/<10x10 degrees>
+    aptDatDir = 5               # directory containing apt.dat files
+    scenarioDir = 6             # $FG_ROOT/AI
+
+
+class EventKind(enum.Enum):
+    created = 1                 # includes files moved into the directory
+    deleted = 2                 # includes files moved out of the directory
+    modified = 3                # file closed after having been written to
+    # The kernel queue overflowed, events have been lost
+    overflow = 4
+
+
+class ChangedData(enum.Enum):
+    """Data updated by Config.applyFilesystemChanges()."""
+    aircraft = 1                # Config.aircraftDict, Config.aircraftList
+    installedAirports = 2       # INSTALLED_APT file
+    aptDatFiles = 3             # apt.dat files (apt digest possibly stale)
+    scenarios = 4               # Config.scenario_list, Config.carrier_list
+
+
+# 'watchedPath' is the path that was passed to FilesystemWatcher.watch(),
+# 'path' is the path of the file concerned by the event (equal to
+# 'watchedPath' if the watched directory itself has been deleted or moved).
+ChangeEvent = collections.namedtuple(
+    "ChangeEvent", ["category", "kind", "watchedPath", "path", "isDir"])
+
+
+_structureMask = (inotify.IN_CREATE | inotify.IN_DELETE |
+                  inotify.IN_MOVED_FROM | inotify.IN_MOVED_TO |
+                  inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF |
+                  inotify.IN_ONLYDIR)
+# Categories for which we are also interested in file modifications
+_contentsMask = _structureMask | inotify.IN_CLOSE_WRITE
+
+_watchMasks = {
+    WatchCategory.aircraftDir: _structureMask,
+    WatchCategory.aircraftSubdir: _structureMask,
+    WatchCategory.terrainDir: _structureMask,
+    WatchCategory.terrainSubdir: _structureMask,
+    WatchCategory.aptDatDir: _contentsMask,
+    WatchCategory.scenarioDir: _contentsMask}
+
+
+class FilesystemWatcher:
+    """Watch directories with inotify from a background thread."""
+
+    def __init__(self, notifyFunc=None):
+        self.inotify = inotify.Inotify()
+        self.notifyFunc = notifyFunc
+        self.queue = queue.Queue()
+        # Watch descriptor -> (category, path) and path -> watch descriptor
+        self._watches = {}
+        self._wds = {}
+        # Protects the two previous dictionaries, which are used by the
+        # reader thread.
+        self._lock = threading.Lock()
+        self._watchLimitReached = False
+        # Writing to this pipe tells the reader thread to exit
+        self._stopReadFd, self._stopWriteFd = os.pipe()
+        self._thread = threading.Thread(name="FS_watcher",
+                                        target=self._threadFunc, daemon=True)
+        self._thread.start()
+
+    def watch(self, category, path):
+        """Start watching directory 'path'.
+
+        Return True if successful, False otherwise (e.g., if 'path'
+        doesn't exist or the limit on the number of inotify watches has
+        been reached).
+
+        """
+        try:
+            wd = self.inotify.addWatch(path, _watchMasks[category])
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not self._watchLimitReached:
+                self._watchLimitReached = True
+                logger.warning(_(
+                    "The limit on the number of inotify watches has been "
+                    "reached; some directories won't be watched for "
+                    "changes. This limit can be increased with the "
+                    "fs.inotify.max_user_watches sysctl."))
+            return False
+
+        with self._lock:
+            # The same directory may be reachable via several paths; only
+            # the first one is used.
+            if wd not in self._watches:
+                self._watches[wd] = (category, path)
+            self._wds[path] = wd
+
+        return True
+
+    def unwatch(self, path):
+        """Stop watching 'path' (nothing is done if it isn't watched)."""
+        with self._lock:
+            wd = self._wds.pop(path, None)
+            if wd is None or self._watches.get(wd, (None, None))[1] != path:
+                return
+            del self._watches[wd]
+
+        try:
+            self.inotify.removeWatch(wd)
+        except OSError:
+            pass
+
+    def unwatchAll(self):
+        """Stop watching all directories and discard pending events."""
+        with self._lock:
+            wds = list(self._watches)
+            self._watches.clear()
+            self._wds.clear()
+
+        for wd in wds:
+            try:
+                self.inotify.removeWatch(wd)
+            except OSError:
+                pass
+
+        self.pendingEvents()
+
+    def pendingEvents(self):
+        """Return the list of queued ChangeEvent instances."""
+        res = []
+        while True:
+            try:
+                res.append(self.queue.get_nowait())
+            except queue.Empty:
+                return res
+
+    def close(self):
+        """Stop the reader thread and release all resources."""
+        os.write(self._stopWriteFd, b"x")
+        self._thread.join()
+        for fd in (self._stopReadFd, self._stopWriteFd):
+            os.close(fd)
+        self.inotify.close()
+
+    def _threadFunc(self):
+        fds = [self.inotify.fileno(), self._stopReadFd]
+
+        while True:
+            readable = select.select(fds, [], [])[0]
+            if self._stopReadFd in readable:
+                return
+
+            events = self._convertEvents(self.inotify.readEvents())
+            for event in events:
+                self.queue.put(event)
+
+            if events and self.notifyFunc is not None:
+                self.notifyFunc()
+
+    def _convertEvents(self, rawEvents):
+        res = []
+
+        for wd, mask, cookie, name in rawEvents:
+            if mask & inotify.IN_Q_OVERFLOW:
+                res.append(ChangeEvent(None, EventKind.overflow, None, None,
+                                       False))
+                continue
+
+            with self._lock:
+                try:
+                    category, watchedPath = self._watches[wd]
+                except KeyError:
+                    continue    # the watch has just been removed
+
+                if mask & inotify.IN_IGNORED:
+                    # The kernel removed the watch (directory deleted...)
+                    del self._watches[wd]
+                    if self._wds.get(watchedPath) == wd:
+                        del self._wds[watchedPath]
+                    continue
+
+            if mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                kind = EventKind.created
+            elif mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM |
+                         inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                kind = EventKind.deleted
+            elif mask & inotify.IN_CLOSE_WRITE:
+                kind = EventKind.modified
+            else:
+                continue
+
+            path = (watchedPath if name is None
+                    else os.path.join(watchedPath, name))
+            res.append(ChangeEvent(category, kind, watchedPath, path,
+                                   bool(mask & inotify.IN_ISDIR)))
+
+        return res
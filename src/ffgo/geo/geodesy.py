@@ -19,12 +19,12 @@ from math import degrees, radians, cos, sin, tan, atan, atan2, hypot, sqrt, \
 from ..constants import PROGNAME
 from ..logging import logger
 from ..exceptions import FFGoException
+from .. import misc
 
-try:
-    from geographiclib.geodesic import Geodesic
-    HAS_GEOGRAPHICLIB = True
-except ImportError:
-    HAS_GEOGRAPHICLIB = False
+# GeographicLib is only imported when Karney's algorithm is actually used,
+# and NumPy only when the vectorized functions are.
+HAS_GEOGRAPHICLIB = misc.moduleAvailable("geographiclib")
+HAS_NUMPY = misc.moduleAvailable("numpy")
 
 
 class error(FFGoException):
@@ -186,6 +186,35 @@ class NVector(collections.namedtuple('NVector', 'x y z')):
         return atan2(self.crossProd(other).norm(), self.dotProd(other))
 
 
+# Vectorized counterparts of NVector.fromLatLon() and NVector.latLon().
+# These functions require NumPy and operate on arrays of coordinates in
+# degrees, resp. on arrays of n-vector components.
+def nvectorArrays(lat, lon):
+    """n-vectors for the points with given coordinates.
+
+    Return a tuple (x, y, z) of NumPy arrays.
+
+    """
+    import numpy
+    latRad = numpy.radians(lat)
+    lonRad = numpy.radians(lon)
+    cosLat = numpy.cos(latRad)
+
+    return (cosLat*numpy.cos(lonRad),
+            cosLat*numpy.sin(lonRad),
+            numpy.sin(latRad))
+
+def latLonArrays(x, y, z):
+    """Latitudes and longitudes in degrees of the points given by (x, y, z).
+
+    Return a tuple (lat, lon) of NumPy arrays.
+
+    """
+    import numpy
+    return (numpy.degrees(numpy.arctan2(z, numpy.hypot(x, y))),
+            numpy.degrees(numpy.arctan2(y, x)))
+
+
 class EarthModel:
     """Constants from the WGS 84 model of the Earth."""
 
@@ -335,6 +364,109 @@ class GeodCalc:
                 "azi1": normAzimuth(azi1),
                 "azi2": normAzimuth(azi2)}
 
+    def vincentyInverseDistances(self, lat1, lon1, lat2, lon2,
+                                 precision=1e-12):
+        """Vectorized version of vincentyInverse(), for distances only.
+
+        The arguments must be one-dimensional NumPy arrays of the same
+        length, giving the coordinates in degrees of the start and end
+        points of each path. Return a tuple (s12, ok) where:
+          - 's12' is an array containing the length in meters of each
+            path;
+          - 'ok' is a boolean array telling, for each path, whether the
+            algorithm worked. The elements of 's12' for which this is
+            not the case are NaN; they correspond to the cases where
+            vincentyInverse() would raise ZeroDivisionError or
+            VincentyInverseError. Use vincentyInverseWithFallback() for
+            these paths.
+
+        The calculation follows vincentyInverse() step by step. Each
+        path is iterated on until it converges, independently of the
+        others. This method requires NumPy.
+
+        """
+        import numpy
+        f = self.earthModel.f
+        b = self.earthModel.b
+        a2 = self.earthModel.a2
+        b2 = self.earthModel.b2
+
+        U1 = numpy.arctan((1-f)*numpy.tan(numpy.radians(lat1)))
+        U2 = numpy.arctan((1-f)*numpy.tan(numpy.radians(lat2)))
+        cosU1, sinU1 = numpy.cos(U1), numpy.sin(U1)
+        cosU2, sinU2 = numpy.cos(U2), numpy.sin(U2)
+        cosU1cosU2 = cosU1*cosU2
+        cosU1sinU2 = cosU1*sinU2
+        sinU1cosU2 = sinU1*cosU2
+        sinU1sinU2 = sinU1*sinU2
+        L = numpy.radians(lon2-lon1)
+        lb = L.copy()
+
+        n = len(L)
+        # Values from the last iteration for each path
+        sinSigma, cosSigma, sigma, sqCosAlpha, cos2sigmaM = (
+            numpy.full(n, numpy.nan) for i in range(5))
+        ok = numpy.zeros(n, dtype=bool)
+        active = numpy.arange(n)  # indices of the paths still iterated on
+
+        maxIterations = 500
+        # Divisions by zero and their consequences are detected below.
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            for count in range(maxIterations):
+                if not len(active):
+                    break
+
+                prevLb = lb[active]
+                sinLb, cosLb = numpy.sin(prevLb), numpy.cos(prevLb)
+                sinU1sinU2A = sinU1sinU2[active]
+                cosU1cosU2A = cosU1cosU2[active]
+
+                sinSigmaA = numpy.hypot(
+                    cosU2[active]*sinLb,
+                    cosU1sinU2[active] - sinU1cosU2[active]*cosLb)
+                cosSigmaA = sinU1sinU2A + cosU1cosU2A*cosLb
+                sigmaA = numpy.arctan2(sinSigmaA, cosSigmaA)
+                sinAlpha = cosU1cosU2A*sinLb / sinSigmaA
+                sqCosAlphaA = 1 - sinAlpha**2
+                cos2sigmaMA = cosSigmaA - 2*sinU1sinU2A/sqCosAlphaA
+                C = f/16 * sqCosAlphaA*(4 + f*(4 - 3*sqCosAlphaA))
+                newLb = L[active] + (1-C)*f*sinAlpha*(
+                    sigmaA + C*sinSigmaA*(cos2sigmaMA +
+                                          C*cosSigmaA*(-1+2*cos2sigmaMA**2)))
+
+                lb[active] = newLb
+                sinSigma[active] = sinSigmaA
+                cosSigma[active] = cosSigmaA
+                sigma[active] = sigmaA
+                sqCosAlpha[active] = sqCosAlphaA
+                cos2sigmaM[active] = cos2sigmaMA
+
+                # Paths for which vincentyInverse() would raise
+                # ZeroDivisionError, or that can't converge anymore (NaN)
+                failed = ((sinSigmaA == 0.0) | (sqCosAlphaA == 0.0) |
+                          ~numpy.isfinite(newLb))
+                converged = ~failed & (numpy.abs(newLb - prevLb) < precision)
+                # Same limit as in vincentyInverse()
+                if count + 1 < maxIterations:
+                    ok[active[converged]] = True
+
+                active = active[~(failed | converged)]
+
+        s12 = numpy.full(n, numpy.nan)
+        sinSigma, cosSigma, sigma, sqCosAlpha, cos2sigmaM = (
+            a[ok] for a in (sinSigma, cosSigma, sigma, sqCosAlpha, cos2sigmaM))
+
+        u2 = sqCosAlpha*(a2 - b2)/b2
+        A = 1 + u2/16384 * (4096 + u2*(-768 + u2*(320 - 175*u2)))
+        B = u2/1024 * (256 + u2*(-128 + u2*(74 - 47*u2)))
+        deltaSigma = B*sinSigma*(
+            cos2sigmaM + 0.25*B*(
+                cosSigma*(-1+2*cos2sigmaM**2) -
+                B/6*cos2sigmaM*(-3+4*sinSigma**2)*(-3+4*cos2sigmaM**2)))
+        s12[ok] = b*A*(sigma - deltaSigma)
+
+        return (s12, ok)
+
     # If this method is renamed, 'fName' below must be changed too.
     def vincentyInverseWithFallback(self, lat1, lon1, lat2, lon2,
                                     precision=1e-12):
@@ -482,6 +614,7 @@ class GeodCalc:
 
     def karneyInverse(self, lat1, lon1, lat2, lon2):
         """Use Karney's algorithm for the geodetic inverse problem."""
+        from geographiclib.geodesic import Geodesic
         return Geodesic.WGS84.Inverse(lat1, lon1, lat2, lon2)
 
     @classmethod
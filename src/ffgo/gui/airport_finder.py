@@ -138,7 +138,7 @@ class AirportFinder:
             refAirportFrame, columns=["icao", "name", "landRunways",
                                       "waterRunways", "helipads",
                                       "minRwyLength", "maxRwyLength"],
-            show="headings", selectmode="browse", height=6)
+            show="headings", selectmode="browse", height=6, FFGoVirtual=True)
 
         self.refAirportSearchTree.grid(row=0, column=1, sticky="nsew")
         refAirportFrame.grid_columnconfigure(1, weight=100)
@@ -712,7 +712,7 @@ class AirportFinder:
 
         self.resultsTree = widgets.MyTreeview(
             resultsFrame, columns=resCols, show="headings",
-            selectmode="browse", height=10)
+            selectmode="browse", height=10, FFGoVirtual=True)
 
         self.resultsTree.grid(row=0, column=1, sticky="nsew")
         resultsFrame.grid_columnconfigure(1, weight=300)
@@ -1072,8 +1072,9 @@ class TabularDataManager:
                            order to be compatible with 'identVar'.
         initSortBy      -- symbolic name of the column used to initially
                            sort the Treeview widget
-        treeWidget      -- Ttk Treeview widget used as a multicolumn
-                           list (in other words, a table)
+        treeWidget      -- widgets.MyTreeview instance in virtual mode,
+                           used as a multicolumn list (in other words,
+                           a table)
         treeUpdatedCallback
                         -- function called after the Treeview widget has
                            been updated (after every update of the
@@ -1146,14 +1147,16 @@ class TabularDataManager:
             self._updateTreeWidget()
 
     def _updateTreeWidget(self):
-        """Update the contents of the Treeview widget."""
+        """Update the contents of the Treeview widget.
+
+        Only the visible rows (and a few more) are inserted into the
+        widget, which is in virtual mode.
+
+        """
         curIdent = self.identVar.get()
         identColName = self.identColName
         tree = self.treeWidget
-        # Delete all children of the root element. Even when the elements just
-        # need to be put in a different order, it is much faster this way than
-        # using tree.move() for each element.
-        tree.delete(*tree.get_children())
+        indices, treeData = self.indices, self.treeData # for the closures
 
         hasSpecialFormatter = any(
             ( col.formatFunc is not None for col in self.columns ))
@@ -1167,15 +1170,19 @@ class TabularDataManager:
                 f = columns[dataIndex].formatFunc
                 formatter.append(identity if f is None else f)
 
-            for idx in self.indices:
-                rawValues = self.treeData[idx]
-                values = [ formatter[dataIndex](rawValue)
-                           for dataIndex, rawValue in enumerate(rawValues) ]
-                tree.insert("", "end", values=values)
+            rowValuesFunc = lambda row: [
+                formatter[dataIndex](rawValue) for dataIndex, rawValue in
+                enumerate(treeData[indices[row]]) ]
         else:
             # Optimize the case where no column has a formatter function
-            for idx in self.indices:
-                tree.insert("", "end", values=self.treeData[idx])
+            rowValuesFunc = lambda row: treeData[indices[row]]
+
+        identIndex = self.columnsMetadata[identColName].dataIndex
+        # The identifiers are unique.
+        rowsByIdent = { treeData[i][identIndex]: row
+                        for row, i in enumerate(indices) }
+        tree.FFGoSetRows(len(indices), rowValuesFunc,
+                         rowLookupFuncs={identColName: rowsByIdent.get})
 
         # Select a suitable item in the repopulated tree, if it is non-empty.
         if self.indices:
@@ -1221,9 +1228,9 @@ class TabularDataManager:
         self.updateContents(dataChanged=False) # repopulate the Treeview
 
     def onTreeviewSelect(self, event=None):
-        tree = self.treeWidget
-
-        currentSel = tree.selection()
-        assert currentSel, "Unexpected empty selection in TreeviewSelect event"
+        selectedRow = self.treeWidget.FFGoSelectedRow()
+        assert selectedRow is not None, \
+            "Unexpected empty selection in TreeviewSelect event"
 
-        self.identVar.set(tree.set(currentSel[0], self.identColName))
+        dataIndex = self.columnsMetadata[self.identColName].dataIndex
+        self.identVar.set(self.treeData[self.indices[selectedRow]][dataIndex])
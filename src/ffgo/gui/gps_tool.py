@@ -458,7 +458,7 @@ class GPSTool:
         # The TreeviewSelect event binding is done in the AirportChooser class
         airportSearchTree = widgets.MyTreeview(
             labelFrame, columns=["icao", "name"],
-            show="headings", selectmode="browse", height=10)
+            show="headings", selectmode="browse", height=10, FFGoVirtual=True)
 
         airportSearchTree.grid(row=0, column=1, sticky="nsew")
         labelFrame.grid_columnconfigure(1, weight=500)
@@ -15,12 +15,16 @@ from ..constants import PROGNAME
 class InfoWindow(Toplevel):
 
     def __init__(self, master=None, text=None, textvariable=None, title=None,
-                 font=tkinter.font.nametofont("TkHeadingFont"),
+                 font=None,
                  withProgress=False, progressLabelArgs=None,
                  progressLabelKwargs=None, progressWidgetArgs=None,
                  progressWidgetKwargs=None,
                  **kw):
         Toplevel.__init__(self, master, **kw)
+        if font is None:
+            # Not done in the default argument value, because this
+            # requires the Tk object to exist when the module is imported.
+            font = tkinter.font.nametofont("TkHeadingFont")
         self._window(master, title, text, textvariable, font,
                      withProgress, progressLabelArgs, progressLabelKwargs,
                      progressWidgetArgs, progressWidgetKwargs)
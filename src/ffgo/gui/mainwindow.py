@@ -23,11 +23,9 @@ from tkinter import ttk
 from tkinter import constants as tkc
 import tkinter.filedialog as fd
 from tkinter.scrolledtext import ScrolledText
-from xml.etree import ElementTree
 from tkinter.messagebox import askyesno, showerror
 import shlex
 import textwrap
-import condconfigparser
 
 from ..logging import logger
 from .. import misc
@@ -48,17 +46,12 @@ from .. import fgdata
 from ..fgdata.parking import ParkingSource
 from .pressure_converter import PressureConverterDialog
 
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
-
-try:
-    import geographiclib
-    HAS_GEOGRAPHICLIB = True
-except ImportError:
-    HAS_GEOGRAPHICLIB = False
+# Pillow and GeographicLib are optional and only imported when needed (when
+# displaying an aircraft thumbnail, resp. for the few calculations that
+# require GeographicLib).
+HAS_PIL = misc.moduleAvailable("PIL.ImageTk")
+HAS_GEOGRAPHICLIB = misc.moduleAvailable("geographiclib")
+HAS_NUMPY = misc.moduleAvailable("numpy")
 
 
 def setupTranslationHelper(config):
@@ -303,7 +296,7 @@ class App:
             self.frame12, columns=["match key", "name", "directory",
                                    "use count"],
             displaycolumns=aircraftListDisplayColumns, show="headings",
-            selectmode="browse", height=14,
+            selectmode="browse", height=14, FFGoVirtual=True,
             yscrollcommand=onAircraftListScrolled)
         self.aircraftList.pack(side='left', fill='both', expand=True)
 
@@ -654,7 +647,7 @@ class App:
         # in the AirportChooser class.
         self.airportList = widgets.MyTreeview(
             self.frame42, columns=airportListDisplayColumns, # show all columns
-            show="headings", selectmode="browse", height=14,
+            show="headings", selectmode="browse", height=14, FFGoVirtual=True,
             yscrollcommand=onAirportListScrolled)
         self.airportList.pack(side='left', fill='both', expand=True)
 
@@ -790,6 +783,12 @@ class App:
         # appropriately (actually, self.FGCommand.builder.*).
         self.reset(readCfgFile=rereadCfgFile)
 
+        # Take into account new or removed aircraft, scenery tiles,
+        # etc. as soon as they appear on disk (Linux only).
+        self.master.bind("<<FFGoFilesystemChanged>>",
+                         self.onFilesystemChanged)
+        self.config.startFilesystemWatcher(self._notifyFilesystemChanged)
+
         self.registerTracedVariables()
         # Config.rwy and Config.park have not been updated since their
         # creation, unless the config file has been reread (except maybe in
@@ -811,15 +810,21 @@ class App:
             self.master.after_idle(self.quit)
 
     def surveyDependencies(self):
+        import condconfigparser
         textWidth = 78
 
         l = [_('Python {}').format(misc.pythonVersionString()),
              _('CondConfigParser {}').format(condconfigparser.__version__)]
 
         if HAS_GEOGRAPHICLIB:
+            import geographiclib
             l.append(_("GeographicLib's Python 3 implementation: version {}")
                      .format(geographiclib.__version__))
 
+        if HAS_NUMPY:
+            import numpy
+            l.append(_("NumPy {}").format(numpy.__version__))
+
         if self.config.earthMagneticField is not None:
             l.append(self.config.earthMagneticField.getBackendDescription())
 
@@ -1048,6 +1053,7 @@ want to follow this new default and set “Airport database update” to
         self.aboutTitle.destroy()
         self.aboutLicense.destroy()
 
+    @logger.timingSpan("App.buildAircraftList")
     def buildAircraftList(self, clearSearch=False):
         matchKeyFunc = self.aircraftChooser.aircraftNameMatchKey
         aircraftTreeData = [ (matchKeyFunc(ac.name), ac.name, ac.dir,
@@ -1057,6 +1063,7 @@ want to follow this new default and set “Airport database update” to
         self.aircraftChooser.setTreeData(aircraftTreeData,
                                          clearSearch=clearSearch)
 
+    @logger.timingSpan("App.buildAirportList")
     def buildAirportList(self, clearSearch=False):
         if (self.config.auto_update_apt.get() or
             not os.path.isfile(constants.APT)):
@@ -1081,8 +1088,12 @@ want to follow this new default and set “Airport database update” to
         # instances (the set of airports may have just changed, hence the need
         # to save the stats before the in-memory airport list is updated, and
         # reload them afterwards).
-        self.config.airportStatsManager.load()
+        with logger.timingSpan("AirportStatsManager.load"):
+            self.config.airportStatsManager.load()
+
+        self._updateAirportListWidget(clearSearch=clearSearch)
 
+    def _updateAirportListWidget(self, clearSearch=False):
         airportListData = [ (airport.icao, airport.name,
                              airport.useCountForShow)
                             for airport in self.browsableAirports ]
@@ -1091,6 +1102,34 @@ want to follow this new default and set “Airport database update” to
         self.airportChooser.setTreeData(airportListData,
                                         clearSearch=clearSearch)
 
+    def _notifyFilesystemChanged(self):
+        # Called from the filesystem watcher thread. Cf.
+        # _monitorFgfsProcessThreadFunc() regarding the use of
+        # Tk.event_generate().
+        try:
+            self.master.event_generate("<<FFGoFilesystemChanged>>",
+                                       when="tail")
+        except TclError:
+            pass                # Tk is not here anymore
+
+    def onFilesystemChanged(self, event=None):
+        """Update the lists after changes in the watched directories."""
+        # This import requires the translation system [_() function] to be
+        # in place.
+        from ..fswatcher import ChangedData
+        changed = self.config.applyFilesystemChanges()
+
+        if ChangedData.aircraft in changed:
+            self.buildAircraftList()
+
+        if (ChangedData.aptDatFiles in changed and
+            self.config.auto_update_apt.get()):
+            # Rebuilds the apt digest file
+            self.buildAirportList()
+        elif ChangedData.installedAirports in changed:
+            self.applyInstalledAirportsChanges(
+                changed[ChangedData.installedAirports])
+
     def commentText(self):
         """Highlight comments in text window."""
         t = self.option_window
@@ -1165,6 +1204,16 @@ want to follow this new default and set “Airport database update” to
         can use as an image.
 
         """
+        global HAS_PIL
+
+        if HAS_PIL and aircraft is not None:
+            try:
+                from PIL import Image, ImageTk
+            except ImportError as e:
+                # Pillow installed without Tk support, for instance
+                logger.warning("Unable to import Pillow: {}".format(e))
+                HAS_PIL = False
+
         if HAS_PIL and aircraft is not None:
             path = os.path.join(aircraft.dir, 'thumbnail.jpg')
             try:
@@ -1196,6 +1245,8 @@ want to follow this new default and set “Airport database update” to
         resulting image are filled with transparent pixels.
 
         """
+        from PIL import Image
+
         # Create a new, fully transparent image with the standard size
         outImg = Image.new("RGBA", STD_AIRCRAFT_THUMBNAIL_SIZE,
                            (0, 0, 0, 0))
@@ -1371,11 +1422,9 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
         False.
 
         """
-        for cachedIcao, cachedAirport in self.config.aptDatCache:
-            if cachedIcao == icao:
-                found = True
-                airport = cachedAirport
-                break
+        airport = self.config.aptDatCache.get(icao)
+        if airport is not None:
+            found = True
         else:
             # index[0] is the file index in Config.aptDatFilesInfoFromDigest,
             # index[1] is the byte offset in that file and
@@ -1393,7 +1442,9 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
             self.config.aptDatSetManager.readAirportDataUsingIndex(icao, index)
 
             if found:
-                self.config.aptDatCache.append((icao, airport))
+                self.config.aptDatCache.put(icao, airport)
+                logger.debug("Airport data cache: {}".format(
+                    self.config.aptDatCache.statsString()))
             else:
                 self._readAirportDataWrongIndexErrMsg(
                     "airport not found at index", icao, aptDatPath,
@@ -1566,21 +1617,17 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
         text = ''
         file_name = scenario + '.xml'
         path = os.path.join(self.config.ai_path, file_name)
-        root = self._get_root(path)
         # There is no consistency along scenario files where
         # the <description> tag can be found in the root tree,
-        # therefore we are making a list of all occurrences
-        # of the tag and return the first element (if any).
-        descriptions = root.findall('.//description')
-        if descriptions:
-            text = self._rstrip_text_block(descriptions[0].text)
+        # therefore the scenario index returns the first occurrence
+        # of the tag (if any). The file is only parsed if it has
+        # changed since it was indexed.
+        description = self.config.scenarioIndex.description(path)
+        if description:
+            text = self._rstrip_text_block(description)
 
         return text
 
-    def _get_root(self, xmlFilePath):
-        tree = ElementTree.parse(xmlFilePath)
-        return tree.getroot()
-
     def _rstrip_text_block(self, text):
         rstripped_text = '\n'.join(line.lstrip() for line in text.splitlines())
         return rstripped_text
@@ -1633,12 +1680,18 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
         self.config.enableMSAA.trace('w', self.onMSAAToggled)
         self.config.enableRembrandt.trace('w', self.onRembrandtToggled)
 
-    def reset(self, event=None, path=None, readCfgFile=True):
-        """Reset data"""
+    def reset(self, event=None, path=None, readCfgFile=True,
+              forceUpdate=True):
+        """Reset data
+
+        If 'forceUpdate' is False, only recompute the derived data whose
+        settings have changed [cf. Config.update()].
+
+        """
         # Don't call config.update() at application initialization
         # as config object is updated at its creation anyway.
         if readCfgFile:
-            self.config.update(path)
+            self.config.update(path, force=forceUpdate)
 
         setupTranslationHelper(self.config) # the language may have changed
 
@@ -1695,13 +1748,17 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
                 self.config.scenario.set(' '.join(c))
 
     def resetLists(self):
-        # Clear the aircraft search entry and rebuild the aircraft list at the
-        # same time. The aircraft thumbnail is updated via an observer when
-        # Config.aircraftId is set by Config.update().
-        self.buildAircraftList(clearSearch=True)
-        # Clear the airport search entry and rebuild the airport list at the
-        # same time.
-        self.buildAirportList(clearSearch=True)
+        # Only rebuild the lists whose data may have changed (cf.
+        # Config._derivedDataInputs()).
+        if "aircraftList" in self.config.updatedData:
+            # Clear the aircraft search entry and rebuild the aircraft list
+            # at the same time. The aircraft thumbnail is updated via an
+            # observer when Config.aircraftId is set by Config.update().
+            self.buildAircraftList(clearSearch=True)
+        if "airportList" in self.config.updatedData:
+            # Clear the airport search entry and rebuild the airport list at
+            # the same time.
+            self.buildAirportList(clearSearch=True)
 
     def resetText(self):
         t = self.option_window
@@ -1963,6 +2020,7 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
         # Save the in-memory statistics to persistent storage
         self.config.airportStatsManager.save()
         self.config.aircraftStatsManager.save()
+        self.config.stopFilesystemWatcher()
 
         self.master.quit()
 
@@ -2036,7 +2094,9 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
         # Wait for window to close and reset data if Save&Quit button was used.
         self.master.wait_window(self.configWindow.top)
         if self.configWindow.reset_flag:
-            self.reset()
+            # Settings that haven't changed don't require recomputing
+            # anything.
+            self.reset(forceUpdate=False)
 
     def showHelpWindow(self):
         """Display help window."""
@@ -2326,8 +2386,35 @@ useless!). Thank you.""").format(prg=PROGNAME, startOfMsg=startOfMsg,
     def updateInstalledAptList(self):
         """Rebuild installed airports list."""
         if self.config.filteredAptList.get():
-            self.config.makeInstalledAptList()
-            self.filterAirports()
+            changes = self.config.makeInstalledAptList()
+            self.applyInstalledAirportsChanges(changes)
+
+    def applyInstalledAirportsChanges(self, changes):
+        """Update the airport list after INSTALLED_APT has been updated.
+
+        'changes' is a tuple (added, removed) of sets of airport
+        identifiers, or None if the whole list of installed airports
+        may have changed (cf. Config._updateInstalledAptList()). In the
+        former case, only the corresponding rows of the airport chooser
+        are updated.
+
+        """
+        if not self.config.filteredAptList.get():
+            return
+
+        # The AirportStub instances are unchanged, only the filtering is
+        # different.
+        self.browsableAirports = self.config.browsableAirportList()
+
+        if changes is None:
+            self._updateAirportListWidget()
+        else:
+            added, removed = changes
+            airports = self.config.airports
+            self.airportChooser.applyTreeDataChanges(
+                lambda row: row[0] in removed,
+                [ (icao, airports[icao].name, airports[icao].useCountForShow)
+                  for icao in sorted(added) ])
 
     def onOptionWindowModified(self, event=None):
         self.commentText()
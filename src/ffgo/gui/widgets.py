@@ -10,6 +10,8 @@
 
 import abc
 import enum
+import bisect
+import itertools
 import tkinter as tk
 from tkinter import ttk
 
@@ -32,8 +34,30 @@ class NoSelectedItem(error):
 # *****************************************************************************
 
 class MyTreeview(ttk.Treeview):
-    """Like Ttk's Treeview, but with better handling of keyboard events."""
-    def __init__(self, *args, FFGoWrapItems=False, **kwargs):
+    """Like Ttk's Treeview, but with better handling of keyboard events.
+
+    Virtual mode
+    ~~~~~~~~~~~~
+    Inserting an item into a Treeview requires one Tcl call, which is
+    slow for lists with tens of thousands of rows. In virtual mode, the
+    rows are given by FFGoSetRows() as a number of rows and a function
+    returning the values of a row given its index. Only the visible rows
+    plus a margin above and below them (the “window”) are inserted into
+    the widget, with item identifiers equal to str(rowIndex). When the
+    view gets close to an edge of the window, the window is moved. The
+    fractions passed to the 'yscrollcommand' callback and accepted by
+    yview() refer to the whole list of rows, so that a normal Scrollbar
+    can be used.
+
+    In this mode, the selection is a row index [FFGoSelectedRow()], and
+    the Tk selection only mirrors it when the row is in the window.
+    <<TreeviewSelect>> events caused by moves of the window don't reach
+    the bindings of the widget: these only see selection changes made
+    by the user or by the FFGoGoto*() methods.
+
+    """
+    def __init__(self, *args, FFGoWrapItems=False, FFGoVirtual=False,
+                 **kwargs):
         """Initialize a MyTreeview instance.
 
         Arguments are the same as for ttk.Treeview, except that:
@@ -41,14 +65,42 @@ class MyTreeview(ttk.Treeview):
           - 'FFGoWrapItems' specifies if the Up/Down arrow keys and
             PageUp/PageDown present a wrapping behavior when trying to
             go before the first, or after the last item of the tree.
-            It defaults to False, which means: no wrapping behavior.
+            It defaults to False, which means: no wrapping behavior;
+          - 'FFGoVirtual' specifies whether the widget is in virtual
+            mode (see the class docstring). In this mode, the
+            'yscrollcommand' option, if given, must be a Python
+            callable.
 
         """
-        ttk.Treeview.__init__(self, *args, **kwargs)
-
         assert "height" in kwargs, kwargs
         self._FFGoTreeHeight = kwargs["height"]
         self._FFGoWrapItems = FFGoWrapItems
+        self._FFGoVirtual = FFGoVirtual
+
+        if FFGoVirtual:
+            self._FFGoNbRows = 0
+            # Function returning the values of a row given its index
+            self._FFGoRowValues = None
+            # Column name -> function finding a row from its value in
+            # this column (cf. FFGoSetRows())
+            self._FFGoRowLookupFuncs = {}
+            # The materialized rows are those in
+            # range(self._FFGoWinStart, self._FFGoWinEnd).
+            self._FFGoWinStart = self._FFGoWinEnd = 0
+            # Index of the first visible row and number of visible rows
+            # (updated when Tk reports the scroll position)
+            self._FFGoTop = 0
+            self._FFGoVisibleRows = self._FFGoTreeHeight
+            self._FFGoSelectedRow = None
+            # True when the next <<TreeviewSelect>> event must reach the
+            # bindings of the widget (set by self._FFGoGotoRow())
+            self._FFGoSelectNotifyPending = False
+            # Tk reports scroll positions relative to the window.
+            self._FFGoYScrollCommand = kwargs.pop("yscrollcommand", None)
+            kwargs["yscrollcommand"] = self._FFGoOnTreeScrolled
+
+        ttk.Treeview.__init__(self, *args, **kwargs)
+
         # We need this flag for special handling of navigation keys:
         # because the subsequent processing may take some time and such
         # keys may cause repeated events by simply being held down, it
@@ -61,11 +113,60 @@ class MyTreeview(ttk.Treeview):
 
         self.bind('<KeyPress>', self._FFGoOnKeyPress)
 
+        if FFGoVirtual:
+            # This bind tag comes before the widget's own one, allowing
+            # self._FFGoOnTreeviewSelect() to filter <<TreeviewSelect>>
+            # events.
+            self._FFGoBindTag = "FFGoVirtualTreeview" + str(self)
+            self._FFGoSelectFuncId = self.bind_class(
+                self._FFGoBindTag, "<<TreeviewSelect>>",
+                self._FFGoOnTreeviewSelect)
+            self.bindtags((self._FFGoBindTag,) + self.bindtags())
+
+    def destroy(self):
+        if self._FFGoVirtual:
+            self.unbind_class(self._FFGoBindTag, "<<TreeviewSelect>>")
+            self.deletecommand(self._FFGoSelectFuncId)
+
+        ttk.Treeview.destroy(self)
+
+    def configure(self, cnf=None, **kw):
+        if self._FFGoVirtual:
+            if isinstance(cnf, dict):
+                kw = dict(cnf, **kw)
+                cnf = None
+
+            if "yscrollcommand" in kw:
+                self._FFGoYScrollCommand = kw.pop("yscrollcommand")
+                self._FFGoReportScroll()
+                if not kw:
+                    return
+
+        return ttk.Treeview.configure(self, cnf, **kw)
+
+    config = configure
+
     def _FFGoOnKeyPress(self, event):
         if event.keysym in ("Up", "Down", "Prior", "Next", "Home", "End"):
             self._FFGoHandleBrowsingKey(event.keysym)
             return "break"      # don't propagate the event to the parent
 
+    def _FFGoRowsAndSelection(self):
+        """Return a tuple (nbRows, selectedRow, treeItems).
+
+        'selectedRow' is None if no row is selected. 'treeItems' is
+        None in virtual mode, otherwise the tuple of all tree items.
+
+        """
+        if self._FFGoVirtual:
+            return (self._FFGoNbRows, self._FFGoSelectedRow, None)
+
+        treeItems = self.get_children()
+        currentSel = self.selection()
+        selectedRow = self.index(currentSel[0]) if currentSel else None
+
+        return (len(treeItems), selectedRow, treeItems)
+
     # Must be called with an up-to-date 'self' object
     def _FFGoHandleBrowsingKey(self, keysym):
         assert keysym in ("Down", "Up", "Next", "Prior", "Home", "End"), keysym
@@ -81,17 +182,14 @@ class MyTreeview(ttk.Treeview):
             sign = 1 if keysym in ("Down", "Next") else -1
             delta = sign*amplitude
 
-            treeItems = self.get_children()
-            if treeItems:
-                currentSel = self.selection()
-                if currentSel:
-                    currentIdx = self.index(currentSel[0])
+            nbRows, currentIdx, treeItems = self._FFGoRowsAndSelection()
+            if nbRows:
+                if currentIdx is not None:
                     if self._FFGoWrapItems:
-                        targetIdx = (currentIdx + delta) % len(treeItems)
+                        targetIdx = (currentIdx + delta) % nbRows
                     else:
                         if delta > 0:
-                            targetIdx = min(currentIdx + delta,
-                                            len(treeItems) - 1)
+                            targetIdx = min(currentIdx + delta, nbRows - 1)
                         else:
                             targetIdx = max(currentIdx + delta, 0)
                 else:               # no item is selected
@@ -104,27 +202,34 @@ class MyTreeview(ttk.Treeview):
     def _FFGoHandleBrowsingHomeEnd(self, keysym):
         assert keysym in ("Home", "End"), keysym
 
-        treeItems = self.get_children()
-        if treeItems:
-            targetIdx = len(treeItems) - 1 if keysym == "End" else 0
+        nbRows, currentIdx, treeItems = self._FFGoRowsAndSelection()
+        if nbRows:
+            targetIdx = nbRows - 1 if keysym == "End" else 0
             self.FFGoGotoItemWithIndex(targetIdx, treeItems=treeItems)
 
-    def FFGoGotoItem(self, item):
+    def _FFGoSetTkSelection(self, item):
         try:
             self.selection(selop="set", items=(item,)) # for Python <= 3.7
         except TypeError:
             self.selection_set((item,))                # for Python >= 3.8
-        self.see(item)
+
+    def FFGoGotoItem(self, item):
+        if self._FFGoVirtual:
+            self._FFGoGotoRow(int(item))
+        else:
+            self._FFGoSetTkSelection(item)
+            self.see(item)
 
     def FFGoGotoItemWithIndex(self, index, treeItems=None):
+        if self._FFGoVirtual:
+            self._FFGoGotoRow(index)
+            return
+
         if treeItems is None:   # small optimization in case we already have it
             treeItems = self.get_children()
 
         targetItem = treeItems[index]
-        try:
-            self.selection(selop="set", items=(targetItem,)) # for Python <= 3.7
-        except TypeError:
-            self.selection_set((targetItem,))                # for Python >= 3.8
+        self._FFGoSetTkSelection(targetItem)
         self.see(targetItem)
 
     def FFGoGotoItemWithValue(self, column, value):
@@ -136,6 +241,27 @@ class MyTreeview(ttk.Treeview):
         Raise NoSuchItem if no item with this value is found.
 
         """
+        if self._FFGoVirtual:
+            lookup = self._FFGoRowLookupFuncs.get(column)
+            if lookup is not None:
+                row = lookup(value)
+                if row is None:
+                    raise NoSuchItem()
+                self._FFGoGotoRow(row)
+                return
+
+            columnIndex = self.tk.splitlist(self.cget("columns")).index(column)
+            rowValues = self._FFGoRowValues
+
+            for row in range(self._FFGoNbRows):
+                if str(rowValues(row)[columnIndex]) == value:
+                    self._FFGoGotoRow(row)
+                    break
+            else:
+                raise NoSuchItem()
+
+            return
+
         for item in self.get_children():
             if self.set(item, column) == value:
                  self.FFGoGotoItem(item)
@@ -143,6 +269,242 @@ class MyTreeview(ttk.Treeview):
         else:
             raise NoSuchItem()
 
+    # Methods specific to virtual mode
+    def FFGoSetRows(self, nbRows, rowValuesFunc, selectedRow=None, top=0,
+                    rowLookupFuncs=None):
+        """Set the rows of the tree (virtual mode).
+
+        'rowValuesFunc' is called with a row index in range(nbRows) and
+        must return the values for this row (one per column, as for the
+        'values' option of Treeview items). It is only called for rows
+        that are inserted into the widget, and must keep working until
+        the next call to this method.
+
+        'rowLookupFuncs', if not None, maps column names to functions
+        used by FFGoGotoItemWithValue() instead of comparing the value
+        with every row: given a value (as a string), such a function
+        must return the index of the first row having this value in the
+        column, or None if there is no such row.
+
+        'selectedRow' is the index of the row to select, or None to
+        clear the selection. In both cases, the bindings of the widget
+        don't get any <<TreeviewSelect>> event for this change. 'top' is
+        the index of the row to show at the top of the tree, if
+        possible.
+
+        The cost of this method only depends on the tree height, not on
+        'nbRows'.
+
+        """
+        assert self._FFGoVirtual
+
+        if self._FFGoWinEnd > self._FFGoWinStart:
+            # The materialized rows are the only items of the tree.
+            self.delete(*self.get_children())
+
+        self._FFGoWinStart = self._FFGoWinEnd = 0
+        self._FFGoNbRows = nbRows
+        self._FFGoRowValues = rowValuesFunc
+        self._FFGoRowLookupFuncs = \
+            rowLookupFuncs if rowLookupFuncs is not None else {}
+        self._FFGoSelectedRow = selectedRow
+        self._FFGoSelectNotifyPending = False
+        self._FFGoScrollTo(top)
+
+    def FFGoUpdateRows(self, start, end):
+        """Refresh the values of the rows in range(start, end) (virtual mode).
+
+        This is for rows whose values, as returned by the function
+        passed to FFGoSetRows(), have changed. Only the rows that are in
+        the window cost a Tcl call.
+
+        """
+        rowValues = self._FFGoRowValues
+        for row in range(max(start, self._FFGoWinStart),
+                         min(end, self._FFGoWinEnd)):
+            self.item(str(row), values=rowValues(row))
+
+    def FFGoSelectedRow(self):
+        """Return the index of the selected row, or None (virtual mode)."""
+        return self._FFGoSelectedRow
+
+    def FFGoTopRow(self):
+        """Return the index of the first visible row (virtual mode)."""
+        return self._FFGoTop
+
+    def FFGoSeeRow(self, row):
+        """Scroll the tree as needed to make 'row' visible (virtual mode)."""
+        top = self._FFGoTop
+        if row < top:
+            top = row
+        elif row >= top + self._FFGoVisibleRows:
+            top = row - self._FFGoVisibleRows + 1
+
+        self._FFGoScrollTo(top)
+
+    def _FFGoGotoRow(self, row):
+        if not 0 <= row < self._FFGoNbRows:
+            raise IndexError("row index out of range: {!r}".format(row))
+
+        self._FFGoSelectedRow = row
+        self._FFGoSelectNotifyPending = True
+        self.FFGoSeeRow(row)
+        self._FFGoSetTkSelection(str(row))
+        # Tk doesn't necessarily send <<TreeviewSelect>> if the Tk
+        # selection didn't change (e.g., if the row was already
+        # selected). Additional events are harmless, since they are
+        # filtered by self._FFGoOnTreeviewSelect().
+        self.event_generate("<<TreeviewSelect>>", when="tail")
+
+    def _FFGoOnTreeviewSelect(self, event):
+        if self._FFGoSelectNotifyPending:
+            self._FFGoSelectNotifyPending = False
+            return              # let the widget's bindings run
+
+        currentSel = self.selection()
+        row = int(currentSel[0]) if currentSel else None
+
+        if row is None or row == self._FFGoSelectedRow:
+            # Selected item deleted or reinserted as the window moved, etc.
+            return "break"
+
+        self._FFGoSelectedRow = row # selection changed by the user
+
+    def _FFGoWindowFits(self, top):
+        """Tell whether the window is adequate when showing row 'top' first.
+
+        This is the case if the window contains all visible rows as well
+        as at least half of the margin above and below them (unless the
+        beginning or end of the list is reached).
+
+        """
+        start, end, nbRows = (self._FFGoWinStart, self._FFGoWinEnd,
+                              self._FFGoNbRows)
+        bottom = min(top + self._FFGoVisibleRows, nbRows)
+        minMargin = self._FFGoTreeHeight // 2
+
+        return (start <= top and bottom <= end and
+                (start == 0 or top - start >= minMargin) and
+                (end == nbRows or end - bottom >= minMargin))
+
+    def _FFGoScrollTo(self, top):
+        """Show row 'top' at the top of the tree (virtual mode).
+
+        'top' is adjusted to avoid showing empty space after the last
+        row. The window is moved if necessary.
+
+        """
+        nbRows, visible = self._FFGoNbRows, self._FFGoVisibleRows
+        top = max(0, min(top, nbRows - visible))
+
+        if not self._FFGoWindowFits(top):
+            # The margin above and below the visible rows is one tree height.
+            margin = self._FFGoTreeHeight
+            size = visible + 2*margin
+            start = max(0, min(top - margin, nbRows - size))
+            self._FFGoMaterialize(start, min(nbRows, start + size))
+
+        self._FFGoTop = top
+        count = self._FFGoWinEnd - self._FFGoWinStart
+        if count:
+            # The 0.25 avoids any rounding problem on Tk's side.
+            ttk.Treeview.yview(self, "moveto",
+                               (top - self._FFGoWinStart + 0.25) / count)
+
+        self._FFGoReportScroll()
+
+    def _FFGoMaterialize(self, start, end):
+        """Make the window contain the rows in range(start, end).
+
+        Rows that are already in the tree are kept as is.
+
+        """
+        oldStart, oldEnd = self._FFGoWinStart, self._FFGoWinEnd
+        # Rows kept in the tree: range(keepStart, keepEnd)
+        keepStart, keepEnd = max(start, oldStart), min(end, oldEnd)
+        if keepStart >= keepEnd:
+            keepStart = keepEnd = start
+
+        obsolete = [ str(row) for row in itertools.chain(
+            range(oldStart, min(oldEnd, keepStart)),
+            range(max(oldStart, keepEnd), oldEnd)) ]
+        if obsolete:
+            self.delete(*obsolete)
+
+        rowValues = self._FFGoRowValues
+        for index, row in enumerate(range(start, keepStart)):
+            self.insert("", index, iid=str(row), values=rowValues(row))
+        for row in range(keepEnd, end):
+            self.insert("", "end", iid=str(row), values=rowValues(row))
+
+        self._FFGoWinStart, self._FFGoWinEnd = start, end
+
+        selectedRow = self._FFGoSelectedRow
+        if (selectedRow is not None and start <= selectedRow < end and
+            not keepStart <= selectedRow < keepEnd):
+            # The selected row has just been inserted.
+            self._FFGoSetTkSelection(str(selectedRow))
+
+    def _FFGoOnTreeScrolled(self, first, last):
+        """Callback for Tk's 'yscrollcommand' in virtual mode.
+
+        'first' and 'last' are relative to the window.
+
+        """
+        first, last = float(first), float(last)
+        count = self._FFGoWinEnd - self._FFGoWinStart
+        if not count:
+            self._FFGoReportScroll()
+            return
+
+        if last - first < 1.0:
+            self._FFGoVisibleRows = max(1, int((last - first)*count + 0.5))
+        elif count < self._FFGoNbRows:
+            # All rows of the window are visible: the widget is taller
+            # than expected. Make the window larger.
+            self._FFGoVisibleRows = 2*count
+            self._FFGoScrollTo(self._FFGoTop)
+            return
+
+        top = self._FFGoWinStart + int(first*count + 0.5)
+        if self._FFGoWindowFits(top):
+            self._FFGoTop = top
+            self._FFGoReportScroll()
+        else:
+            # Scrolled (e.g., with the mouse wheel) close to an edge of
+            # the window
+            self._FFGoScrollTo(top)
+
+    def _FFGoReportScroll(self):
+        """Call the 'yscrollcommand' callback, if any (virtual mode)."""
+        if self._FFGoYScrollCommand is not None:
+            self._FFGoYScrollCommand(*self.yview())
+
+    def yview(self, *args):
+        if not self._FFGoVirtual:
+            return ttk.Treeview.yview(self, *args)
+
+        nbRows = self._FFGoNbRows
+        if not args:
+            if not nbRows:
+                return (0.0, 1.0)
+            return (self._FFGoTop / nbRows,
+                    min(1.0, (self._FFGoTop + self._FFGoVisibleRows) / nbRows))
+        elif args[0] == "moveto":
+            self._FFGoScrollTo(int(float(args[1])*nbRows + 0.5))
+        elif args[0] == "scroll":
+            number, what = int(args[1]), args[2]
+            unit = self._FFGoVisibleRows if what == "pages" else 1
+            self._FFGoScrollTo(self._FFGoTop + number*unit)
+        else:
+            return ttk.Treeview.yview(self, *args)
+
+    def yview_moveto(self, fraction):
+        self.yview("moveto", fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
 
 # *****************************************************************************
 # *                      Airport Chooser-related classes                      *
@@ -268,10 +630,10 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
                            sort 'treeWidget'
         entryWidget     -- Ttk or Tk Entry widget: the search field
         clearButton     -- Ttk or Tk Button widget: the “Clear” button
-        treeWidget      -- MyTreeview instance used as a multicolumn
-                           list (in other words, a table). It can of
-                           course have one column only if desired---this
-                           is just a particular case.
+        treeWidget      -- MyTreeview instance in virtual mode, used as
+                           a multicolumn list (in other words, a
+                           table). It can of course have one column only
+                           if desired---this is just a particular case.
         repeatableNavKeyApplyDelay
                         -- delay before the result of using a repeatable
                            navigation key (up or down arrow, Page Up or
@@ -334,6 +696,17 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         # List of item indices (into treeData) for the items found by
         # the last search.
         self.matches = []
+        # Recent results of _sortedMatches(): (query, sortBy, sortOrder)
+        # -> sorted list of matches. Must be cleared whenever the contents
+        # of self.treeData change.
+        self.matchesCache = misc.LRUCache(maxEntries=32, maxSize=500000,
+                                          sizeFunc=len)
+        # Item key (cf. itemKey()) -> item index into self.treeData
+        self.itemsByKey = {}
+        # Item index -> row of self.treeWidget, for the items of
+        # self._rowsByItemMatches, built on demand by self._rowOfItem()
+        self._rowsByItem = {}
+        self._rowsByItemMatches = None
 
         self.searchBufferVar = tk.StringVar()
         self.searchVar = misc.Observable('')
@@ -365,10 +738,75 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
             assert i == col.dataIndex, (i, col.dataIndex)
 
         self.treeWidget.bind('<<TreeviewSelect>>', self.onTreeviewSelect)
+        self._treeDataReplaced()
 
         if clearSearchOnInit:
             self.clearSearch(setFocusOnEntryWidget=False)
 
+    def _treeDataReplaced(self):
+        """Update the data derived from 'self.treeData' after it was replaced."""
+        itemKey = self.itemKey
+        # Keys are unique (ICAO codes, aircraft names and directories).
+        self.itemsByKey = { itemKey(row): i
+                            for i, row in enumerate(self.treeData) }
+        self.matchesCache.clear()
+        self.treeDataChanged()
+
+    def treeDataChanged(self):
+        """Method called when 'self.treeData' has been replaced.
+
+        Subclasses may override this method to rebuild data derived
+        from 'self.treeData', such as a search index. It is called
+        before the matches for the new data are computed. This
+        implementation does nothing.
+
+        """
+        pass
+
+    @abc.abstractmethod
+    def itemKey(self, row):
+        """Return the key identifying a row of 'self.treeData'.
+
+        The key must be hashable and unique among the rows of
+        'self.treeData'. It has the same form as the value returned by
+        decodedOutputVar().
+
+        This is an abstract method. It must be overridden by subclasses
+        before they can be instantiated.
+
+        """
+        raise NotImplementedError()
+
+    # True if, for all queries q1 and q2 returned by searchQuery() such
+    # that q2 starts with q1, every item matching q2 also matches q1. This
+    # allows _sortedMatches() to only filter the matches of q1 when the
+    # user types more characters. Subclasses setting this to True must
+    # implement matchesQuery().
+    refinableQueries = False
+
+    def searchQuery(self):
+        """Return the normalized search query.
+
+        This is the contents of 'self.searchVar', massaged the same way
+        as findMatches() does before comparing it to items (e.g.,
+        converted to lower case). Two searches with the same normalized
+        query must give the same matches. This implementation returns
+        the contents of 'self.searchVar' unchanged.
+
+        """
+        return self.searchVar.get()
+
+    def matchesQuery(self, item, query):
+        """Tell whether the item at index 'item' matches 'query'.
+
+        'item' is an index into 'self.treeData' and 'query' a value
+        returned by searchQuery(). This method is only used if
+        'self.refinableQueries' is True; it must agree with
+        findMatches().
+
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def findMatches(self):
         """Find all matches corresponding to the contents of 'self.searchVar'.
@@ -397,13 +835,8 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def matchesOutputVar(self, item, decodedOutputVar):
-        """Whether a tree item is an exact match for 'self.outputVar'."""
-        raise NotImplementedError()
-
-    @abc.abstractmethod
-    def matchesSearchText(self, item, massagedSearchText):
-        """Whether a tree item is an exact match for the search query.
+    def itemsMatchingSearchText(self, massagedSearchText):
+        """Return the tree items that exactly match the search query.
 
         This is used to choose the item to select *after* list filtering
         based on the search query. Among the remaining items once the
@@ -415,9 +848,27 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         search on aircraft names, an item named 'A320neo' could be
         exactly matched by search query 'a320neo', but not by 'a320'.
 
+        'massagedSearchText' is the search query in upper case. Return
+        an iterable of indices into 'self.treeData' (these items don't
+        have to be in 'self.matches').
+
         """
         raise NotImplementedError()
 
+    def itemLookupFuncs(self):
+        """Return functions finding items from the values of a column.
+
+        Return a dictionary mapping symbolic column names to functions.
+        Such a function takes a value as displayed in the column and
+        returns an iterable of indices into 'self.treeData' for the
+        items having this value. These functions are used by
+        MyTreeview.FFGoGotoItemWithValue(); other columns are searched
+        row by row. This implementation returns an empty dictionary.
+
+        """
+        return {}
+
+    # In the following methods, 'item' is an index into 'self.treeData'.
     @abc.abstractmethod
     def setOutputVarForItem(self, item):
         """Set 'self.outputVar' to reflect selection of tree item 'item'."""
@@ -493,6 +944,7 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
                     type(self).__name__))
 
         self.treeData = treeData
+        self._treeDataReplaced()
         # This will force an update of 'self.treeWidget' by
         # self.updateList().
         self.matches = None
@@ -513,19 +965,213 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         # FFGo, just hardcode the value to False.
         self.updateList(preserveSelection=False)
 
-    def updateList(self, preserveSelection=False):
-        """Update the list based on the search query in 'self.searchVar'.
+    def applyTreeDataChanges(self, removeFunc, addedRows):
+        """Remove and add rows of 'self.treeData'.
 
-        If 'preserveSelection' is True, the item of 'self.treeWidget'
-        that was selected when this method is called will still be
-        selected (if possible) when this method returns.
+        Rows of 'self.treeData' for which removeFunc(row) is true are
+        removed, and rows from the 'addedRows' sequence are added. Unlike
+        setTreeData(), this method keeps the selected item (if it still
+        exists) and the scroll position, without selecting the item
+        again.
 
         """
+        newIndices = {}         # old index in self.treeData -> new index
+        treeData = []
+        for i, row in enumerate(self.treeData):
+            if not removeFunc(row):
+                newIndices[i] = len(treeData)
+                treeData.append(row)
+
+        if len(treeData) == len(self.treeData) and not addedRows:
+            return              # nothing to do
+
+        treeData.extend(addedRows)
+
+        if self.matches is None:
+            # The tree is going to be rebuilt anyway.
+            self.setTreeData(treeData, preserveSelection=True)
+            return
+
+        tree = self.treeWidget
+        selectedRow = tree.FFGoSelectedRow()
+        if selectedRow is not None:
+            selectedItem = newIndices.get(self.matches[selectedRow])
+        else:
+            selectedItem = None
+
+        self.treeData = treeData
+        self._treeDataReplaced()
+        self.matches = self._sortedMatches()
+
+        try:
+            selectedRow = self.matches.index(selectedItem)
+        except ValueError:
+            selectedRow = None
+
+        self._updateTreeWidget(selectedRow=selectedRow, top=tree.FFGoTopRow())
+
+        if selectedRow is None:
+            # The selected item has been removed (or there was none)
+            self._autoUpdateTreeSelection(preserveSelection=True)
+
+    def updateItem(self, item, rowData, updateTree=True):
+        """Replace the data of item 'item' of 'self.treeData'.
+
+        'item' is an index into 'self.treeData' and 'rowData' the new
+        data for this item. 'rowData' must have the same key [cf.
+        itemKey()] as the data it replaces, and the same values in the
+        columns used to find matches for search queries (e.g., only the
+        use count changes).
+
+        If 'updateTree' is True and the item is in 'self.treeWidget',
+        its row is updated in place if its position according to the
+        current sort column and order is unchanged; otherwise, the item
+        is moved to its new position. In both cases, the selected item
+        is kept and nothing is sorted again.
+
+        """
+        self.treeData[item] = rowData
+        # The same items match each query, but maybe not in the same order.
+        self.matchesCache.clear()
+
+        row = self._rowOfItem(item)
+        if not updateTree or row is None:
+            return
+
+        tree = self.treeWidget
+        matches = self.matches[:row] + self.matches[row+1:]
+        newRow = self._sortPosition(matches, item)
+
+        if newRow == row:
+            tree.FFGoUpdateRows(row, row + 1)
+
+            if self.treeUpdatedCallback is not None:
+                self.treeUpdatedCallback()
+            return
+
+        selectedRow = tree.FFGoSelectedRow()
+        if selectedRow is not None:
+            selectedItem = self.matches[selectedRow]
+
+        matches.insert(newRow, item)
+        self.matches = matches
+
+        # Only the rows between the old and new positions have changed.
+        rowsByItem = self._rowsByItem
+        for r in range(min(row, newRow), max(row, newRow) + 1):
+            rowsByItem[matches[r]] = r
+        self._rowsByItemMatches = matches
+
+        if selectedRow is not None:
+            selectedRow = rowsByItem[selectedItem]
+        self._updateTreeWidget(selectedRow=selectedRow, top=tree.FFGoTopRow())
+
+    def _rowOfItem(self, item):
+        """Return the row of 'self.treeWidget' showing 'item', or None.
+
+        'item' is an index into 'self.treeData'. None is returned if
+        'item' is not in 'self.matches'.
+
+        """
+        if self.matches is None:
+            return None
+        elif self._rowsByItemMatches is not self.matches:
+            self._rowsByItem = { item: row
+                                 for row, item in enumerate(self.matches) }
+            self._rowsByItemMatches = self.matches
+
+        return self._rowsByItem.get(item)
+
+    def _sortPosition(self, matches, item):
+        """Return the index where 'item' should be inserted in 'matches'.
+
+        'matches' is a list of indices into 'self.treeData' sorted as
+        done by _sortedMatches(), which doesn't contain 'item'. The sort
+        is stable and the unsorted matches are in increasing order,
+        therefore items with equal sort keys are in increasing order.
+
+        """
+        col = self.columnsMetadata[self.sortBy]
+        treeData, dataIndex = self.treeData, col.dataIndex
+        if col.sortFunc is not None:
+            keyFunc = lambda i, f=col.sortFunc: f(treeData[i][dataIndex])
+        else:
+            keyFunc = lambda i: treeData[i][dataIndex]
+
+        key = keyFunc(item)
+        descending = (col.sortOrder == SortOrder.descending)
+        lo, hi = 0, len(matches)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = matches[mid]
+            otherKey = keyFunc(other)
+
+            if otherKey == key:
+                goesBefore = other < item
+            elif descending:
+                goesBefore = otherKey > key
+            else:
+                goesBefore = otherKey < key
+
+            if goesBefore:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def _sortedMatches(self):
+        """Return the sorted list of matches for the search query.
+
+        This is a list of indices into 'self.treeData', sorted according
+        to the current sort column and order. It must not be modified,
+        since it may be returned again for the same query.
+
+        """
+        query = self.searchQuery()
+        col = self.columnsMetadata[self.sortBy]
+        cache = self.matchesCache
+        cacheKey = (query, self.sortBy, col.sortOrder)
+
+        matches = cache.get(cacheKey)
+        if matches is None:
+            if self.refinableQueries:
+                matches = self._refinedMatches(query, col)
+            if matches is None:
+                matches = self._computeSortedMatches(col)
+            cache.put(cacheKey, matches)
+
+        return matches
+
+    def _refinedMatches(self, query, col):
+        """Compute the sorted matches for 'query' from a cached result.
+
+        Look for the cached result of the longest non-empty query that
+        is a proper prefix of 'query', with the same sort column and
+        order. If there is one, return the sorted list of matches for
+        'query', otherwise return None.
+
+        Since the sort order is a total order on items (the sort is
+        stable and the unsorted matches are in increasing order),
+        filtering a sorted list of matches keeps it sorted.
+
+        """
+        cache = self.matchesCache
+        for length in range(len(query) - 1, 0, -1):
+            cacheKey = (query[:length], self.sortBy, col.sortOrder)
+            if cacheKey in cache:
+                matchesQuery = self.matchesQuery
+                return [ item for item in cache.get(cacheKey)
+                         if matchesQuery(item, query) ]
+
+        return None
+
+    def _computeSortedMatches(self, col):
         # Find all matches corresponding to the contents of 'self.searchVar'.
         # 'unsortedMatches' is a list of their indices in 'self.treeData'.
         unsortedMatches = self.findMatches()
 
-        col = self.columnsMetadata[self.sortBy]
         treeData = self.treeData  # for performance
         dataIndex = col.dataIndex # ditto
 
@@ -536,7 +1182,18 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
             keyFunc = lambda t: t[0]
 
         l.sort(key=keyFunc, reverse=int(col.sortOrder))
-        matches = [ t[1] for t in l ] # only keep the indices of matching items
+        # Only keep the indices of matching items
+        return [ t[1] for t in l ]
+
+    def updateList(self, preserveSelection=False):
+        """Update the list based on the search query in 'self.searchVar'.
+
+        If 'preserveSelection' is True, the item of 'self.treeWidget'
+        that was selected when this method is called will still be
+        selected (if possible) when this method returns.
+
+        """
+        matches = self._sortedMatches()
 
         if self.matches != matches: # tree contents changed?
             self.matches = matches
@@ -546,39 +1203,70 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         self._autoUpdateTreeSelection(
             preserveSelection=preserveSelection)
 
-    def _updateTreeWidget(self):
-        """Update the contents of 'self.treeWidget' based on 'self.matches'."""
-        tree = self.treeWidget
-        # Delete all children of the root element. Even when the elements just
-        # need to be put in a different order, it is much faster this way than
-        # using tree.move() for each element.
-        tree.delete(*tree.get_children())
-
-        hasSpecialFormatter = any(
-            ( col.formatFunc is not None for col in self.columns ))
-
-        if hasSpecialFormatter:
-            columns = self.columns
-
-            formatter = []
-            identity = lambda x: x
-            for dataIndex in range(len(columns)):
-                f = columns[dataIndex].formatFunc
-                formatter.append(identity if f is None else f)
-
-            for idx in self.matches:
-                rawValues = self.treeData[idx]
-                values = [ formatter[dataIndex](rawValue)
-                           for dataIndex, rawValue in enumerate(rawValues) ]
-                tree.insert("", "end", values=values)
-        else:
-            # Optimize the case where no column has a formatter function
-            for idx in self.matches:
-                tree.insert("", "end", values=self.treeData[idx])
+    def _updateTreeWidget(self, selectedRow=None, top=0):
+        """Update the contents of 'self.treeWidget' based on 'self.matches'.
+
+        Only the rows that are visible (or nearly so) are inserted into
+        'self.treeWidget', therefore the cost doesn't depend on the
+        number of matches. 'selectedRow' and 'top' are passed to
+        MyTreeview.FFGoSetRows().
+
+        """
+        self.treeWidget.FFGoSetRows(len(self.matches), self._rowValuesFunc(),
+                                    selectedRow=selectedRow, top=top,
+                                    rowLookupFuncs=self._rowLookupFuncs())
 
         if self.treeUpdatedCallback is not None:
             self.treeUpdatedCallback()
 
+    def _rowValuesFunc(self):
+        """Return a function giving the values displayed in a tree row.
+
+        The function takes a row index of 'self.treeWidget' (i.e., an
+        index into the current 'self.matches' list).
+
+        """
+        matches, treeData = self.matches, self.treeData
+        formatter = self._formatters()
+
+        if formatter is None:
+            # Optimize the case where no column has a formatter function
+            return lambda row: treeData[matches[row]]
+        else:
+            return lambda row: [ f(rawValue) for f, rawValue in
+                                 zip(formatter, treeData[matches[row]]) ]
+
+    def _rowLookupFuncs(self):
+        """Return the 'rowLookupFuncs' argument for MyTreeview.FFGoSetRows()."""
+        return { column: lambda value, f=itemsFunc: self._firstRowOf(f(value))
+                 for column, itemsFunc in self.itemLookupFuncs().items() }
+
+    def _firstRowOf(self, items):
+        """Return the first row of 'self.treeWidget' showing one of 'items'.
+
+        'items' is an iterable of indices into 'self.treeData'. Return
+        None if none of them is in 'self.matches'.
+
+        """
+        rows = [ row for row in map(self._rowOfItem, items)
+                 if row is not None ]
+        return min(rows, default=None)
+
+    def _formatters(self):
+        """Return the list of column formatting functions, or None.
+
+        None is returned if no column has a formatter function. In the
+        returned list, columns without a formatter function have the
+        identity function.
+
+        """
+        if not any(( col.formatFunc is not None for col in self.columns )):
+            return None
+
+        identity = lambda x: x
+        return [ identity if col.formatFunc is None else col.formatFunc
+                 for col in self.columns ]
+
     def _autoUpdateTreeSelection(self, preserveSelection=False):
         """Select a suitable item in self.treeWidget, if it is non-empty.
 
@@ -589,26 +1277,25 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
         'preserveSelection' determines whether to prefer selecting the
         previously selected item (according to 'self.outputVar') or the
         first item that matches the search text (according to
-        self.matchesSearchText()).
+        self.itemsMatchingSearchText()).
 
         """
         if self.matches:
             tree = self.treeWidget
-            decodedOutputVar = self.decodedOutputVar()
             uSearchText = self.searchVar.get().upper()
-            found = {}
-
-            for item in tree.get_children():
-                if self.matchesOutputVar(item, decodedOutputVar):
-                    found["current selection"] = item
-                    if preserveSelection:
-                        break
-                elif self.matchesSearchText(item, uSearchText):
-                    # This one, if available, is preferred over the current
-                    # selection.
-                    found["match of search text"] = item
-                    if not preserveSelection:
-                        break
+            found = {}          # values are row indices in 'tree'
+
+            currentItem = self.itemsByKey.get(self.decodedOutputVar())
+            if currentItem is not None:
+                row = self._rowOfItem(currentItem)
+                if row is not None:
+                    found["current selection"] = row
+
+            row = self._firstRowOf(
+                item for item in self.itemsMatchingSearchText(uSearchText)
+                if item != currentItem)
+            if row is not None:
+                found["match of search text"] = row
 
             if preserveSelection:
                 preferredChoice = "current selection"
@@ -618,10 +1305,10 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
                 bestFallbackChoice = "current selection"
 
             try:
-                item = found[preferredChoice]
+                row = found[preferredChoice]
             except KeyError:
                 try:
-                    item = found[bestFallbackChoice]
+                    row = found[bestFallbackChoice]
                 except KeyError:
                     if uSearchText:
                         # Select the first item in the list. This will set
@@ -631,9 +1318,9 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
                         # Special case when the search query is empty
                         self.selectDefaultItemForEmptySearch()
                 else:
-                    tree.FFGoGotoItem(item)
+                    tree.FFGoGotoItemWithIndex(row)
             else:
-                tree.FFGoGotoItem(item)
+                tree.FFGoGotoItemWithIndex(row)
         else:                   # empty tree, we can't select anything
             self.setNullOutputVar()
 
@@ -668,7 +1355,7 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
 
     def onTreeviewSelect(self, event=None):
         tree = self.treeWidget
-        currentSel = tree.selection()
+        selectedRow = tree.FFGoSelectedRow()
 
         if tree._FFGoRepeatableNavKeyHit:
             # We are presumably here because of a repeatable navigation
@@ -683,96 +1370,211 @@ class IncrementalChooser(metaclass=abc.ABCMeta):
                     self.repeatableNavKeyApplyDelay, self.applySelection)
                 return
 
-        # Set self.outputVar based on the first (and normally only) item of the
-        # selection.
-        if currentSel:
-            self.setOutputVarForItem(currentSel[0])
+        # Set self.outputVar based on the selected item.
+        if selectedRow is not None:
+            self.setOutputVarForItem(self.matches[selectedRow])
 
     def applySelection(self):
         """Set 'self.outputVar' according to the currently selected item."""
-        tree = self.treeWidget
-        currentSel = tree.selection()
-        if currentSel:
-            self.setOutputVarForItem(currentSel[0])
+        selectedRow = self.treeWidget.FFGoSelectedRow()
+        if selectedRow is not None:
+            self.setOutputVarForItem(self.matches[selectedRow])
 
     def getValue(self, columnName):
         """Get the selected item's value in column 'columnName'.
 
+        The value is returned as a string, as displayed in the tree.
         Raise NoSelectedItem if the selection is empty.
 
         """
-        tree = self.treeWidget
-        currentSel = tree.selection()
-        if currentSel:
-            return tree.set(currentSel[0], columnName)
+        selectedRow = self.treeWidget.FFGoSelectedRow()
+        if selectedRow is not None:
+            col = self.columnsMetadata[columnName]
+            value = self.treeData[self.matches[selectedRow]][col.dataIndex]
+            return str(value if col.formatFunc is None else
+                       col.formatFunc(value))
         else:
             raise NoSelectedItem()
 
 
+class AirportSearchIndex:
+    """Index for searching airports by ICAO prefix or name substring.
+
+    The index is built from a sequence of rows of the form (icao, name,
+    ...), such as the 'treeData' of an AirportChooser. find() returns
+    the same matches as checking every row with
+
+      icao.lower().startswith(text) or text in name.lower()
+
+    without scanning all rows. ICAO prefixes are looked up with bisect
+    in a sorted list of the lowercased ICAO codes. Substrings of airport
+    names are looked up in a posting index mapping each trigram (string
+    of 'nGramLength' characters) to the increasing list of the rows
+    whose lowercased name contains it: the candidates for a query are
+    the rows present in the posting lists of all trigrams of the query,
+    and are then checked against the query. Queries shorter than a
+    trigram are checked against all names.
+
+    The posting index takes much longer to build than the rest, so it
+    is only built the first time it is needed.
+
+    """
+
+    nGramLength = 3
+
+    def __init__(self, rows):
+        self.icaos = [ row[0].lower() for row in rows ]
+        # Row indices sorted by lowercased ICAO code
+        self.icaoRows = sorted(range(len(self.icaos)),
+                               key=self.icaos.__getitem__)
+        self.icaoKeys = [ self.icaos[i] for i in self.icaoRows ]
+        self.names = [ row[1].lower() for row in rows ]
+        self._postings = None   # built on first use
+
+    def _buildPostings(self):
+        n = self.nGramLength
+        postings = {}
+
+        with misc.gcDisabled():
+            for i, name in enumerate(self.names):
+                for nGram in { name[j:j+n] for j in range(len(name) - n + 1) }:
+                    l = postings.get(nGram)
+                    if l is None:
+                        postings[nGram] = [i]
+                    else:
+                        l.append(i)
+
+        self._postings = postings
+
+    def icaoPrefixMatches(self, text):
+        """Return the rows whose lowercased ICAO starts with 'text'.
+
+        'text' must be lowercased and non-empty. The return value is an
+        iterable of row indices, in no particular order.
+
+        """
+        start = bisect.bisect_left(self.icaoKeys, text)
+        # First string that is greater than all those starting with 'text'
+        upperBound = text[:-1] + chr(ord(text[-1]) + 1)
+        end = bisect.bisect_left(self.icaoKeys, upperBound, start)
+
+        return self.icaoRows[start:end]
+
+    def nameMatches(self, text):
+        """Return the rows whose lowercased name contains 'text'.
+
+        'text' must be lowercased and non-empty. The return value is an
+        iterable of row indices, in no particular order.
+
+        """
+        names = self.names
+        n = self.nGramLength
+
+        if len(text) < n:
+            return [ i for i, name in enumerate(names) if text in name ]
+
+        if self._postings is None:
+            self._buildPostings()
+
+        postingLists = []
+        for nGram in { text[j:j+n] for j in range(len(text) - n + 1) }:
+            l = self._postings.get(nGram)
+            if l is None:
+                return []       # no name contains this trigram
+            postingLists.append(l)
+
+        # Start from the shortest posting list
+        postingLists.sort(key=len)
+        candidates = set(postingLists[0])
+        for l in postingLists[1:]:
+            candidates.intersection_update(l)
+
+        # Trigrams of the query may appear in a name at unrelated places
+        return [ i for i in candidates if text in names[i] ]
+
+    def rowMatches(self, i, text):
+        """Tell whether row 'i' matches 'text', which must be lowercased."""
+        return self.icaos[i].startswith(text) or text in self.names[i]
+
+    def find(self, text):
+        """Return the rows matching 'text' as a sorted list of indices."""
+        text = text.lower()
+        if not text:
+            return list(range(len(self.names)))
+
+        matches = set(self.icaoPrefixMatches(text))
+        matches.update(self.nameMatches(text))
+
+        return sorted(matches)
+
+
 class AirportChooser(IncrementalChooser):
     """Glue logic turning three widgets into a convenient airport chooser."""
 
+    refinableQueries = True
+
+    def itemKey(self, row):
+        return row[0]
+
+    def treeDataChanged(self):
+        self.searchIndex = AirportSearchIndex(self.treeData)
+
+    def searchQuery(self):
+        return self.searchVar.get().lower()
+
+    def matchesQuery(self, item, query):
+        return self.searchIndex.rowMatches(item, query)
+
     def findMatches(self):
         """Find all matches corresponding to the contents of 'self.searchVar'.
 
         Return a list of indices into 'self.treeData'.
 
         """
-        unsortedMatches = []
-        text = self.searchVar.get().lower()
-
-        for i, (icao, name, *rest) in enumerate(self.treeData):
-            if icao.lower().startswith(text) or text in name.lower():
-                unsortedMatches.append(i)
-
-        return unsortedMatches
+        return self.searchIndex.find(self.searchQuery())
 
     def decodedOutputVar(self):
         return self.outputVar.get()
 
     def setOutputVarForItem(self, item):
         # This is in upper case.
-        self.outputVar.set(self.treeWidget.set(item, "icao"))
+        self.outputVar.set(self.treeData[item][0])
 
     def setNullOutputVar(self):
         self.outputVar.set('')
 
-    def matchesOutputVar(self, item, decodedOutputVar):
-        # Both the tree data for column “icao” and 'decodedOutputVar' are in
-        # upper case.
-        return self.treeWidget.set(item, "icao") == decodedOutputVar
+    def _itemsWithIcao(self, icao):
+        item = self.itemsByKey.get(icao)
+        return () if item is None else (item,)
+
+    def itemLookupFuncs(self):
+        return {"icao": self._itemsWithIcao}
 
-    def matchesSearchText(self, item, massagedSearchText):
+    def itemsMatchingSearchText(self, massagedSearchText):
         # Both the tree data for column “icao” and 'massagedSearchText' are in
         # upper case.
-        return self.treeWidget.set(item, "icao") == massagedSearchText
+        return self._itemsWithIcao(massagedSearchText)
 
     def updateItemData(self, icao, updateTree=True):
         """Refresh the data for the airport whose ICAO code is 'icao'.
 
         Fetch the relevant data from the underlying AirportStub instance,
-        update self.treeData with this new data and refresh
-        'self.treeWidget'.
-
-        The current implementation simply rebuilds the whole MyTreeview
-        widget unless the optional argument 'updateTree' is False. This
-        can be slow if the amount of data in 'self.treeWidget' is large.
+        update self.treeData with this new data and, unless the optional
+        argument 'updateTree' is False, refresh the corresponding row of
+        'self.treeWidget' [cf. IncrementalChooser.updateItem()].
 
         """
-        # Not very efficient...
-        for i, (itemIcao, *rest) in enumerate(self.treeData):
-            if itemIcao == icao:
-                airport = self.config.airports[icao]
-                self.treeData[i] = (airport.icao, airport.name,
-                                    airport.useCountForShow)
-
-                if updateTree:
-                    # Update the tree, but don't change the selected item.
-                    self.setTreeData(self.treeData, preserveSelection=True)
-                break
-        else:
+        item = self.itemsByKey.get(icao)
+        if item is None:
             raise NoSuchItem(icao)
 
+        # The ICAO code and name don't change, therefore self.searchIndex
+        # is still valid.
+        airport = self.config.airports[icao]
+        self.updateItem(item, (airport.icao, airport.name,
+                               airport.useCountForShow),
+                        updateTree=updateTree)
+
 
 class AircraftChooser(IncrementalChooser):
     """Glue logic turning three widgets into a convenient aircraft chooser."""
@@ -785,11 +1587,32 @@ class AircraftChooser(IncrementalChooser):
         # IncrementalChooser's constructor.
         IncrementalChooser.__init__(self, *args, **kwargs)
 
+    refinableQueries = True
+
     @classmethod
     def aircraftNameMatchKey(cls, acName):
         """Return the match key corresponding to a given aircraft name."""
         return acName.translate(cls.acNameTranslationMap).lower()
 
+    def itemKey(self, row):
+        matchKey, name, dir_, *rest = row
+        return (name, dir_)
+
+    def treeDataChanged(self):
+        # Aircraft name (resp. in upper case) -> list of items with this name
+        self.itemsByName = {}
+        self.itemsByUpperName = {}
+
+        for i, (matchKey, name, *rest) in enumerate(self.treeData):
+            self.itemsByName.setdefault(name, []).append(i)
+            self.itemsByUpperName.setdefault(name.upper(), []).append(i)
+
+    def searchQuery(self):
+        return self.aircraftNameMatchKey(self.searchVar.get())
+
+    def matchesQuery(self, item, query):
+        return query in self.treeData[item][0]
+
     def findMatches(self):
         """Find all matches corresponding to the contents of 'self.searchVar'.
 
@@ -797,8 +1620,7 @@ class AircraftChooser(IncrementalChooser):
 
         """
         unsortedMatches = []
-        text = self.searchVar.get().translate(
-            self.acNameTranslationMap).lower()
+        text = self.searchQuery()
 
         for i, (matchKey, *rest) in enumerate(self.treeData):
             if text in matchKey:
@@ -810,15 +1632,14 @@ class AircraftChooser(IncrementalChooser):
         return self.outputVar.get()
 
     def setOutputVarForItem(self, item):
-        d = self.treeWidget.set(item)
-        self.outputVar.set((d["name"], d["directory"]))
+        matchKey, name, dir_, *rest = self.treeData[item]
+        self.outputVar.set((name, dir_))
 
-    def matchesOutputVar(self, item, decodedOutputVar):
-        d = self.treeWidget.set(item)
-        return (d["name"], d["directory"]) == decodedOutputVar
+    def itemLookupFuncs(self):
+        return {"name": lambda name: self.itemsByName.get(name, ())}
 
-    def matchesSearchText(self, item, massagedSearchText):
-        return self.treeWidget.set(item, "name").upper() == massagedSearchText
+    def itemsMatchingSearchText(self, massagedSearchText):
+        return self.itemsByUpperName.get(massagedSearchText, ())
 
     def setNullOutputVar(self):
         self.outputVar.set(('', ''))
@@ -842,25 +1663,18 @@ class AircraftChooser(IncrementalChooser):
         'aircraftId' should be a tuple (or, more generally, an iterable)
         of the form (aircraftName, aircraftDir). Fetch the relevant data
         from the underlying Aircraft instance, update self.treeData with
-        this new data and refresh 'self.treeWidget'.
-
-        The current implementation simply rebuilds the whole MyTreeview
-        widget unless the optional argument 'updateTree' is False. This
-        can be slow if the amount of data in 'self.treeWidget' is large.
-
-        """
-        # Not very efficient...
-        for i, (matchKey, name, dir_, *rest) in enumerate(self.treeData):
-            if (name, dir_) == aircraftId:
-                aircraft = self.config.aircraftWithId(aircraftId)
-                self.treeData[i] = (self.aircraftNameMatchKey(aircraft.name),
-                                    aircraft.name,
-                                    aircraft.dir,
-                                    aircraft.useCountForShow)
-
-                if updateTree:
-                    # Update the tree, but don't change the selected item.
-                    self.setTreeData(self.treeData, preserveSelection=True)
-                break
-        else:
+        this new data and, unless the optional argument 'updateTree' is
+        False, refresh the corresponding row of 'self.treeWidget' [cf.
+        IncrementalChooser.updateItem()].
+
+        """
+        item = self.itemsByKey.get(tuple(aircraftId))
+        if item is None:
             raise NoSuchItem(str(aircraftId))
+
+        aircraft = self.config.aircraftWithId(aircraftId)
+        self.updateItem(item, (self.aircraftNameMatchKey(aircraft.name),
+                               aircraft.name,
+                               aircraft.dir,
+                               aircraft.useCountForShow),
+                        updateTree=updateTree)
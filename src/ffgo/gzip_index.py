@@ -0,0 +1,307 @@
+# gzip_index.py --- Random access to the uncompressed contents of gzip files
+#                   using a checkpoint index
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Random access to the uncompressed contents of gzip files.
+
+Seeking inside a gzip.GzipFile object requires decompressing
+everything from the start of the file up to the target offset. For a
+large file such as FlightGear's apt.dat.gz, this takes a few seconds
+when the target is near the end of the file.
+
+The approach used by zran.c (from the zlib distribution) is to save,
+every N MB of uncompressed data, the position in the compressed stream
+together with the 32 KiB deflate window, so that decompression can be
+resumed from the nearest such checkpoint. Unfortunately, this requires
+inflatePrime(), which is not exposed by Python's zlib module (deflate
+blocks generally don't start on a byte boundary). Therefore, this
+module does something equivalent with the primitives available: the
+uncompressed data is cut into blocks of a fixed size which are
+compressed independently of each other and stored in an index file,
+together with a table giving the uncompressed offset of each block (the
+checkpoints). Reading from an arbitrary offset then only requires
+decompressing one block, which takes a few milliseconds.
+
+The price to pay is disk space: since the index contains all the data
+of the gzip file, compressed again, it is typically about 1.2 times as
+large as the gzip file itself (versus a small fraction of it for a
+zran-style index).
+
+The index file starts with a header identifying the gzip file it was
+built from (path, size and modification time). An index whose header
+doesn't match the current gzip file is considered stale and refused by
+IndexedGzipFile.
+
+"""
+
+import os
+import bisect
+import gzip
+import struct
+import zlib
+
+from . import misc
+from .logging import logger
+# This import requires the translation system [_() function] to be in
+# place.
+from .exceptions import FFGoException
+
+
+class error(FFGoException):
+    """Base class for exceptions in the gzip_index module."""
+    ExceptionShortDescription = _("Error caught in the gzip_index module")
+
+class InvalidIndex(error):
+    """Exception raised when an index file can't be used."""
+    ExceptionShortDescription = _("Invalid gzip checkpoint index")
+
+
+# Magic number identifying the index file format
+MAGIC = b"FFGoGzIx"
+FORMAT_VERSION = 1
+# Default amount of uncompressed data between two checkpoints
+DEFAULT_INTERVAL = 1024*1024
+# Compression level used for the blocks. Level 1 is much faster than the
+# default level, for only slightly larger index files (about 1.2 times the
+# size of the gzip file, see the module docstring).
+COMPRESSION_LEVEL = 1
+
+# Magic number, format version, size and mtime of the gzip file, interval
+# between checkpoints, length of the UTF-8 encoded gzip file path
+_headerStruct = struct.Struct("<8sIQdII")
+# Uncompressed offset, offset in the index file and length of each block
+_entryStruct = struct.Struct("<QQI")
+# Offset of the checkpoint table in the index file, number of checkpoints,
+# total uncompressed size, magic number
+_trailerStruct = struct.Struct("<QIQ8s")
+
+
+def indexFileName(path):
+    """Return a file name for the index of the gzip file at 'path'.
+
+    The name only depends on the absolute path of the gzip file, which
+    allows storing the indices for several gzip files in the same
+    directory.
+
+    """
+    return misc.pathDigest(path) + ".idx"
+
+
+def buildIndex(gzPath, indexPath, interval=DEFAULT_INTERVAL):
+    """Build the checkpoint index for gzip file 'gzPath'.
+
+    The index is written to a temporary file which is then atomically
+    renamed to 'indexPath', so that readers never see a partially
+    written index. Return the uncompressed size of 'gzPath'.
+
+    """
+    gzPath = os.path.abspath(gzPath)
+    st = os.stat(gzPath)
+    encodedPath = os.fsencode(gzPath)
+    tmpPath = indexPath + ".tmp"
+    entries = []
+    uncompOffset = 0
+
+    logger.info("Building the checkpoint index for '{}'".format(gzPath))
+
+    try:
+        with gzip.open(gzPath, "rb") as src, open(tmpPath, "wb") as out:
+            out.write(_headerStruct.pack(MAGIC, FORMAT_VERSION, st.st_size,
+                                         st.st_mtime, interval,
+                                         len(encodedPath)))
+            out.write(encodedPath)
+            dataOffset = out.tell()
+
+            while True:
+                block = src.read(interval)
+                if not block:
+                    break
+
+                compressed = zlib.compress(block, COMPRESSION_LEVEL)
+                out.write(compressed)
+                entries.append((uncompOffset, dataOffset, len(compressed)))
+                uncompOffset += len(block)
+                dataOffset += len(compressed)
+
+            for entry in entries:
+                out.write(_entryStruct.pack(*entry))
+
+            out.write(_trailerStruct.pack(dataOffset, len(entries),
+                                          uncompOffset, MAGIC))
+
+        os.replace(tmpPath, indexPath)
+    except BaseException:
+        try:
+            os.unlink(tmpPath)
+        except OSError:
+            pass
+        raise
+
+    return uncompOffset
+
+
+class IndexedGzipFile:
+    """Read-only file-like object for the uncompressed data of a gzip file.
+
+    Only the methods needed by apt_dat.AptDatReader are implemented:
+    seek(), tell(), read(), readline() and close(). Data is obtained
+    from the checkpoint index file; the gzip file itself is only
+    stat()ed in order to make sure the index is up-to-date.
+
+    """
+
+    def __init__(self, indexPath, gzPath):
+        self.indexPath = indexPath
+        self.file = open(indexPath, "rb")
+
+        try:
+            self._readMetadata(os.path.abspath(gzPath))
+        except BaseException:
+            self.file.close()
+            raise
+
+        self._blockNum = -1
+        self._blockStart = 0
+        self._buf = b""
+        self._bufPos = 0
+
+    def _readMetadata(self, gzPath):
+        header = self.file.read(_headerStruct.size)
+        if len(header) != _headerStruct.size:
+            raise InvalidIndex(_("truncated index file: '{}'")
+                               .format(self.indexPath))
+
+        magic, version, size, mtime, self.interval, pathLen = \
+                                                _headerStruct.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise InvalidIndex(_("unrecognized format for index file '{}'")
+                               .format(self.indexPath))
+
+        st = os.stat(gzPath)
+        if (self.file.read(pathLen) != os.fsencode(gzPath) or
+            (size, mtime) != (st.st_size, st.st_mtime)):
+            raise InvalidIndex(_("index file '{index}' is not up-to-date "
+                                 "with respect to '{gzFile}'").format(
+                                     index=self.indexPath, gzFile=gzPath))
+
+        self.file.seek(-_trailerStruct.size, os.SEEK_END)
+        tableOffset, nbEntries, self.uncompSize, magic = \
+                     _trailerStruct.unpack(self.file.read(_trailerStruct.size))
+        if magic != MAGIC:
+            raise InvalidIndex(_("truncated index file: '{}'")
+                               .format(self.indexPath))
+
+        self.file.seek(tableOffset)
+        table = self.file.read(nbEntries*_entryStruct.size)
+        if len(table) != nbEntries*_entryStruct.size:
+            raise InvalidIndex(_("truncated index file: '{}'")
+                               .format(self.indexPath))
+
+        entries = list(_entryStruct.iter_unpack(table))
+        # Uncompressed offset of each block (sorted), for bisect
+        self._uncompOffsets = [ entry[0] for entry in entries ]
+        self._blockLocations = [ entry[1:] for entry in entries ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excVal, excTb):
+        self.close()
+        return False
+
+    def close(self):
+        self.file.close()
+        self._buf = b""
+
+    def _loadBlock(self, blockNum):
+        """Decompress block number 'blockNum' into self._buf.
+
+        Return False if 'blockNum' is past the last block.
+
+        """
+        if blockNum >= len(self._uncompOffsets):
+            self._blockNum = len(self._uncompOffsets)
+            self._blockStart = self.uncompSize
+            self._buf = b""
+            self._bufPos = 0
+            return False
+
+        offset, length = self._blockLocations[blockNum]
+        self.file.seek(offset)
+        self._buf = zlib.decompress(self.file.read(length))
+        self._blockNum = blockNum
+        self._blockStart = self._uncompOffsets[blockNum]
+        self._bufPos = 0
+        return True
+
+    def tell(self):
+        return self._blockStart + self._bufPos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.tell()
+        elif whence == os.SEEK_END:
+            offset += self.uncompSize
+        elif whence != os.SEEK_SET:
+            raise ValueError("invalid whence value: {!r}".format(whence))
+
+        if offset < 0:
+            raise ValueError("negative seek position: {}".format(offset))
+
+        if not (self._blockStart <= offset <
+                self._blockStart + len(self._buf)):
+            # Find the last checkpoint before or at 'offset'
+            blockNum = bisect.bisect_right(self._uncompOffsets, offset) - 1
+            if offset >= self.uncompSize or not self._loadBlock(blockNum):
+                self._loadBlock(len(self._uncompOffsets)) # EOF
+                return self.tell()
+
+        self._bufPos = offset - self._blockStart
+        return offset
+
+    def read(self, size=-1):
+        chunks = []
+
+        while size < 0 or size > 0:
+            if self._bufPos >= len(self._buf):
+                if not self._loadBlock(self._blockNum + 1):
+                    break
+
+            end = (len(self._buf) if size < 0
+                   else min(len(self._buf), self._bufPos + size))
+            chunks.append(self._buf[self._bufPos:end])
+            if size > 0:
+                size -= end - self._bufPos
+            self._bufPos = end
+
+        return b"".join(chunks)
+
+    def readline(self):
+        pos = self._bufPos
+        end = self._buf.find(b"\n", pos)
+        if end >= 0:                # fast path
+            self._bufPos = end + 1
+            return self._buf[pos:end+1]
+
+        # The line continues in the next block(s), or we are at EOF
+        chunks = [self._buf[pos:]]
+        self._bufPos = len(self._buf)
+
+        while self._loadBlock(self._blockNum + 1):
+            end = self._buf.find(b"\n")
+            if end >= 0:
+                chunks.append(self._buf[:end+1])
+                self._bufPos = end + 1
+                break
+            else:
+                chunks.append(self._buf)
+                self._bufPos = len(self._buf)
+
+        return b"".join(chunks)
@@ -0,0 +1,168 @@
+# inotify.py --- Thin ctypes wrapper around the Linux inotify API
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Thin ctypes wrapper around the Linux inotify API.
+
+Only what is needed by the fswatcher module is implemented. See
+inotify(7) for the meaning of the IN_* constants. Use HAS_INOTIFY to
+know whether the API is available on the running system.
+
+"""
+
+import os
+import sys
+import errno
+import struct
+import ctypes
+import ctypes.util
+
+# This import requires the translation system [_() function] to be in
+# place.
+from .exceptions import FFGoException
+
+
+class error(FFGoException):
+    """Base class for exceptions in the inotify module."""
+    ExceptionShortDescription = _("Error caught in the inotify module")
+
+
+# Events (from <sys/inotify.h>)
+IN_ACCESS        = 0x00000001
+IN_MODIFY        = 0x00000002
+IN_ATTRIB        = 0x00000004
+IN_CLOSE_WRITE   = 0x00000008
+IN_CLOSE_NOWRITE = 0x00000010
+IN_OPEN          = 0x00000020
+IN_MOVED_FROM    = 0x00000040
+IN_MOVED_TO      = 0x00000080
+IN_CREATE        = 0x00000100
+IN_DELETE        = 0x00000200
+IN_DELETE_SELF   = 0x00000400
+IN_MOVE_SELF     = 0x00000800
+# Events sent by the kernel without being asked for
+IN_UNMOUNT       = 0x00002000
+IN_Q_OVERFLOW    = 0x00004000
+IN_IGNORED       = 0x00008000
+# Flags for inotify_add_watch()
+IN_ONLYDIR       = 0x01000000
+IN_DONT_FOLLOW   = 0x02000000
+IN_EXCL_UNLINK   = 0x04000000
+# Flag set in the 'mask' field of events concerning a directory
+IN_ISDIR         = 0x40000000
+# Flag for inotify_init1()
+IN_CLOEXEC       = 0o2000000
+
+# struct inotify_event without the trailing 'name' field
+_eventStruct = struct.Struct("iIII")
+
+
+def _loadLibc():
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                           use_errno=True)
+    except OSError:
+        return None
+
+    for func in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch"):
+        if not hasattr(libc, func):
+            return None
+
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                       ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+    return libc
+
+_libc = _loadLibc()
+HAS_INOTIFY = _libc is not None
+
+
+def _raiseOSError():
+    e = ctypes.get_errno()
+    raise OSError(e, os.strerror(e))
+
+
+class Inotify:
+    """Inotify instance.
+
+    Events are read with readEvents(), which blocks until at least one
+    event is available. The file descriptor, returned by fileno(), can
+    be used with select.select().
+
+    """
+
+    def __init__(self):
+        if not HAS_INOTIFY:
+            raise error(_("the inotify API is not available on this system"))
+
+        self.fd = _libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            _raiseOSError()
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def addWatch(self, path, mask):
+        """Add or modify a watch for 'path'; return the watch descriptor.
+
+        Raise OSError in case of failure (for instance, ENOENT if 'path'
+        doesn't exist, ENOSPC if the limit on the number of watches has
+        been reached).
+
+        """
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            _raiseOSError()
+
+        return wd
+
+    def removeWatch(self, wd):
+        if _libc.inotify_rm_watch(self.fd, wd) < 0:
+            e = ctypes.get_errno()
+            # EINVAL: the watch was already removed by the kernel (watched
+            # file or directory deleted)
+            if e != errno.EINVAL:
+                raise OSError(e, os.strerror(e))
+
+    def readEvents(self):
+        """Read pending events.
+
+        Return a list of (wd, mask, cookie, name) tuples. 'name' is the
+        name of the file concerned by the event, relative to the
+        watched directory, or None if the event concerns the watched
+        file or directory itself.
+
+        """
+        # Large enough for many events (each one is at most
+        # _eventStruct.size + NAME_MAX + 1 bytes long)
+        data = os.read(self.fd, 65536)
+        res = []
+        pos = 0
+
+        while pos < len(data):
+            wd, mask, cookie, nameLen = _eventStruct.unpack_from(data, pos)
+            pos += _eventStruct.size
+            if nameLen:
+                # The name is padded with NUL bytes
+                name = os.fsdecode(data[pos:pos+nameLen].rstrip(b"\0"))
+            else:
+                name = None
+            pos += nameLen
+            res.append((wd, mask, cookie, name))
+
+        return res
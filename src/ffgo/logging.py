@@ -8,6 +8,17 @@
 # have received a copy of this license along with this file. You can also find
 # it at <https://www.wtfpl.net/>.
 
+import sys
+import time
+import threading
+import json
+import contextlib
+
+try:
+    import resource             # not available on Windows
+except ImportError:
+    resource = None
+
 from . import misc
 
 
@@ -29,10 +40,30 @@ def _logFuncFactory(level):
     return (logFunc, logFunc_noPrefix)
 
 
+def peakMemoryUsage():
+    """Return the peak memory usage of the process in bytes, or None.
+
+    This is the maximum resident set size since the process started. None
+    is returned on platforms where it can't be obtained.
+
+    """
+    if resource is None:
+        return None
+
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on the other Unix-like systems
+    return maxRSS if sys.platform == "darwin" else 1024*maxRSS
+
+
 class Logger:
     def __init__(self, logLevel=LogLevel.notice, logFile=None):
         self.logLevel = logLevel
         self.logFile = logFile
+        # Timing spans, see startProfiling() and timingSpan()
+        self.profiling = False
+        self.timingSpans = []
+        # Each thread has its own stack of open spans.
+        self._threadData = threading.local()
 
     def open(self, *args, **kwargs):
         self.logFile = open(*args, **kwargs)
@@ -55,6 +86,111 @@ class Logger:
         kwargs["file"] = self.logFile
         print(*args, **kwargs)
 
+    def startProfiling(self):
+        """Start recording timing spans.
+
+        Until stopProfiling() is called, each timingSpan() block records
+        its wall-clock time, CPU time and the peak memory usage of the
+        process at the end of the block.
+
+        """
+        self.profiling = True
+        self.timingSpans = []
+        self._threadData = threading.local()
+        self._profilingStart = time.perf_counter()
+        # CPU time used before profiling was started (module imports...)
+        self._cpuTimeBeforeProfiling = time.process_time()
+
+    @contextlib.contextmanager
+    def timingSpan(self, name):
+        """Context manager timing the enclosed block when profiling.
+
+        Spans can be nested; each span is recorded with the names of
+        its enclosing spans in the same thread, and with the name of the
+        thread. The CPU time is that of the whole process, all threads
+        included. When profiling is not enabled, this does nothing.
+        Like any context manager created with contextlib.contextmanager(),
+        the return value can also be used as a function decorator, e.g.:
+
+          @logger.timingSpan("Config.update")
+          def update(self, ...):
+              ...
+
+        """
+        if not self.profiling:
+            yield
+            return
+
+        spanStack = self._threadData.__dict__.setdefault("spanStack", [])
+        spanStack.append(name)
+        span = {"name": name,
+                "path": "/".join(spanStack),
+                "depth": len(spanStack) - 1,
+                "thread": threading.current_thread().name}
+        # Record the span when it starts, so that spans are listed in start
+        # order.
+        self.timingSpans.append(span)
+        startWall = time.perf_counter()
+        startCPU = time.process_time()
+
+        try:
+            yield
+        finally:
+            span["start"] = startWall - self._profilingStart
+            span["wallTime"] = time.perf_counter() - startWall
+            span["CPUTime"] = time.process_time() - startCPU
+            span["peakMemory"] = peakMemoryUsage()
+            spanStack.pop()
+
+            self.debug("Timing span '{path}': {wall:.3f} s wall-clock time, "
+                       "{cpu:.3f} s CPU time".format(
+                           path=span["path"], wall=span["wallTime"],
+                           cpu=span["CPUTime"]))
+
+    def stopProfiling(self, reportPath=None, metadata=None):
+        """Stop recording timing spans and report the results.
+
+        A per-span breakdown is written to the log. If 'reportPath' is
+        not None, the same data is also written there in JSON format,
+        together with the 'metadata' dictionary if provided.
+
+        """
+        self.profiling = False
+        # Spans still open can't be reported.
+        spans = [ span for span in self.timingSpans if "wallTime" in span ]
+
+        def memStr(size):
+            return "?" if size is None else "{:.1f} MiB".format(size / 2**20)
+
+        lines = ["{:<50} {:>10} {:>10} {:>12}".format(
+            "Timing span", "Wall (s)", "CPU (s)", "Peak memory")]
+        mainThreadName = threading.main_thread().name
+        for span in spans:
+            name = "  "*span["depth"] + span["name"]
+            if span["thread"] != mainThreadName:
+                name += " [{}]".format(span["thread"])
+
+            lines.append("{:<50} {:>10.3f} {:>10.3f} {:>12}".format(
+                name, span["wallTime"], span["CPUTime"],
+                memStr(span["peakMemory"])))
+
+        self.noticeNP("Timing spans (CPU time used before profiling was "
+                      "started: {:.3f} s):\n{}\n".format(
+                          self._cpuTimeBeforeProfiling, "\n".join(lines)))
+
+        if reportPath is not None:
+            report = dict(metadata) if metadata is not None else {}
+            report.update(
+                {"CPUTimeBeforeProfiling": self._cpuTimeBeforeProfiling,
+                 "peakMemory": peakMemoryUsage(),
+                 "spans": spans})
+
+            with open(reportPath, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
+
+            self.notice("Profiling report written to '{}'".format(reportPath))
+
     debug, debugNP = _logFuncFactory("debug")
     info, infoNP = _logFuncFactory("info")
     notice, noticeNP = _logFuncFactory("notice")
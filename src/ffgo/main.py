@@ -30,19 +30,19 @@ from . import misc
 # Make it clear this is not the 'logging' module from the standard library
 from .logging import logger, LogLevel, allLogLevels
 
+from .config import Config, AbortConfig
+from .gui.mainwindow import App
+
+
+# Name of the JSON file written to LOG_DIR by --profile-startup
+STARTUP_PROFILE_FILE = PROGNAME + "_startup_profile.json"
+
+
 def earlyTkInit():
     master = tkinter.Tk()
     master.title(PROGNAME)
     return master
 
-# When importing 'config', the 'infowindow' module is itself imported, which
-# defines an InfoWindow class. This in turn requires the tkinter.Tk() object
-# (at class definition time) because of the constructor's
-# 'font=tkFont.nametofont("TkTextFont")' optional argument.
-master = earlyTkInit()
-from .config import Config, AbortConfig
-from .gui.mainwindow import App
-
 
 def processCommandLine():
     params = argparse.Namespace()
@@ -72,6 +72,12 @@ FlightGear executable, with suitable arguments.""",
       using this option: if you stop using it, the very small possible slowdown
       will disappear completely next time {prg} is started.""".format(
           prg=PROGNAME))
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="""\
+      measure the wall-clock time, CPU time and peak memory usage of the
+      various startup phases; the results are written to the log and, in JSON
+      format, to {file} in the log directory""".format(
+          file=STARTUP_PROFILE_FILE))
     parser.add_argument('-t', '--test-mode', action='store_true',
                         help="""\
       enable test mode (useful to test pieces of code from the {prg} GUI)"""
@@ -101,7 +107,8 @@ def run(master, params):
     # obtaining the screen dpi in Config methods using
     # master.winfo_fpixels('1i')).
     try:
-        config = Config(params, master)
+        with logger.timingSpan("Config.__init__"):
+            config = Config(params, master)
     except AbortConfig:
         # We have a temporary translation setup at this point, based on the
         # environment.
@@ -119,12 +126,25 @@ def run(master, params):
         locale.setlocale(locale.LC_CTYPE, '') # encoding only
 
     # Initialize main window.
-    app = App(master, config, params)
+    with logger.timingSpan("App.__init__"):
+        app = App(master, config, params)
 
     # Override the window close button in order to allow a controlled, clean
     # shutdown.
     master.protocol("WM_DELETE_WINDOW", app.quit)
 
+    if params.profile_startup:
+        # Let Tk display the main window before stopping the measurements.
+        with logger.timingSpan("initial display"):
+            master.update_idletasks()
+
+        logger.stopProfiling(
+            os.path.join(LOG_DIR, STARTUP_PROFILE_FILE),
+            metadata={"program": constants.NAME_WITH_VERSION,
+                      "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                      "platform": platform.platform(),
+                      "pythonVersion": misc.pythonVersionString()})
+
     return master.mainloop()
 
 
@@ -185,7 +205,13 @@ def main():
             platform=platform.platform(),
             python_version=misc.pythonVersionString()))
 
+        if params.profile_startup:
+            logger.startProfiling()
+
         try:
+            # Not done at import time, so that 'ffgo --help' and the like
+            # don't need a display.
+            master = earlyTkInit()
             master.report_callback_exception = reportTkinterCallbackException
             res = run(master, params)
         except:
@@ -10,9 +10,15 @@
 
 import os
 import sys
+import collections
+import concurrent.futures
+import contextlib
+import gc
 import platform
 import enum
 import gettext
+import hashlib
+import importlib.util
 import locale
 import textwrap
 import traceback
@@ -41,6 +47,50 @@ def executableFileName(base):
         return base
 
 
+def pathDigest(path):
+    """Return a hexadecimal string identifying the file at 'path'.
+
+    The result only depends on the absolute path, which makes it
+    suitable as a file name for data derived from 'path' (several such
+    files can thus be stored in the same directory).
+
+    """
+    return hashlib.sha1(os.fsencode(os.path.abspath(path))).hexdigest()
+
+
+def moduleAvailable(name):
+    """Tell whether module 'name' can be imported, without importing it.
+
+    This allows optional dependencies to be imported only when they are
+    actually needed. If 'name' is a submodule, its parent packages are
+    imported, though.
+
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@contextlib.contextmanager
+def gcDisabled():
+    """Context manager disabling the cyclic garbage collector.
+
+    Useful when creating many objects that can't form reference cycles:
+    otherwise, the collector would repeatedly (and uselessly) traverse
+    all of them. The collector is re-enabled on exit unless it was
+    already disabled on entry.
+
+    """
+    wasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if wasEnabled:
+            gc.enable()
+
+
 def isDescendantWidget(maybeParent, widget):
     """Return True if 'widget' is 'maybeParent' or a descendant of it.
 
@@ -368,6 +418,155 @@ class Observable:
                              .format(accessType=accessType))
 
 
+class LRUCache:
+    """Size-bounded mapping with least-recently-used eviction.
+
+    The cache can be bounded by number of entries ('maxEntries'), by
+    approximate memory use ('maxSize', in the unit returned by
+    'sizeFunc'), or both; None means “no limit” for the corresponding
+    criterion. When a limit is exceeded, the least recently used
+    entries are evicted, except the most recent one (so that a single
+    big entry larger than 'maxSize' can still be cached).
+
+    Lookups and insertions are O(1). The 'hits', 'misses' and
+    'evictions' counters are meant for debugging and performance
+    monitoring (cf. statsString()).
+
+    """
+
+    def __init__(self, maxEntries=None, maxSize=None, sizeFunc=None):
+        self._data = collections.OrderedDict() # key -> (value, size)
+        self.sizeFunc = sizeFunc if sizeFunc is not None else (lambda v: 1)
+        self.totalSize = 0
+        self.hits = self.misses = self.evictions = 0
+        self.setLimits(maxEntries, maxSize)
+
+    def setLimits(self, maxEntries=None, maxSize=None):
+        self.maxEntries = maxEntries
+        self.maxSize = maxSize
+        self._evict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # Doesn't count as a hit or miss, and doesn't promote the entry
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the value for 'key', marking it as most recently used.
+
+        Return 'default' if 'key' is not in the cache.
+
+        """
+        try:
+            value, size = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Add or replace an entry, then evict old entries if needed."""
+        if key in self._data:
+            self.totalSize -= self._data.pop(key)[1]
+
+        size = self.sizeFunc(value)
+        self._data[key] = (value, size)
+        self.totalSize += size
+        self._evict()
+
+    def _evict(self):
+        data = self._data
+        while len(data) > 1 and (
+                (self.maxEntries is not None and
+                 len(data) > self.maxEntries) or
+                (self.maxSize is not None and self.totalSize > self.maxSize)):
+            key, (value, size) = data.popitem(last=False)
+            self.totalSize -= size
+            self.evictions += 1
+
+        if self.maxEntries is not None and self.maxEntries < 1:
+            self.evictions += len(data)
+            data.clear()
+            self.totalSize = 0
+
+    def clear(self):
+        """Remove all entries (the counters are not reset)."""
+        self._data.clear()
+        self.totalSize = 0
+
+    def statsString(self):
+        return ("{nb} entries (approx. size: {size}), {hits} hits, {misses} "
+                "misses, {evictions} evictions".format(
+                    nb=len(self._data), size=self.totalSize, hits=self.hits,
+                    misses=self.misses, evictions=self.evictions))
+
+
+class TaskGraph:
+    """Run interdependent tasks on a pool of threads.
+
+    Each task has a name and may depend on tasks added before it. A
+    task is run as soon as all its dependencies are finished; it
+    receives their results as first positional arguments, in the order
+    given by 'deps', followed by its own arguments. If a dependency
+    raised an exception, the dependent task is not run and result()
+    raises the same exception for both tasks.
+
+    Since dependencies must be added before the tasks that need them,
+    and tasks are started in the order they were added, a task can
+    only wait for tasks that have already been started: no deadlock is
+    possible, whatever the number of threads.
+
+    Tasks run outside the main thread, therefore they must not use
+    Tkinter (this includes Tk variables). Read the values they need in
+    the main thread, and pass them as arguments.
+
+    """
+
+    def __init__(self, maxWorkers=4):
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=maxWorkers)
+        self._futures = {}
+
+    def add(self, name, func, *args, deps=(), **kwargs):
+        depFutures = [ self._futures[dep] for dep in deps ]
+
+        def runTask():
+            depResults = [ future.result() for future in depFutures ]
+            return func(*(depResults + list(args)), **kwargs)
+
+        self._futures[name] = self._executor.submit(runTask)
+
+    def __contains__(self, name):
+        return name in self._futures
+
+    def done(self, name):
+        """Tell whether task 'name' is finished (successfully or not)."""
+        return self._futures[name].done()
+
+    def result(self, name):
+        """Wait for task 'name' to finish and return its result.
+
+        If the task raised an exception, the same exception is raised
+        here.
+
+        """
+        return self._futures[name].result()
+
+    def close(self):
+        """Declare that no more tasks will be added.
+
+        Tasks already added still run to completion; the threads exit
+        once they are done.
+
+        """
+        self._executor.shutdown(wait=False)
+
+
 class ProgressFeedbackHandler:
     """Simple class to interface with widgets indicating progress of a task."""
     def __init__(self, text="", min=0.0, max=100.0, value=0.0):
@@ -0,0 +1,178 @@
+# state_snapshot.py --- Snapshot of the application state for fast startup
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2016  Florent Rougon
+#
+# This file is distributed under the terms of the DO WHAT THE FUCK YOU WANT TO
+# PUBLIC LICENSE version 2, dated December 2004, by Sam Hocevar. You should
+# have received a copy of this license along with this file. You can also find
+# it at <https://www.wtfpl.net/>.
+
+"""Snapshot of the application state for fast startup.
+
+Some data loaded at startup is expensive to rebuild from its source
+files although these files rarely change: for instance, creating the
+AirportStub instances for all airports of the apt digest file requires
+decoding tens of thousands of binary records. The snapshot file stores
+such data in named sections, each one with a fingerprint of its inputs
+(typically, the modification time, size and inode number of the source
+file, plus the version of the format used to encode the data).
+
+A section is only used if its fingerprint is equal to the one computed
+by the caller from the current state of the input files; otherwise, the
+caller rebuilds the data from its sources and stores it in the snapshot
+for the next time. The whole file is read at once, the first time a
+section is needed.
+
+The data is serialized with the 'marshal' module, which is much faster
+than 'pickle' for the plain tuples, lists and strings stored here. Since
+the marshal format depends on the Python version, the header records the
+version of the snapshot format, the marshal version and the Python
+version; a file with a different header is ignored. Data stored in a
+section must only contain types supported by marshal.
+
+Files modified less than RACY_INTERVAL seconds before being read should
+not be used in fingerprints, for the same reason as in the
+aircraft_catalog module (see fileFingerprint()).
+
+"""
+
+import os
+import sys
+import time
+import marshal
+import threading
+
+from . import constants
+from . import misc
+from .logging import logger
+
+
+# See the module docstring
+RACY_INTERVAL = 2.0
+
+
+def fileFingerprint(path):
+    """Return a fingerprint for file 'path', or None.
+
+    The fingerprint is a tuple (mtime_ns, size, inode) suitable for use
+    in a fingerprint passed to StateSnapshot.get() or
+    StateSnapshot.put(). None is returned if the file doesn't exist or
+    can't be stat()ed, or if it was modified less than RACY_INTERVAL
+    seconds ago (it could then be modified again without its
+    modification time changing).
+
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    if time.time() - st.st_mtime_ns*1e-9 < RACY_INTERVAL:
+        return None
+
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class StateSnapshot:
+    """Snapshot of the application state, organized in sections.
+
+    Methods of this class may be called from any thread.
+
+    """
+
+    formatVersion = 1
+
+    def __init__(self, path=constants.STATE_SNAPSHOT):
+        self.path = path
+        self.sections = None    # loaded on first use
+        self.lock = threading.Lock()
+
+    @classmethod
+    def _header(cls):
+        return "FFGo state snapshot, format {}, marshal {}, Python {}\n" \
+            .format(cls.formatVersion, marshal.version,
+                    ".".join(map(str, sys.version_info[:3]))).encode("ascii")
+
+    def _load(self):
+        self.sections = {}
+        header = self._header()
+
+        try:
+            with open(self.path, "rb") as f:
+                contents = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.info("Ignoring the state snapshot '{}': {}".format(
+                self.path, e))
+            return
+
+        if not contents.startswith(header):
+            logger.info("Ignoring the state snapshot '{}' (written by another "
+                        "version)".format(self.path))
+            return
+
+        try:
+            with misc.gcDisabled():
+                sections = marshal.loads(contents[len(header):])
+        except (EOFError, ValueError, TypeError) as e:
+            logger.info("Ignoring the state snapshot '{}': {}".format(
+                self.path, e))
+            return
+
+        if isinstance(sections, dict):
+            self.sections = sections
+
+    def _save(self):
+        tmpPath = self.path + ".tmp"
+        try:
+            with open(tmpPath, "wb") as f:
+                f.write(self._header())
+                f.write(marshal.dumps(self.sections))
+            os.replace(tmpPath, self.path)
+        except (OSError, ValueError) as e:
+            # The snapshot is only an optimization.
+            logger.warning(_("Unable to write the state snapshot "
+                             "'{path}': {errmsg}").format(path=self.path,
+                                                          errmsg=e))
+
+    def get(self, name, fingerprint):
+        """Return the data stored in section 'name', or None.
+
+        'fingerprint' is a flat tuple of values describing the inputs
+        of the data. None is returned if there is no such section, or if
+        it was stored with a different fingerprint. A fingerprint that
+        is None or contains None never matches. The returned data
+        must not be modified.
+
+        """
+        if fingerprint is None or None in fingerprint:
+            return None
+
+        with self.lock:
+            if self.sections is None:
+                self._load()
+            storedFingerprint, data = self.sections.get(name, (None, None))
+
+        return data if storedFingerprint == tuple(fingerprint) else None
+
+    def put(self, name, fingerprint, data):
+        """Store 'data' in section 'name' and write the snapshot file.
+
+        Nothing is stored if 'fingerprint' is None or contains None. In
+        this case, section 'name' is removed from the snapshot, since
+        its data can't be trusted anymore.
+
+        """
+        with self.lock:
+            if self.sections is None:
+                self._load()
+
+            if fingerprint is None or None in fingerprint:
+                if self.sections.pop(name, None) is None:
+                    return
+            else:
+                self.sections[name] = (tuple(fingerprint), data)
+
+            self._save()
@@ -265,14 +265,37 @@ class StatsManagerBase(metaclass=abc.ABCMeta):
                 # to 'self.saveFile'.
                 self.unusedItems[jsonKey] = datesOfUse
             else:
-                item.datesOfUse = datesOfUse
-                today = datetime.date.today().toordinal()
-                showPeriod = self.showPeriodVar.get()
-                # Number of times the item was used in the last 'showPeriod'
-                # days
-                item.useCountForShow = len(
-                    [ date for date in datesOfUse
-                      if today - date < showPeriod ])
+                self._setDatesOfUse(item, datesOfUse)
+
+    def _setDatesOfUse(self, item, datesOfUse):
+        item.datesOfUse = datesOfUse
+        today = datetime.date.today().toordinal()
+        showPeriod = self.showPeriodVar.get()
+        # Number of times the item was used in the last 'showPeriod' days
+        item.useCountForShow = len(
+            [ date for date in datesOfUse if today - date < showPeriod ])
+
+    def addItem(self, jsonKey, item):
+        """Take into account an item that has just become available.
+
+        If statistics for this item have been loaded but were unused
+        (cf. self.unusedItems), they are attached to 'item'. This
+        allows one to add an item without reloading the whole file.
+
+        """
+        datesOfUse = self.unusedItems.pop(jsonKey, None)
+        if datesOfUse is not None:
+            self._setDatesOfUse(item, datesOfUse)
+
+    def removeItem(self, jsonKey, item):
+        """Take into account an item that is not available anymore.
+
+        Its statistics are kept in self.unusedItems, so that they are
+        not lost when save() is called.
+
+        """
+        if item.datesOfUse:
+            self.unusedItems[jsonKey] = item.datesOfUse
 
     def load(self):
         """Load 'self.saveFile' into memory, if it exists.
@@ -438,7 +461,10 @@ class AircraftStatsManager(StatsManagerBase):
         else:
             raise NoSuchAircraft(acName, acDir)
 
+    @staticmethod
+    def jsonKey(aircraft):
+        return aircraft.name + '\0' + aircraft.dir
+
     def items(self):
         for aircraft in self.config.aircraftList:
-            yield ((aircraft.name + '\0' + aircraft.dir),
-                   aircraft)
+            yield (self.jsonKey(aircraft), aircraft)